@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+try:
+    from dev.pdf_assets import cached_template_value, open_buffer
+except ModuleNotFoundError:
+    # Fallback for direct script execution from source checkout.
+    from pdf_assets import cached_template_value, open_buffer  # type: ignore
+
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "assets" / "templates"
+DEFAULT_TEMPLATE_PATH = TEMPLATES_DIR / "cub_scout_award_certificate.pdf"
+DEFAULT_LION_RANK_TEMPLATE_PATH = TEMPLATES_DIR / "lion_rank_card.pdf"
+DEFAULT_TIGER_RANK_TEMPLATE_PATH = TEMPLATES_DIR / "tiger_rank_card.pdf"
+DEFAULT_WOLF_RANK_TEMPLATE_PATH = TEMPLATES_DIR / "wolf_rank_card.pdf"
+DEFAULT_BEAR_RANK_TEMPLATE_PATH = TEMPLATES_DIR / "bear_rank_card.pdf"
+DEFAULT_WEBELO_RANK_TEMPLATE_PATH = TEMPLATES_DIR / "webelo_rank_card.pdf"
+DEFAULT_ARROW_OF_LIGHT_RANK_TEMPLATE_PATH = TEMPLATES_DIR / "arrow_of_light_rank_card.pdf"
+TEMPLATE_PATH = Path(os.environ.get("CERT_TEMPLATE_PATH", str(DEFAULT_TEMPLATE_PATH))).expanduser()
+RANK_TEMPLATE_PATHS = {
+    "Lion": Path(os.environ.get("CERT_TEMPLATE_PATH_LION", str(DEFAULT_LION_RANK_TEMPLATE_PATH))).expanduser(),
+    "Tiger": Path(os.environ.get("CERT_TEMPLATE_PATH_TIGER", str(DEFAULT_TIGER_RANK_TEMPLATE_PATH))).expanduser(),
+    "Wolf": Path(
+        os.environ.get("CERT_TEMPLATE_PATH_WOLF", str(DEFAULT_WOLF_RANK_TEMPLATE_PATH))
+    ).expanduser(),
+    "Bear": Path(os.environ.get("CERT_TEMPLATE_PATH_BEAR", str(DEFAULT_BEAR_RANK_TEMPLATE_PATH))).expanduser(),
+    "Webelo": Path(os.environ.get("CERT_TEMPLATE_PATH_WEBELO", str(DEFAULT_WEBELO_RANK_TEMPLATE_PATH))).expanduser(),
+    "Arrow of Light": Path(
+        os.environ.get("CERT_TEMPLATE_PATH_ARROW_OF_LIGHT", str(DEFAULT_ARROW_OF_LIGHT_RANK_TEMPLATE_PATH))
+    ).expanduser(),
+}
+RANK_OUTPUT_ROTATION_DEGREES = int(os.environ.get("RANK_OUTPUT_ROTATION_DEGREES", "90")) % 360
+FIELD_FILL_KIND = "supports_field_fill"
+RANK_ALIASES = {
+    "lion": "Lion",
+    "tiger": "Tiger",
+    "wolf": "Wolf",
+    "bear": "Bear",
+    "webelo": "Webelo",
+    "webelos": "Webelo",
+    "arrow of light": "Arrow of Light",
+    "arrow_of_light": "Arrow of Light",
+    "aol": "Arrow of Light",
+}
+
+
+def canonical_rank(value: str) -> str:
+    return RANK_ALIASES.get((value or "").strip().lower(), "Wolf")
+
+
+def normalize_row(row: dict[str, str], award_name: str) -> dict[str, str]:
+    # The generator's row shape, shared by the web app and batch_render so both fill the same fields.
+    return {
+        "Date": (row.get("Date") or "").strip(),
+        "Pack Number": (row.get("Pack Number") or "").strip(),
+        "Den Number": (row.get("Den Number") or row.get("Den No.") or "").strip(),
+        "Scout Name": (row.get("Scout Name") or "").strip(),
+        "Award Name": award_name,
+        "Den Leader": (row.get("Den Leader") or "").strip(),
+        "Cubmaster": (row.get("Cubmaster") or "").strip(),
+    }
+
+
+def selected_template(workflow: str, selected_rank: str) -> Path:
+    if workflow != "ranks":
+        return TEMPLATE_PATH
+    rank_template = RANK_TEMPLATE_PATHS.get(canonical_rank(selected_rank), TEMPLATE_PATH)
+    if rank_template.exists():
+        return rank_template
+    return TEMPLATE_PATH
+
+
+def detect_field_fill_support(template_data: memoryview) -> bool:
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(open_buffer(template_data))
+        page = reader.pages[0]
+        annots = page.get("/Annots")
+        if annots and len(annots.get_object()) > 0:
+            return True
+        acroform = reader.trailer["/Root"].get("/AcroForm")
+        if acroform:
+            fields = acroform.get_object().get("/Fields", [])
+            return len(fields) > 0
+    except Exception:
+        pass
+    return False
+
+
+def template_supports_field_fill(template_path: Path) -> bool:
+    # Fillable templates go through the certificate filler; the rest use rank-card anchor layout.
+    return cached_template_value(template_path, FIELD_FILL_KIND, detect_field_fill_support)
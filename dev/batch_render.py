@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Render many award rosters in one run, in parallel across worker processes.
+
+Usage:
+  python3 batch_render.py rosters/ --output-dir out/
+  python3 batch_render.py "rosters/*.csv" --workers 4
+  python3 batch_render.py --manifest rosters.json --output-dir out/
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+try:
+    from dev.award_templates import (
+        RANK_OUTPUT_ROTATION_DEGREES,
+        RANK_TEMPLATE_PATHS,
+        TEMPLATE_PATH,
+        canonical_rank,
+        normalize_row,
+        selected_template,
+        template_supports_field_fill,
+    )
+    from dev.pdf_assets import register_font
+    from dev.pdf_output import DEFAULT_OPTIMIZE_LEVEL, OPTIMIZE_LEVELS
+except ModuleNotFoundError:
+    # Fallback for direct script execution from source checkout.
+    from award_templates import (  # type: ignore
+        RANK_OUTPUT_ROTATION_DEGREES,
+        RANK_TEMPLATE_PATHS,
+        TEMPLATE_PATH,
+        canonical_rank,
+        normalize_row,
+        selected_template,
+        template_supports_field_fill,
+    )
+    from pdf_assets import register_font  # type: ignore
+    from pdf_output import DEFAULT_OPTIMIZE_LEVEL, OPTIMIZE_LEVELS  # type: ignore
+
+FONTS_DIR = Path(__file__).resolve().parents[1] / "assets" / "fonts"
+STATE_FILE_NAME = ".batch_state.json"
+SUMMARY_FILE_NAME = "batch_summary.json"
+
+# Set once per worker process by _init_worker.
+_worker_settings: dict[str, object] = {}
+
+
+def _certs_module():
+    try:
+        from dev import fill_cub_scout_certs
+    except ModuleNotFoundError:
+        import fill_cub_scout_certs  # type: ignore
+    return fill_cub_scout_certs
+
+
+def _rank_cards_module():
+    try:
+        from dev import fill_cub_scout_rank_cards
+    except ModuleNotFoundError:
+        import fill_cub_scout_rank_cards  # type: ignore
+    return fill_cub_scout_rank_cards
+
+
+def _template_paths() -> list[Path]:
+    return [path for path in {TEMPLATE_PATH, *RANK_TEMPLATE_PATHS.values()} if path.exists()]
+
+
+def _init_worker(settings: dict[str, object]) -> None:
+    # Each worker parses templates and TTFs once up front instead of once per roster.
+    _worker_settings.clear()
+    _worker_settings.update(settings)
+    for name_key, file_key in (("font_name", "font_file"), ("script_font_name", "script_font_file")):
+        if settings.get(file_key):
+            register_font(str(settings[name_key]), str(settings[file_key]))
+    for template_path in _template_paths():
+        if template_supports_field_fill(template_path):
+            _certs_module().warm_template(template_path)
+        else:
+            _rank_cards_module().warm_template(template_path)
+
+
+def _read_roster(csv_bytes: bytes) -> tuple[list[str], list[dict[str, str]]]:
+    reader = csv.DictReader(io.StringIO(csv_bytes.decode("utf-8-sig")))
+    if not reader.fieldnames:
+        raise ValueError("CSV has no header row.")
+    rows = [row for row in reader if any((v or "").strip() for v in row.values())]
+    if not rows:
+        raise ValueError("CSV has no data rows.")
+    return list(reader.fieldnames), rows
+
+
+def _plan_groups(job: dict[str, object], fieldnames: list[str], rows: list[dict[str, str]]):
+    # Rosters with a Rank column (or a manifest rank) are rank cards, grouped into one PDF per rank;
+    # everything else is a single adventure certificate PDF.
+    workflow = job.get("workflow") or ("ranks" if "Rank" in fieldnames or job.get("rank") else "adventures")
+    if workflow != "ranks":
+        template_path = Path(job["template"]) if job.get("template") else TEMPLATE_PATH
+        normalized = [normalize_row(row, (row.get("Award Name") or "").strip()) for row in rows]
+        return workflow, [("", template_path, normalized)]
+
+    by_rank: dict[str, list[dict[str, str]]] = {}
+    for row in rows:
+        rank = canonical_rank((row.get("Rank") or "").strip() or str(job.get("rank") or ""))
+        by_rank.setdefault(rank, []).append(normalize_row(row, rank))
+    return workflow, [
+        (rank, Path(job["template"]) if job.get("template") else selected_template("ranks", rank), rank_rows)
+        for rank, rank_rows in by_rank.items()
+    ]
+
+
+def _output_path(output: Path, rank: str, group_count: int) -> Path:
+    if group_count == 1:
+        return output
+    suffix = re.sub(r"[^a-z0-9]+", "_", rank.lower()).strip("_")
+    return output.with_name(f"{output.stem}_{suffix}{output.suffix}")
+
+
+def _render_input(job: dict[str, object]) -> dict[str, object]:
+    started = time.perf_counter()
+    result: dict[str, object] = {"input": job["input"], "status": "rendered", "outputs": [], "rows": 0}
+    try:
+        fieldnames, rows = _read_roster(Path(str(job["input"])).read_bytes())
+        workflow, groups = _plan_groups(job, fieldnames, rows)
+        result["workflow"] = workflow
+        result["rows"] = len(rows)
+        settings = dict(_worker_settings)
+        if workflow == "ranks":
+            settings["output_rotation_degrees"] = RANK_OUTPUT_ROTATION_DEGREES
+            settings["final_rotation_degrees"] = RANK_OUTPUT_ROTATION_DEGREES
+        for rank, template_path, group_rows in groups:
+            if not template_path.exists():
+                raise FileNotFoundError(f"Template PDF not found: {template_path}")
+            group_function = (
+                _certs_module().fill_certificate_groups
+                if template_supports_field_fill(template_path)
+                else _rank_cards_module().fill_rank_card_groups
+            )
+            output_path = _output_path(Path(str(job["output"])), rank, len(groups))
+            for _, pdf_bytes in group_function([(rank, group_rows)], template_path=template_path, **settings):
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                output_path.write_bytes(pdf_bytes)
+            result["outputs"].append(str(output_path))
+    except Exception as exc:
+        result["status"] = "failed"
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def _expand_inputs(patterns: list[str]) -> list[Path]:
+    paths: list[Path] = []
+    for pattern in patterns:
+        candidate = Path(pattern).expanduser()
+        if candidate.is_dir():
+            paths.extend(sorted(candidate.glob("*.csv")))
+        elif candidate.is_file():
+            paths.append(candidate)
+        else:
+            paths.extend(Path(match) for match in sorted(glob.glob(str(candidate), recursive=True)))
+    seen: set[Path] = set()
+    unique = []
+    for path in paths:
+        resolved = path.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            unique.append(resolved)
+    return unique
+
+
+def _load_manifest(manifest_path: Path) -> list[dict[str, object]]:
+    # A JSON list of {"csv": ..., "output"?: ..., "workflow"?: ..., "rank"?: ..., "template"?: ...};
+    # relative paths are resolved against the manifest's directory.
+    entries = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        raise ValueError("Manifest must be a JSON list of roster entries.")
+    base_dir = manifest_path.resolve().parent
+    jobs = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("csv"):
+            raise ValueError(f"Manifest entry needs a csv path: {entry!r}")
+        job = {key: entry[key] for key in ("workflow", "rank") if entry.get(key)}
+        if job.get("workflow") not in (None, "adventures", "ranks"):
+            raise ValueError(f"Unknown workflow {job['workflow']!r}; expected adventures or ranks.")
+        job["input"] = str((base_dir / str(entry["csv"])).resolve())
+        for key in ("output", "template"):
+            if entry.get(key):
+                job[key] = str((base_dir / str(entry[key])).resolve())
+        jobs.append(job)
+    return jobs
+
+
+def _assign_outputs(jobs: list[dict[str, object]], output_dir: Path) -> None:
+    # Rosters from different folders often share a file name (den1/roster.csv, den2/roster.csv).
+    stems: dict[str, int] = {}
+    for job in jobs:
+        if not job.get("output"):
+            stems[Path(str(job["input"])).stem] = stems.get(Path(str(job["input"])).stem, 0) + 1
+    for job in jobs:
+        if job.get("output"):
+            continue
+        input_path = Path(str(job["input"]))
+        stem = input_path.stem if stems[input_path.stem] == 1 else f"{input_path.parent.name}_{input_path.stem}"
+        job["output"] = str(output_dir / f"{stem}.pdf")
+
+
+def _input_key(job: dict[str, object], settings: dict[str, object]) -> str:
+    digest = hashlib.sha256(Path(str(job["input"])).read_bytes())
+    context = {
+        "job": {key: job.get(key) for key in ("output", "workflow", "rank", "template")},
+        "settings": settings,
+        "rank_rotation": RANK_OUTPUT_ROTATION_DEGREES,
+        "templates": {str(path): path.stat().st_mtime_ns for path in _template_paths()},
+    }
+    if job.get("template"):
+        # A manifest's own template is not among the built-ins above; editing it must re-render its rosters.
+        template_path = Path(str(job["template"])).resolve()
+        context["template_sha256"] = hashlib.sha256(template_path.read_bytes()).hexdigest()
+    digest.update(json.dumps(context, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_state(state_path: Path) -> dict[str, dict[str, object]]:
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_json(path: Path, payload: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def run_batch(
+    jobs: list[dict[str, object]],
+    output_dir: Path,
+    settings: dict[str, object],
+    workers: int | None = None,
+    force: bool = False,
+) -> dict[str, object]:
+    started = time.perf_counter()
+    _assign_outputs(jobs, output_dir)
+    state_path = output_dir / STATE_FILE_NAME
+    state = {} if force else _load_state(state_path)
+
+    results: dict[str, dict[str, object]] = {}
+    pending: list[dict[str, object]] = []
+    for job in jobs:
+        try:
+            job["key"] = _input_key(job, settings)
+        except OSError as exc:
+            results[str(job["input"])] = {"input": job["input"], "status": "failed", "error": str(exc), "seconds": 0}
+            continue
+        previous = state.get(str(job["input"]))
+        # Unchanged input, settings and templates, and the previous outputs are still on disk.
+        if (
+            previous
+            and previous.get("key") == job["key"]
+            and all(Path(path).exists() for path in previous.get("outputs", []))
+        ):
+            results[str(job["input"])] = {**previous, "input": job["input"], "status": "skipped", "seconds": 0}
+            continue
+        pending.append(job)
+
+    worker_count = max(1, min(workers or os.cpu_count() or 1, len(pending))) if pending else 0
+    if pending:
+        with ProcessPoolExecutor(worker_count, initializer=_init_worker, initargs=(settings,)) as pool:
+            futures = {pool.submit(_render_input, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                result = future.result()
+                results[str(job["input"])] = result
+                if result["status"] == "rendered":
+                    state[str(job["input"])] = {
+                        "key": job["key"],
+                        "outputs": result["outputs"],
+                        "rows": result["rows"],
+                        "workflow": result["workflow"],
+                    }
+                else:
+                    state.pop(str(job["input"]), None)
+        _write_json(state_path, state)
+
+    files = [results[str(job["input"])] for job in jobs]
+    counts = {status: sum(1 for f in files if f["status"] == status) for status in ("rendered", "skipped", "failed")}
+    return {
+        "inputs": len(files),
+        **counts,
+        "workers": worker_count,
+        "seconds": round(time.perf_counter() - started, 4),
+        "render_seconds": round(sum(float(f.get("seconds") or 0) for f in files), 4),
+        "files": files,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render many award CSV rosters in parallel.")
+    parser.add_argument("inputs", nargs="*", help="CSV files, directories of CSVs, or glob patterns.")
+    parser.add_argument("--manifest", default=None, help="JSON list of {csv, output, workflow, rank, template}.")
+    parser.add_argument("--output-dir", default="batch_output", help="Directory for PDFs, state and summary.")
+    parser.add_argument("--summary", default=None, help=f"Summary JSON path. Default: <output-dir>/{SUMMARY_FILE_NAME}")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes. Default: CPU count.")
+    parser.add_argument("--force", action="store_true", help="Re-render inputs even if they are unchanged.")
+    parser.add_argument("--shift-left-inch", type=float, default=0.5, help="Shift output left in display space.")
+    parser.add_argument("--shift-down-inch", type=float, default=0.5, help="Shift output down in display space.")
+    parser.add_argument("--font-name", default="Helvetica", help="Font name for filled text.")
+    parser.add_argument("--font-file", default=None, help="Optional path to TTF for --font-name.")
+    parser.add_argument("--font-size", type=float, default=14.0, help="Base font size for filled text.")
+    parser.add_argument("--script-font-name", default="PatrickHand", help="Registered font name for the script font.")
+    parser.add_argument(
+        "--script-font-file",
+        default=str(FONTS_DIR / "PatrickHand-Regular.ttf"),
+        help="Path to a script TTF for Den Leader and Cubmaster.",
+    )
+    parser.add_argument("--script-font-size", type=float, default=24.0, help="Font size for Den Leader/Cubmaster.")
+    parser.add_argument(
+        "--optimize",
+        choices=OPTIMIZE_LEVELS,
+        default=DEFAULT_OPTIMIZE_LEVEL,
+        help="Output size optimization: none, fast or small.",
+    )
+    args = parser.parse_args()
+    if not args.inputs and not args.manifest:
+        parser.error("pass CSV inputs or --manifest")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        jobs = _load_manifest(Path(args.manifest)) if args.manifest else []
+    except (OSError, ValueError) as exc:
+        parser.error(f"could not read manifest: {exc}")
+    jobs.extend({"input": str(path)} for path in _expand_inputs(args.inputs))
+    if not jobs:
+        parser.error("no CSV files matched")
+
+    script_font_file = Path(args.script_font_file)
+    settings: dict[str, object] = {
+        "shift_left_inch": args.shift_left_inch,
+        "shift_down_inch": args.shift_down_inch,
+        "font_name": args.font_name,
+        "font_file": args.font_file,
+        "font_size": args.font_size,
+        "script_font_name": args.script_font_name if script_font_file.exists() else None,
+        "script_font_file": str(script_font_file) if script_font_file.exists() else None,
+        "script_font_size": args.script_font_size,
+        "optimize": args.optimize,
+    }
+    output_dir = Path(args.output_dir).resolve()
+    summary = run_batch(jobs, output_dir, settings, workers=args.workers, force=args.force)
+    summary_path = Path(args.summary) if args.summary else output_dir / SUMMARY_FILE_NAME
+    _write_json(summary_path, summary)
+
+    for entry in summary["files"]:
+        detail = entry.get("error") or ", ".join(Path(p).name for p in entry.get("outputs", []))
+        print(f"{entry['status']:>8}  {entry['input']}  {detail}")
+    print(
+        f"{summary['rendered']} rendered, {summary['skipped']} skipped, {summary['failed']} failed "
+        f"in {summary['seconds']:.2f}s. Summary: {summary_path}"
+    )
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
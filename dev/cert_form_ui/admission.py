@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    from dev.page_range import ROWS_PER_PAGE
+except ModuleNotFoundError:
+    from page_range import ROWS_PER_PAGE  # type: ignore
+
+RENDER_MAX_CONCURRENCY = int(os.environ.get("RENDER_MAX_CONCURRENCY", "3"))
+RENDER_MAX_HEAVY_CONCURRENCY = int(os.environ.get("RENDER_MAX_HEAVY_CONCURRENCY", "1"))
+RENDER_HEAVY_COST = float(os.environ.get("RENDER_HEAVY_COST", "40"))
+RENDER_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("RENDER_QUEUE_TIMEOUT_SECONDS", "20"))
+RENDER_MAX_QUEUE_DEPTH = int(os.environ.get("RENDER_MAX_QUEUE_DEPTH", "16"))
+
+
+def estimate_render_cost(row_count: int, output_mode: str, workflow: str) -> float:
+    # Cost is measured in "template pages merged": the unit that dominates render CPU.
+    pages = max(1, math.ceil(row_count / ROWS_PER_PAGE))
+    if output_mode == "per_scout_zip":
+        # Every scout gets its own document, so each row pays for a full page merge and a PDF write.
+        cost = float(max(row_count, 1))
+    elif output_mode in ("per_den_zip", "per_rank_zip"):
+        # Partially filled last pages per group cost roughly one extra page per group.
+        cost = pages * 1.5
+    else:
+        cost = float(pages)
+    if workflow == "ranks":
+        cost *= 1.25
+    return cost
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Render queue is full; retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    # Caps concurrent renders (and, separately, concurrent heavy renders) and queues the rest.
+    # Waiting requests are admitted cheapest-first so a few huge rosters cannot starve small ones.
+    def __init__(
+        self,
+        max_concurrency: int = RENDER_MAX_CONCURRENCY,
+        max_heavy_concurrency: int = RENDER_MAX_HEAVY_CONCURRENCY,
+        heavy_cost: float = RENDER_HEAVY_COST,
+        queue_timeout_seconds: float = RENDER_QUEUE_TIMEOUT_SECONDS,
+        max_queue_depth: int = RENDER_MAX_QUEUE_DEPTH,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_heavy_concurrency = max(1, max_heavy_concurrency)
+        self.heavy_cost = heavy_cost
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_queue_depth = max_queue_depth
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[float, int]] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._running_heavy = 0
+        self._admitted_total = 0
+        self._rejected_total = 0
+        self._queued_total = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._render_seconds_total = 0.0
+        self._completed_total = 0
+
+    def _has_capacity(self, heavy: bool) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        return not heavy or self._running_heavy < self.max_heavy_concurrency
+
+    def _is_next(self, entry: tuple[float, int], heavy: bool) -> bool:
+        if not self._has_capacity(heavy):
+            return False
+        # Let a waiter through only if no cheaper waiter could use the free slot right now.
+        for other in self._waiting:
+            if other < entry and self._has_capacity(other[0] >= self.heavy_cost):
+                return False
+        return True
+
+    def _retry_after(self) -> int:
+        average = self._render_seconds_total / self._completed_total if self._completed_total else 5.0
+        backlog = len(self._waiting) + 1
+        return int(min(120, max(1, math.ceil(average * backlog / self.max_concurrency))))
+
+    @contextmanager
+    def admit(self, cost: float) -> Iterator[None]:
+        heavy = cost >= self.heavy_cost
+        entry = (cost, next(self._seq))
+        enqueued_at = time.monotonic()
+        with self._cond:
+            if not self._waiting and self._has_capacity(heavy):
+                waited = 0.0
+            else:
+                if len(self._waiting) >= self.max_queue_depth:
+                    self._rejected_total += 1
+                    raise AdmissionRejected(self._retry_after())
+                heapq.heappush(self._waiting, entry)
+                self._queued_total += 1
+                deadline = enqueued_at + self.queue_timeout_seconds
+                try:
+                    while not self._is_next(entry, heavy):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._rejected_total += 1
+                            raise AdmissionRejected(self._retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    # Removing this waiter may unblock a more expensive one behind it.
+                    self._cond.notify_all()
+                waited = time.monotonic() - enqueued_at
+            self._running += 1
+            if heavy:
+                self._running_heavy += 1
+            self._admitted_total += 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                if heavy:
+                    self._running_heavy -= 1
+                self._completed_total += 1
+                self._render_seconds_total += time.monotonic() - started_at
+                self._cond.notify_all()
+
+    def snapshot(self) -> dict[str, object]:
+        with self._cond:
+            return {
+                "queue_depth": len(self._waiting),
+                "running": self._running,
+                "running_heavy": self._running_heavy,
+                "max_concurrency": self.max_concurrency,
+                "max_heavy_concurrency": self.max_heavy_concurrency,
+                "heavy_cost": self.heavy_cost,
+                "admitted_total": self._admitted_total,
+                "queued_total": self._queued_total,
+                "rejected_total": self._rejected_total,
+                "wait_seconds_avg": round(self._wait_seconds_total / self._admitted_total, 4)
+                if self._admitted_total
+                else 0.0,
+                "wait_seconds_max": round(self._wait_seconds_max, 4),
+                "render_seconds_avg": round(self._render_seconds_total / self._completed_total, 4)
+                if self._completed_total
+                else 0.0,
+            }
@@ -8,6 +8,7 @@ const downloadPanel = document.getElementById("downloadPanel");
 const validationPanel = document.getElementById("validationPanel");
 const generateBtn = document.getElementById("generateBtn");
 const validateBtn = document.getElementById("validateBtn");
+const previewPdfBtn = document.getElementById("previewPdfBtn");
 const fontSample = document.getElementById("fontSample");
 const scriptSample = document.getElementById("scriptSample");
 const rankSelect = document.getElementById("rankSelect");
@@ -131,7 +132,6 @@ if (requiredEls.some((el) => !el)) {
     "Den Leader": ["den leader", "denleader", "leader", "den leader name"],
     Cubmaster: ["cubmaster", "cub master", "cm", "cubmaster name"],
   };
-  const commonRequiredFields = ["Date", "Pack Number", "Scout Name", "Den Leader", "Cubmaster"];
   const csvMappingState = {
     headers: [],
     rows: [],
@@ -139,16 +139,41 @@ if (requiredEls.some((el) => !el)) {
     unresolvedRequired: [],
   };
   let csvMapperEls = null;
+  // Token from the last successful /validate-csv, reused by /generate instead of re-uploading the file.
+  let uploadSession = null;
+  // Once a PDF preview is shown, settings changes re-render page 1 (debounced) to keep it in sync.
+  let pdfPreviewActive = false;
+  let pdfPreviewTimer = null;
+  let pdfPreviewUrl = null;
+  // Published by the server (/validation-rules) so these checks match /validate-csv exactly.
+  // Until it loads, or if it cannot be fetched, every upload is checked by the server alone.
+  let validationRules = null;
+  // Result of the last local check, keyed like uploadSession so previews don't re-read the file.
+  let localValidation = null;
+  // Renders are byte-identical for identical input, so recent results are kept with their ETags. A repeated
+  // preview or download sends If-None-Match, and a 304 reuses the kept file instead of transferring it again.
+  const renderedOutputs = new Map();
+  const RENDERED_OUTPUTS_MAX = 8;
 
   function currentRank() {
     return rankSelect ? rankSelect.value : "";
   }
 
+  function workflowRules() {
+    if (!validationRules) return null;
+    return validationRules.workflows[workflowType] || validationRules.workflows.adventures;
+  }
+
   function requiredFieldsForWorkflow() {
-    if (workflowType === "ranks") {
-      return [...commonRequiredFields];
-    }
-    return [...commonRequiredFields, "Award Name"];
+    const rules = workflowRules();
+    if (!rules) return [];
+    if (!currentRank()) return [...rules.required_headers];
+    return rules.required_headers.filter((field) => !rules.optional_with_rank.includes(field));
+  }
+
+  function formatRuleMessage(name, values) {
+    const template = validationRules.messages[name];
+    return template.replace(/\{(\w+)\}/g, (match, key) => String(values[key]));
   }
 
   function normalizeHeaderToken(value) {
@@ -304,6 +329,17 @@ if (requiredEls.some((el) => !el)) {
     renderLivePreview();
   }
 
+  function uploadSessionKey(file, payload) {
+    return JSON.stringify([
+      file.name,
+      file.size,
+      file.lastModified,
+      payload.workflow,
+      payload.rank,
+      currentCsvMappingPayload(),
+    ]);
+  }
+
   function setStatus(message, type = "info") {
     status.textContent = message;
     status.dataset.type = type;
@@ -365,25 +401,204 @@ if (requiredEls.some((el) => !el)) {
 
   let previewData = { ...defaultPreview };
 
+  function parseCsvRecords(text) {
+    // Same dialect as Python's csv module: quoted fields may hold commas, newlines and "" escapes.
+    const records = [];
+    let record = [];
+    let field = "";
+    let quoted = false;
+    let i = text.charCodeAt(0) === 0xfeff ? 1 : 0;
+    for (; i < text.length; i += 1) {
+      const ch = text[i];
+      if (quoted) {
+        if (ch !== '"') {
+          field += ch;
+        } else if (text[i + 1] === '"') {
+          field += '"';
+          i += 1;
+        } else {
+          quoted = false;
+        }
+      } else if (ch === '"' && !field) {
+        quoted = true;
+      } else if (ch === ",") {
+        record.push(field);
+        field = "";
+      } else if (ch === "\n" || ch === "\r") {
+        if (ch === "\r" && text[i + 1] === "\n") i += 1;
+        record.push(field);
+        records.push(record);
+        record = [];
+        field = "";
+      } else {
+        field += ch;
+      }
+    }
+    if (field || record.length) {
+      record.push(field);
+      records.push(record);
+    }
+    return records;
+  }
+
   function parseCsvRows(text) {
-    const lines = text.split(/\r?\n/).filter((line) => line.trim());
-    if (lines.length < 2) return { headers: [], rows: [] };
-    const parseLine = (line) =>
-      line
-        .split(/,(?=(?:(?:[^\"]*\"){2})*[^\"]*$)/)
-        .map((part) => part.trim().replace(/^\"|\"$/g, ""));
-    const headers = parseLine(lines[0]);
-    const rows = lines.slice(1).map((line) => {
-      const values = parseLine(line);
+    const records = parseCsvRecords(text).filter((record) => record.length > 1 || record[0]);
+    if (!records.length) return { headers: [], rows: [] };
+    const headers = records[0];
+    const rows = [];
+    records.slice(1).forEach((values) => {
+      // Like the server, whitespace-only rows are skipped and do not count for row numbers.
+      if (!values.some((value) => value.trim())) return;
       const row = {};
       headers.forEach((header, i) => {
         row[header] = values[i] || "";
       });
-      return row;
+      rows.push(row);
     });
     return { headers, rows };
   }
 
+  function normalizeDateByRules(value) {
+    const { patterns, two_digit_year_pivot: pivot } = validationRules.dates;
+    for (const pattern of patterns) {
+      const match = new RegExp(`^(?:${pattern.regex})$`).exec(value);
+      if (!match) continue;
+      const parts = {};
+      pattern.order.forEach((name, i) => {
+        parts[name] = Number.parseInt(match[i + 1], 10);
+      });
+      if (match[pattern.order.indexOf("year") + 1].length === 2) {
+        parts.year += parts.year >= pivot ? 1900 : 2000;
+      }
+      const { year, month, day } = parts;
+      const leap = year % 4 === 0 && (year % 100 !== 0 || year % 400 === 0);
+      const monthDays = [31, leap ? 29 : 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31];
+      return year >= 1 && month >= 1 && month <= 12 && day >= 1 && day <= monthDays[month - 1];
+    }
+    return false;
+  }
+
+  function validateRowsLocally(parsed, mapping, selectedRank) {
+    // Mirrors _apply_csv_mapping and RowValidator.report on the server, including the caps.
+    const rules = workflowRules();
+    const { max_errors: maxErrors, max_warnings: maxWarnings } = validationRules;
+    const mappingErrors = Object.entries(mapping)
+      .filter(([, source]) => !parsed.headers.includes(source))
+      .map(([target, source]) => formatRuleMessage("mapping_source_missing", { source, target }));
+    if (mappingErrors.length) return { mappingErrors };
+
+    const addedHeaders = Object.keys(mapping).filter((target) => !parsed.headers.includes(target));
+    const headers = [...parsed.headers, ...addedHeaders];
+    const rows = parsed.rows.map((row) => {
+      const mapped = { ...row };
+      Object.entries(mapping).forEach(([target, source]) => {
+        mapped[target] = (row[source] || "").trim();
+      });
+      return mapped;
+    });
+
+    const errors = [];
+    const warnings = [];
+    const counts = {};
+    const count = (name) => {
+      counts[name] = (counts[name] || 0) + 1;
+    };
+    const present = (value) => /\S/.test(value || "");
+    let missing = rules.required_headers.filter((field) => !headers.includes(field));
+    if (selectedRank) {
+      missing = missing.filter((field) => !rules.optional_with_rank.includes(field));
+    }
+    if (missing.length) {
+      errors.push(formatRuleMessage("missing_headers", { headers: missing.join(", ") }));
+      counts.missing_headers = missing.length;
+    }
+    if (!rows.length) {
+      errors.push(formatRuleMessage("no_rows", {}));
+    }
+
+    let errorCount = errors.length;
+    let warningCount = 0;
+    let rowsChecked = 0;
+    for (let i = 0; i < rows.length; i += 1) {
+      const row = rows[i];
+      const rowNumber = i + 2;
+      rowsChecked += 1;
+      if (!present(row["Scout Name"])) {
+        errorCount += 1;
+        count("scout_name_missing");
+        if (errors.length < maxErrors) {
+          errors.push(formatRuleMessage("field_required", { row: rowNumber, field: "Scout Name" }));
+        }
+      }
+      if (rules.award_required && !rules.award_columns.some((column) => present(row[column]))) {
+        errorCount += 1;
+        count("award_missing");
+        if (errors.length < maxErrors) {
+          const field = rules.award_label;
+          errors.push(formatRuleMessage("field_required", { row: rowNumber, field }));
+        }
+      }
+      if (!present(row["Pack Number"])) {
+        warningCount += 1;
+        count("pack_number_empty");
+        if (warnings.length < maxWarnings) {
+          warnings.push(formatRuleMessage("pack_number_empty", { row: rowNumber }));
+        }
+      }
+      if (present(row.Date)) {
+        const value = row.Date.trim();
+        if (!normalizeDateByRules(value)) {
+          warningCount += 1;
+          count("date_unrecognized");
+          if (warnings.length < maxWarnings) {
+            warnings.push(formatRuleMessage("date_unrecognized", { row: rowNumber, value }));
+          }
+        }
+      }
+      if (errorCount >= Math.max(maxErrors, 1)) break;
+    }
+
+    return {
+      header_count: headers.length,
+      row_count: rows.length,
+      rows_checked: rowsChecked,
+      errors,
+      warnings,
+      error_count: errorCount,
+      warning_count: warningCount,
+      issue_counts: counts,
+      truncated:
+        rowsChecked < rows.length || errorCount > errors.length || warningCount > warnings.length,
+      ok: errorCount === 0,
+    };
+  }
+
+  async function passesLocalValidation(file, payload) {
+    // Returns false (after showing why) when the server would reject this upload anyway.
+    if (!validationRules) return true;
+    const key = uploadSessionKey(file, payload);
+    if (!localValidation || localValidation.key !== key) {
+      let result;
+      try {
+        const parsed = parseCsvRows(await file.text());
+        result = validateRowsLocally(parsed, currentCsvMappingPayload(), payload.rank);
+      } catch (err) {
+        // Unreadable here does not mean invalid; let the server decide.
+        return true;
+      }
+      localValidation = { key, result };
+    }
+    const { result } = localValidation;
+    if (result.mappingErrors) {
+      setStatus(`CSV mapping is invalid: ${result.mappingErrors.join(" ")}`, "error");
+      return false;
+    }
+    if (result.ok) return true;
+    renderValidationReport(result);
+    setStatus(`Validation found ${result.error_count}${result.truncated ? "+" : ""} error(s).`, "error");
+    return false;
+  }
+
   function updatePreviewFromCsv(file) {
     if (!file) {
       csvMappingState.headers = [];
@@ -496,10 +711,22 @@ if (requiredEls.some((el) => !el)) {
       `;
     };
 
+    // Large reports are capped server-side; the counts cover every row that was checked.
+    const errorCount = report.error_count ?? errors.length;
+    const warningCount = report.warning_count ?? warnings.length;
+    const truncatedNote = report.truncated
+      ? `<div class="validation-block">Showing the first ${errors.length} error(s) and ${warnings.length} warning(s)${
+          report.rows_checked < report.row_count
+            ? `; checking stopped at row ${report.rows_checked + 1} of ${report.row_count + 1}`
+            : ""
+        }.</div>`
+      : "";
+
     validationPanel.innerHTML = `
       <div class="validation-summary ${summaryClass}">
-        Rows: ${report.row_count} • Headers: ${report.header_count} • Errors: ${errors.length} • Warnings: ${warnings.length}
+        Rows: ${report.row_count} • Headers: ${report.header_count} • Errors: ${errorCount} • Warnings: ${warningCount}
       </div>
+      ${truncatedNote}
       ${renderList("Errors", errors)}
       ${renderList("Warnings", warnings)}
     `;
@@ -524,6 +751,11 @@ if (requiredEls.some((el) => !el)) {
     const payload = gatherPayload();
     validateBtn.disabled = true;
     setStatus("Validating CSV...", "info");
+    if (!(await passesLocalValidation(file, payload))) {
+      uploadSession = null;
+      validateBtn.disabled = false;
+      return;
+    }
     const formData = new FormData();
     formData.append("csv", file);
     formData.append("workflow", payload.workflow);
@@ -539,10 +771,15 @@ if (requiredEls.some((el) => !el)) {
         throw new Error(report.error || "CSV validation failed.");
       }
       renderValidationReport(report);
-      if (report.errors?.length) {
-        setStatus(`Validation found ${report.errors.length} error(s).`, "error");
-      } else if (report.warnings?.length) {
-        setStatus(`Validation passed with ${report.warnings.length} warning(s).`, "warn");
+      uploadSession = report.upload_token
+        ? { token: report.upload_token, key: uploadSessionKey(file, payload) }
+        : null;
+      const errorCount = report.error_count ?? report.errors?.length ?? 0;
+      const warningCount = report.warning_count ?? report.warnings?.length ?? 0;
+      if (errorCount) {
+        setStatus(`Validation found ${errorCount}${report.truncated ? "+" : ""} error(s).`, "error");
+      } else if (warningCount) {
+        setStatus(`Validation passed with ${warningCount} warning(s).`, "warn");
       } else {
         setStatus("Validation passed with no issues.", "success");
       }
@@ -553,12 +790,167 @@ if (requiredEls.some((el) => !el)) {
     }
   }
 
+  function renderedOutputKey(sessionKey, payload, preview) {
+    return JSON.stringify([sessionKey, payload, preview]);
+  }
+
+  function conditionalHeaders(outputKey) {
+    const kept = renderedOutputs.get(outputKey);
+    return kept ? { "If-None-Match": kept.etag } : {};
+  }
+
+  async function renderedOutput(response, outputKey, fallbackName) {
+    const kept = renderedOutputs.get(outputKey);
+    if (response.status === 304 && kept) {
+      return kept;
+    }
+    const output = {
+      etag: response.headers.get("ETag"),
+      blob: await response.blob(),
+      downloadName: downloadNameFromResponse(response, fallbackName),
+    };
+    renderedOutputs.delete(outputKey);
+    if (output.etag) {
+      renderedOutputs.set(outputKey, output);
+      if (renderedOutputs.size > RENDERED_OUTPUTS_MAX) {
+        renderedOutputs.delete(renderedOutputs.keys().next().value);
+      }
+    }
+    return output;
+  }
+
   function downloadNameFromResponse(response, fallbackName) {
     const header = response.headers.get("Content-Disposition") || "";
     const match = header.match(/filename=\"?([^\";]+)\"?/i);
     return match ? match[1] : fallbackName;
   }
 
+  function buildGenerateFormData(file, payload, token) {
+    const formData = new FormData();
+    if (token) {
+      formData.append("uploadToken", token);
+    } else {
+      formData.append("csv", file);
+    }
+    formData.append("workflow", payload.workflow);
+    if (payload.rank) {
+      formData.append("rank", payload.rank);
+    }
+    formData.append("csvMapping", JSON.stringify(currentCsvMappingPayload()));
+    formData.append("fontName", payload.fontName);
+    formData.append("scriptFont", payload.scriptFont);
+    formData.append("shiftLeft", payload.shiftLeft);
+    formData.append("shiftDown", payload.shiftDown);
+    formData.append("fontSize", payload.fontSize);
+    formData.append("scriptFontSize", payload.scriptFontSize);
+    formData.append("outputName", payload.outputName);
+    formData.append("outputMode", payload.outputMode);
+    return formData;
+  }
+
+  async function previewPdf() {
+    const file = csvFile.files[0];
+    if (!file) {
+      setStatus("Please select a CSV file.", "error");
+      return;
+    }
+    if (csvMappingState.unresolvedRequired.length) {
+      renderCsvMapper();
+      setStatus(
+        `Map required fields before previewing: ${csvMappingState.unresolvedRequired.join(", ")}`,
+        "error",
+      );
+      return;
+    }
+
+    const payload = gatherPayload();
+    if (!(await passesLocalValidation(file, payload))) {
+      pdfPreviewActive = false;
+      return;
+    }
+    const sessionKey = uploadSessionKey(file, payload);
+    const outputKey = renderedOutputKey(sessionKey, payload, true);
+    const buildFormData = (token) => {
+      const formData = buildGenerateFormData(file, payload, token);
+      formData.append("preview", "1");
+      return formData;
+    };
+    const request = (token) => ({
+      method: "POST",
+      body: buildFormData(token),
+      headers: conditionalHeaders(outputKey),
+    });
+
+    try {
+      const token = uploadSession && uploadSession.key === sessionKey ? uploadSession.token : null;
+      let response = await fetch("/generate", request(token));
+      if (token && response.status === 410) {
+        uploadSession = null;
+        response = await fetch("/generate", request(null));
+      }
+      if (!response.ok && response.status !== 304) {
+        const data = await response.json().catch(() => ({}));
+        if (data.report) {
+          renderValidationReport(data.report);
+        }
+        throw new Error(data.error || "Failed to render preview.");
+      }
+      const { blob } = await renderedOutput(response, outputKey, payload.outputName);
+      if (pdfPreviewUrl) {
+        URL.revokeObjectURL(pdfPreviewUrl);
+      }
+      pdfPreviewUrl = URL.createObjectURL(blob);
+      downloadPanel.innerHTML = `
+        <div>
+          <strong>Page 1 preview</strong>
+          <p style="margin: 6px 0; color: #64748b;">Updates as you adjust shifts and fonts.</p>
+          <iframe src="${pdfPreviewUrl}" title="PDF page preview" style="width: 100%; height: 420px; border: 0;"></iframe>
+        </div>
+      `;
+      pdfPreviewActive = true;
+      setStatus("Preview updated.", "success");
+    } catch (err) {
+      pdfPreviewActive = false;
+      setStatus(err.message, "error");
+    }
+  }
+
+  function schedulePdfPreview() {
+    if (!pdfPreviewActive) {
+      return;
+    }
+    clearTimeout(pdfPreviewTimer);
+    pdfPreviewTimer = setTimeout(previewPdf, 350);
+  }
+
+  function waitForRenderJob(job) {
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(job.events_url);
+      source.addEventListener("progress", (event) => {
+        const data = JSON.parse(event.data);
+        if (data.total) {
+          setStatus(`Generating file... page ${data.done} of ${data.total}`, "info");
+        }
+      });
+      source.addEventListener("complete", () => {
+        source.close();
+        resolve();
+      });
+      source.addEventListener("failed", (event) => {
+        source.close();
+        const data = JSON.parse(event.data);
+        reject(new Error(data.error || "Failed to generate PDF."));
+      });
+      source.onerror = () => {
+        // EventSource reconnects on its own. Once the browser gives up (including a 503 when the server has too
+        // many progress streams open), the caller polls the download URL instead.
+        if (source.readyState === EventSource.CLOSED) {
+          resolve();
+        }
+      };
+    });
+  }
+
   async function generatePdf() {
     const file = csvFile.files[0];
     if (!file) {
@@ -576,32 +968,53 @@ if (requiredEls.some((el) => !el)) {
     }
 
     const payload = gatherPayload();
-    const formData = new FormData();
-    formData.append("csv", file);
-    formData.append("workflow", payload.workflow);
-    if (payload.rank) {
-      formData.append("rank", payload.rank);
-    }
-    formData.append("csvMapping", JSON.stringify(currentCsvMappingPayload()));
-    formData.append("fontName", payload.fontName);
-    formData.append("scriptFont", payload.scriptFont);
-    formData.append("shiftLeft", payload.shiftLeft);
-    formData.append("shiftDown", payload.shiftDown);
-    formData.append("fontSize", payload.fontSize);
-    formData.append("scriptFontSize", payload.scriptFontSize);
-    formData.append("outputName", payload.outputName);
-    formData.append("outputMode", payload.outputMode);
+    const sessionKey = uploadSessionKey(file, payload);
+    const outputKey = renderedOutputKey(sessionKey, payload, false);
+    const buildFormData = (token) => {
+      const formData = buildGenerateFormData(file, payload, token);
+      if (window.EventSource) {
+        formData.append("progress", "1");
+      }
+      return formData;
+    };
 
+    if (!(await passesLocalValidation(file, payload))) {
+      return;
+    }
     generateBtn.disabled = true;
     setStatus("Generating file...", "info");
 
     try {
-      const response = await fetch("/generate", {
+      const token = uploadSession && uploadSession.key === sessionKey ? uploadSession.token : null;
+      let response = await fetch("/generate", {
         method: "POST",
-        body: formData,
+        body: buildFormData(token),
+        headers: conditionalHeaders(outputKey),
       });
+      if (token && response.status === 410) {
+        // The server-side upload session expired; fall back to sending the file.
+        uploadSession = null;
+        response = await fetch("/generate", {
+          method: "POST",
+          body: buildFormData(null),
+          headers: conditionalHeaders(outputKey),
+        });
+      }
 
-      if (!response.ok) {
+      if (response.status === 202) {
+        // The render runs as a background job; follow its progress, then fetch the result.
+        const job = await response.json();
+        await waitForRenderJob(job);
+        response = await fetch(job.download_url, { headers: conditionalHeaders(outputKey) });
+        while (response.status === 409) {
+          // Still rendering: progress events were unavailable, so wait and ask again.
+          setStatus("Generating file...", "info");
+          await new Promise((done) => setTimeout(done, 2000));
+          response = await fetch(job.download_url, { headers: conditionalHeaders(outputKey) });
+        }
+      }
+
+      if (!response.ok && response.status !== 304) {
         const data = await response.json().catch(() => ({}));
         if (data.report) {
           renderValidationReport(data.report);
@@ -609,13 +1022,12 @@ if (requiredEls.some((el) => !el)) {
         throw new Error(data.error || "Failed to generate PDF.");
       }
 
-      const blob = await response.blob();
-      const url = URL.createObjectURL(blob);
       const fallbackName =
-        payload.outputMode === "per_scout_zip"
+        payload.outputMode.endsWith("_zip")
           ? `${payload.outputName.replace(/\.pdf$/i, "") || "scout_awards"}.zip`
           : payload.outputName;
-      const downloadName = downloadNameFromResponse(response, fallbackName);
+      const { blob, downloadName } = await renderedOutput(response, outputKey, fallbackName);
+      const url = URL.createObjectURL(blob);
       downloadPanel.innerHTML = `
         <div>
           <strong>${downloadName}</strong>
@@ -634,6 +1046,9 @@ if (requiredEls.some((el) => !el)) {
   csvFile.addEventListener("change", () => {
     const file = csvFile.files[0];
     csvName.textContent = file ? file.name : "No file selected";
+    uploadSession = null;
+    localValidation = null;
+    pdfPreviewActive = false;
     updatePreviewFromCsv(file);
   });
 
@@ -641,6 +1056,7 @@ if (requiredEls.some((el) => !el)) {
     field.addEventListener("change", () => {
       setFontSample();
       renderLivePreview();
+      schedulePdfPreview();
     });
     field.addEventListener("input", () => {
       renderLivePreview();
@@ -658,10 +1074,23 @@ if (requiredEls.some((el) => !el)) {
 
   generateBtn.addEventListener("click", generatePdf);
   validateBtn.addEventListener("click", validateCsv);
+  if (previewPdfBtn) {
+    previewPdfBtn.addEventListener("click", previewPdf);
+  }
 
   updateRankTemplateUi();
   setFontSample();
   renderLivePreview();
   renderValidationReport(null);
   renderCsvMapper();
+
+  fetch("/validation-rules")
+    .then((response) => (response.ok ? response.json() : null))
+    .then((rules) => {
+      if (!rules) return;
+      validationRules = rules;
+      csvMappingState.unresolvedRequired = calculateUnresolvedRequired();
+      renderCsvMapper();
+    })
+    .catch(() => {});
 }
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# ASGI entry point for the same Flask app: the event loop reads uploads and writes responses, and only the Flask
+# view (validation, rendering) runs on a thread, so a slow client holds a coroutine instead of a worker thread.
+# Usage: uvicorn --app-dir dev/cert_form_ui --workers 2 asgi:app
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    from dev.cert_form_ui import server
+except ModuleNotFoundError:
+    import server  # type: ignore
+
+# Threads per process running Flask views; the same role as gunicorn's --threads.
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", "4"))
+# Largest body piece handed to the server per send; each send waits until the client has taken the previous ones.
+ASGI_SEND_CHUNK_BYTES = int(os.environ.get("ASGI_SEND_CHUNK_BYTES", str(64 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _view_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi-view")
+        return _executor
+
+
+class FileBody:
+    # wsgi.file_wrapper: send_file passes its file through untouched, so in-memory PDFs and ZIPs are written
+    # from the event loop, and files on disk are read a block per executor call, never iterated on a view thread.
+    def __init__(self, file, block_size: int = 8192) -> None:
+        self.file = file
+        self.block_size = block_size
+
+    def __iter__(self):
+        while True:
+            block = self.file.read(self.block_size)
+            if not block:
+                return
+            yield block
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def _read_body(receive, limit: int) -> tuple[bytes, bool]:
+    # Returns the body and whether the client went away before sending all of it. Reading stops one byte past the
+    # limit, which is enough for Flask to answer 413 itself.
+    parts = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b"", True
+        chunk = message.get("body", b"")
+        if chunk:
+            parts.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                break
+        if not message.get("more_body", False):
+            break
+    return b"".join(parts), False
+
+
+def _environ(scope: dict, body: bytes, disconnected: threading.Event) -> dict:
+    server_address = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        # PEP 3333: paths are the request's bytes decoded as latin-1.
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server_address[0]),
+        "SERVER_PORT": str(server_address[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "wsgi.file_wrapper": FileBody,
+        server.CLIENT_DISCONNECTED_ENVIRON_KEY: disconnected,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = raw_value.decode("latin-1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # The body is complete, so its real length replaces a missing header (chunked uploads). An oversized declared
+    # length is kept as is: that body was never read, and Flask answers 413 from the header.
+    declared = environ.get("CONTENT_LENGTH", "")
+    if body or not declared.isdigit() or int(declared) <= server.app.config["MAX_CONTENT_LENGTH"]:
+        environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+def _call_app(environ: dict):
+    # Runs on a view thread: the Flask view plus the first body chunk, so a plain response needs one more call.
+    started: list = []
+
+    def start_response(status: str, headers: list, exc_info=None):
+        if exc_info and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started[:] = [status, headers]
+        return _no_write
+
+    iterable = server.app(environ, start_response)
+    if isinstance(iterable, FileBody):
+        return started, iterable, None, b""
+    iterator = iter(iterable)
+    first = _next_or_close(iterator, iterable)
+    return started, iterable, iterator, first
+
+
+def _no_write(data: bytes) -> None:
+    raise RuntimeError("The ASGI bridge does not support the WSGI write() callable.")
+
+
+def _next_or_close(iterator, iterable) -> Optional[bytes]:
+    # The next chunk, or None once the body is finished and the response has been closed.
+    try:
+        return next(iterator)
+    except StopIteration:
+        _close(iterable)
+        return None
+
+
+def _close(iterable) -> None:
+    close = getattr(iterable, "close", None)
+    if close is not None:
+        close()
+
+
+async def _send_chunked(send, data, disconnected: threading.Event) -> None:
+    with memoryview(data) as view:
+        for offset in range(0, len(view), ASGI_SEND_CHUNK_BYTES):
+            if disconnected.is_set():
+                return
+            chunk = bytes(view[offset:offset + ASGI_SEND_CHUNK_BYTES])
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+
+async def _send_file(loop, send, body: FileBody, disconnected: threading.Event) -> None:
+    if isinstance(body.file, io.BytesIO):
+        # Every view is released before close(); BytesIO refuses to close while its buffer is exported.
+        with body.file.getbuffer() as buffer, buffer[body.file.tell():] as remaining:
+            await _send_chunked(send, remaining, disconnected)
+        return
+    while not disconnected.is_set():
+        block = await loop.run_in_executor(_view_executor(), body.file.read, ASGI_SEND_CHUNK_BYTES)
+        if not block:
+            return
+        await send({"type": "http.response.body", "body": block, "more_body": True})
+
+
+async def _watch_disconnect(receive, disconnected: threading.Event) -> None:
+    # After the body, the only message left is the disconnect; the render probe reads the event from its thread.
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+async def _http(scope: dict, receive, send) -> None:
+    loop = asyncio.get_running_loop()
+    disconnected = threading.Event()
+    limit = server.app.config["MAX_CONTENT_LENGTH"]
+    declared = dict(scope.get("headers", [])).get(b"content-length", b"")
+    body = b""
+    if not (declared.isdigit() and int(declared) > limit):
+        body, gone = await _read_body(receive, limit)
+        if gone:
+            return
+    watcher = loop.create_task(_watch_disconnect(receive, disconnected))
+    executor = _view_executor()
+    iterable = None
+    finished = False
+    try:
+        started, iterable, iterator, first = await loop.run_in_executor(
+            executor, _call_app, _environ(scope, body, disconnected)
+        )
+        status, headers = started
+        await send({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        })
+        if iterator is None:
+            await _send_file(loop, send, iterable, disconnected)
+        else:
+            chunk = first
+            while chunk is not None and not disconnected.is_set():
+                if chunk:
+                    await _send_chunked(send, chunk, disconnected)
+                chunk = await loop.run_in_executor(executor, _next_or_close, iterator, iterable)
+            finished = chunk is None
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        watcher.cancel()
+        if iterable is not None and not finished:
+            # Closing a streamed body (client gone, or an error) stops its renders; run it off the loop.
+            await loop.run_in_executor(executor, _close, iterable)
+
+
+async def _lifespan(receive, send) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Same order as gunicorn's post_worker_init: warm caches, then start this process's render pool.
+            for step in (server.warm_up, server.start_render_pool):
+                try:
+                    await loop.run_in_executor(_view_executor(), step)
+                except Exception:
+                    logger.exception("%s failed; it will be retried on first use.", step.__name__)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if server.render_pool is not None:
+                server.render_pool.close()
+            _view_executor().shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: dict, receive, send) -> None:
+    if scope["type"] == "http":
+        await _http(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await _lifespan(receive, send)
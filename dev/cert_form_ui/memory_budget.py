@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    from dev.page_range import ROWS_PER_PAGE
+except ModuleNotFoundError:
+    from page_range import ROWS_PER_PAGE  # type: ignore
+
+# 0 disables the budget. Above it, ZIP renders stream one entry at a time and combined PDFs are refused.
+RENDER_MEMORY_BUDGET_MB = float(os.environ.get("RENDER_MEMORY_BUDGET_MB", "0"))
+# "tracemalloc" measures Python allocation peaks exactly but slows rendering and sees every thread, so it is
+# meant for debugging one request at a time; "rss" reads process RSS deltas and is cheap enough for production.
+MEMORY_TRACKING = os.environ.get(
+    "MEMORY_TRACKING", "tracemalloc" if os.environ.get("FLASK_DEBUG") == "1" else "rss"
+).strip().lower()
+if MEMORY_TRACKING not in ("off", "rss", "tracemalloc"):
+    raise ValueError(f"MEMORY_TRACKING must be off, rss or tracemalloc; got {MEMORY_TRACKING!r}.")
+
+# Peak bytes as multiples of the template file size, measured with tracemalloc (pypdf 6, reportlab 4.4)
+# and rounded up; `scripts/benchmark.py render_memory` fails if rendering outgrows them.
+# Every output page holds its own parsed copy of the template until its document is written.
+PAGE_TEMPLATE_FACTOR = 6.5
+# A buffered per-scout ZIP keeps every finished single-page PDF, plus the uncollected object graphs behind them.
+SCOUT_ZIP_ROW_TEMPLATE_FACTOR = 2.0
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_STATM = Path("/proc/self/statm")
+
+
+def memory_budget_bytes() -> int:
+    return int(RENDER_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+def estimate_render_memory(row_count: int, output_mode: str, template_bytes: int) -> int:
+    pages = max(1, math.ceil(row_count / ROWS_PER_PAGE))
+    if output_mode == "per_scout_zip":
+        return int(max(row_count, 1) * SCOUT_ZIP_ROW_TEMPLATE_FACTOR * template_bytes)
+    # Grouped ZIPs hold the archive plus the group being rendered, which in the worst case is every row.
+    return int(pages * PAGE_TEMPLATE_FACTOR * template_bytes)
+
+
+def estimate_streaming_memory(largest_group_rows: int, template_bytes: int) -> int:
+    # A streamed ZIP renders, sends and collects one document at a time.
+    pages = max(1, math.ceil(largest_group_rows / ROWS_PER_PAGE))
+    return int(pages * PAGE_TEMPLATE_FACTOR * template_bytes)
+
+
+def _rss_bytes() -> int | None:
+    try:
+        return int(_STATM.read_text().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+if MEMORY_TRACKING == "tracemalloc" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class RequestMemory:
+    # Per-request memory accounting, broken down by stage. RSS and tracemalloc are both process-wide,
+    # so with concurrent requests the numbers include whatever other threads allocated meanwhile.
+    def __init__(self, mode: str = MEMORY_TRACKING) -> None:
+        self.mode = mode
+        self.stages: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.mode == "off":
+            yield
+            return
+        started = time.monotonic()
+        if self.mode == "tracemalloc":
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        else:
+            before = _rss_bytes()
+        try:
+            yield
+        finally:
+            entry: dict[str, float] = {"seconds": round(time.monotonic() - started, 4)}
+            if self.mode == "tracemalloc":
+                current, peak = tracemalloc.get_traced_memory()
+                entry["peak_mib"] = round((peak - before) / 1048576, 2)
+                entry["delta_mib"] = round((current - before) / 1048576, 2)
+            else:
+                after = _rss_bytes()
+                if before is not None and after is not None:
+                    entry["delta_mib"] = round((after - before) / 1048576, 2)
+                    entry["rss_mib"] = round(after / 1048576, 2)
+            self.stages[name] = entry
+
+    def summary(self) -> dict[str, object]:
+        return {"mode": self.mode, "stages": self.stages}
+
+
+class MemoryStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stage_max_mib: dict[str, float] = {}
+        self._streamed_total = 0
+        self._refused_total = 0
+
+    def record(self, usage: RequestMemory) -> None:
+        with self._lock:
+            for name, entry in usage.stages.items():
+                value = entry.get("peak_mib", entry.get("delta_mib"))
+                if value is not None:
+                    self._stage_max_mib[name] = max(self._stage_max_mib.get(name, 0.0), value)
+
+    def record_streamed(self) -> None:
+        with self._lock:
+            self._streamed_total += 1
+
+    def record_refused(self) -> None:
+        with self._lock:
+            self._refused_total += 1
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "tracking": MEMORY_TRACKING,
+                "budget_mib": RENDER_MEMORY_BUDGET_MB,
+                "stage_max_mib": dict(self._stage_max_mib),
+                "streamed_total": self._streamed_total,
+                "refused_total": self._refused_total,
+                "rss_mib": round((_rss_bytes() or 0) / 1048576, 2),
+            }
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_SQLITE_PATH = Path(
+    os.environ.get(
+        "RATE_LIMIT_SQLITE_PATH",
+        str(Path(tempfile.gettempdir()) / "cubscoutawards-ratelimit.sqlite3"),
+    )
+).expanduser()
+RATE_LIMIT_SWEEP_SECONDS = float(os.environ.get("RATE_LIMIT_SWEEP_SECONDS", "60"))
+
+
+class TokenBucketLimiter:
+    # One (tokens, updated_at) pair per key: a bucket holds `max_requests` tokens and refills
+    # continuously over `window_seconds`, which approximates the old sliding window in O(1) memory.
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int = 60,
+        sweep_seconds: float = RATE_LIMIT_SWEEP_SECONDS,
+    ) -> None:
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.sweep_seconds = sweep_seconds
+        self._rate = max_requests / float(window_seconds)
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._next_sweep = time.monotonic() + sweep_seconds
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            tokens, updated_at = self._buckets.get(key, (float(self.max_requests), now))
+            tokens = min(float(self.max_requests), tokens + (now - updated_at) * self._rate)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now)
+                return False
+            self._buckets[key] = (tokens - 1.0, now)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _sweep(self, now: float) -> None:
+        # A key idle for a full window has refilled completely and is equivalent to an unseen key.
+        cutoff = now - self.window_seconds
+        for key in [k for k, (_, updated_at) in self._buckets.items() if updated_at < cutoff]:
+            del self._buckets[key]
+        self._next_sweep = now + self.sweep_seconds
+
+
+class SQLiteTokenBucketLimiter:
+    # Same token bucket, stored in a local SQLite file so every gunicorn worker shares one budget per client.
+    def __init__(
+        self,
+        scope: str,
+        max_requests: int,
+        window_seconds: int = 60,
+        db_path: Path = RATE_LIMIT_SQLITE_PATH,
+        sweep_seconds: float = RATE_LIMIT_SWEEP_SECONDS,
+    ) -> None:
+        self.scope = scope
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.sweep_seconds = sweep_seconds
+        self.db_path = Path(db_path)
+        self._rate = max_requests / float(window_seconds)
+        self._next_sweep = time.time() + sweep_seconds
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "scope TEXT NOT NULL, key TEXT NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (scope, key)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS buckets_updated_at ON buckets (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0, isolation_level=None)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._local.conn = conn
+        return conn
+
+    def allow(self, key: str) -> bool:
+        now = time.time()
+        conn = None
+        try:
+            conn = self._connect()
+            # BEGIN IMMEDIATE takes the write lock up front so read-modify-write is atomic across processes.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE scope = ? AND key = ?",
+                (self.scope, key),
+            ).fetchone()
+            tokens = float(self.max_requests)
+            if row is not None:
+                tokens = min(tokens, row[0] + max(now - row[1], 0.0) * self._rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (scope, key, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (self.scope, key, tokens, now),
+            )
+            if now >= self._next_sweep:
+                conn.execute(
+                    "DELETE FROM buckets WHERE scope = ? AND updated_at < ?",
+                    (self.scope, now - self.window_seconds),
+                )
+                self._next_sweep = now + self.sweep_seconds
+            conn.execute("COMMIT")
+            return allowed
+        except sqlite3.Error:
+            if conn is not None and conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            # Fail open: a locked or unavailable limiter file must not take the site down.
+            return True
+
+    def __len__(self) -> int:
+        row = self._connect().execute("SELECT COUNT(*) FROM buckets WHERE scope = ?", (self.scope,)).fetchone()
+        return int(row[0])
+
+
+def build_rate_limiter(scope: str, max_requests: int, window_seconds: int = 60):
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteTokenBucketLimiter(scope, max_requests, window_seconds)
+    return TokenBucketLimiter(max_requests, window_seconds)
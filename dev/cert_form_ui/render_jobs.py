@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+RENDER_JOB_DIR = Path(
+    os.environ.get("RENDER_JOB_DIR", str(Path(tempfile.gettempdir()) / "cubscout-render-jobs"))
+).expanduser()
+RENDER_JOB_TTL_SECONDS = int(os.environ.get("RENDER_JOB_TTL_SECONDS", "600"))
+# A job nobody follows (no progress stream or download poll) for this long is cancelled. It covers a client that
+# never subscribes after the 202 and the last tab closing mid-render, and must outlast an EventSource reconnect.
+RENDER_JOB_LISTENER_GRACE_SECONDS = float(os.environ.get("RENDER_JOB_LISTENER_GRACE_SECONDS", "10"))
+PROGRESS_WRITE_INTERVAL_SECONDS = 0.25
+LISTENER_MARK_INTERVAL_SECONDS = 1.0
+SWEEP_INTERVAL_SECONDS = 30.0
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def output_etag(output: bytes) -> str:
+    # Strong ETag of a rendered file. Renders are deterministic, so the same input always gets the same one.
+    return _etag(hashlib.sha256(output))
+
+
+def _etag(digest) -> str:
+    return digest.hexdigest()[:32]
+
+
+class RenderJob:
+    # Progress is written to a small status file so any worker process can serve the job's
+    # event stream and download, not just the one that is rendering it.
+    def __init__(self, store: "RenderJobStore", job_id: str, download_name: str, mimetype: str) -> None:
+        self.store = store
+        self.job_id = job_id
+        self._status: dict[str, object] = {
+            "state": "queued",
+            "done": 0,
+            "total": 0,
+            "download_name": download_name,
+            "mimetype": mimetype,
+        }
+        self._next_write = 0.0
+        self._created = time.time()
+        self._write()
+
+    def abandoned(self) -> bool:
+        # Listeners mark the job in a file of its own, so this sees streams and polls served by any worker process.
+        try:
+            last_seen = max(self._created, self.store.listener_path(self.job_id).stat().st_mtime)
+        except OSError:
+            last_seen = self._created
+        return time.time() - last_seen > self.store.listener_grace_seconds
+
+    def progress(self, done: int, total: int) -> None:
+        self._status.update(state="running", done=done, total=total)
+        now = time.monotonic()
+        # Pages can finish every few milliseconds; only the final page and one update per interval hit disk.
+        if done >= total or now >= self._next_write:
+            self._next_write = now + PROGRESS_WRITE_INTERVAL_SECONDS
+            self._write()
+
+    def complete(self, output: bytes, etag: str | None = None) -> None:
+        output_path = self.store.output_path(self.job_id)
+        tmp_path = output_path.with_suffix(".part")
+        tmp_path.write_bytes(output)
+        os.replace(tmp_path, output_path)
+        self._status.update(state="complete", size=len(output), etag=etag or output_etag(output))
+        self._write()
+
+    def complete_stream(self, chunks: Iterable[bytes]) -> None:
+        # For outputs too large to hold in memory: chunks go straight to disk as they are produced.
+        output_path = self.store.output_path(self.job_id)
+        tmp_path = output_path.with_suffix(".part")
+        size = 0
+        digest = hashlib.sha256()
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, output_path)
+        self._status.update(state="complete", size=size, etag=_etag(digest))
+        self._write()
+
+    def fail(self, error: str, status_code: int, retry_after: str | None = None) -> None:
+        self._status.update(state="failed", error=error, status_code=status_code)
+        if retry_after:
+            self._status["retry_after"] = retry_after
+        self._write()
+
+    def _write(self) -> None:
+        status_path = self.store.status_path(self.job_id)
+        tmp_path = status_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._status), encoding="utf-8")
+        os.replace(tmp_path, status_path)
+
+
+class RenderJobStore:
+    def __init__(
+        self,
+        directory: Path = RENDER_JOB_DIR,
+        ttl_seconds: int = RENDER_JOB_TTL_SECONDS,
+        listener_grace_seconds: float = RENDER_JOB_LISTENER_GRACE_SECONDS,
+    ) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.listener_grace_seconds = listener_grace_seconds
+        self._next_sweep = 0.0
+
+    def create(self, download_name: str, mimetype: str) -> RenderJob:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sweep()
+        return RenderJob(self, secrets.token_urlsafe(18), download_name, mimetype)
+
+    def status_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def output_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.bin"
+
+    def listener_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.seen"
+
+    def mark_listening(self, job_id: str) -> None:
+        try:
+            self.listener_path(job_id).touch()
+        except OSError:
+            pass
+
+    def remove_output(self, job_id: str) -> None:
+        self.output_path(job_id).unlink(missing_ok=True)
+
+    def status(self, job_id: str) -> dict[str, object] | None:
+        if not _JOB_ID_RE.match(job_id):
+            return None
+        # Without this a quiet server would keep finished outputs until the next job is created.
+        if time.monotonic() >= self._next_sweep:
+            self.sweep()
+        try:
+            return json.loads(self.status_path(job_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def sweep(self) -> None:
+        # An mtime scan on every create, and on reads at most every SWEEP_INTERVAL_SECONDS, is cheap enough.
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                continue
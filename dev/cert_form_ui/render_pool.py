@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import importlib
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Iterator
+
+try:
+    from dev.render_control import CancellationToken, ProgressCallback, RenderCancelled
+except ModuleNotFoundError:
+    from render_control import CancellationToken, ProgressCallback, RenderCancelled  # type: ignore
+
+# 0 (the default) renders on the request thread. N > 0 starts N render processes per web worker: rendering is
+# pure-Python CPU work, so in-thread renders hold the worker's GIL and slow every other request it is serving.
+RENDER_POOL_WORKERS = int(os.environ.get("RENDER_POOL_WORKERS", "0"))
+# Each process is replaced after this many jobs, which bounds slow memory growth across long-lived workers.
+RENDER_POOL_MAX_JOBS = int(os.environ.get("RENDER_POOL_MAX_JOBS", "200"))
+RENDER_POOL_HEALTH_INTERVAL_SECONDS = float(os.environ.get("RENDER_POOL_HEALTH_INTERVAL_SECONDS", "30"))
+PING_TIMEOUT_SECONDS = 5.0
+# A new process has this long to finish preloading before health checks count it as stuck.
+STARTUP_TIMEOUT_SECONDS = 60.0
+# How long a cancelled job may take to stop before its process is killed and replaced.
+CANCEL_GRACE_SECONDS = 5.0
+
+
+class RenderWorkerError(RuntimeError):
+    pass
+
+
+def _import(name: str, package: str = "dev"):
+    try:
+        return importlib.import_module(f"{package}.{name}")
+    except ModuleNotFoundError:
+        return importlib.import_module(name)
+
+
+# --- render process side ---
+
+
+def _warm_process(warm: dict[str, list]) -> None:
+    pdf_assets = _import("pdf_assets")
+    award_templates = _import("award_templates")
+    for font_name, font_file in warm.get("fonts", []):
+        try:
+            pdf_assets.register_font(font_name, font_file)
+        except Exception:
+            continue
+    for template_path in warm.get("templates", []):
+        template_path = Path(template_path)
+        if not template_path.exists():
+            continue
+        if award_templates.template_supports_field_fill(template_path):
+            _import("fill_cub_scout_certs").warm_template(template_path)
+        else:
+            _import("fill_cub_scout_rank_cards").warm_template(template_path)
+
+
+def _run_job(conn, job_id: int, module_name: str, function_name: str, kwargs: dict, groups: list, budget) -> None:
+    def cancel_requested() -> bool:
+        # Only cancel messages reach a busy process; one for an earlier job is stale and skipped.
+        while conn.poll():
+            message = conn.recv()
+            if message[0] == "cancel" and message[1] == job_id:
+                return True
+        return False
+
+    cancel_token = CancellationToken.with_budget(
+        budget, probe=cancel_requested, probe_reason="cancelled", probe_interval_seconds=0.1
+    )
+    try:
+        # Uploaded templates come with a saved layout index; load it instead of re-parsing the PDF here.
+        _import("template_store", "dev.cert_form_ui").seed_stored_layout(Path(kwargs["template_path"]))
+        render_groups = getattr(_import(module_name), function_name)
+        for file_stem, pdf_bytes in render_groups(
+            groups,
+            cancel_token=cancel_token,
+            progress=lambda done, total: conn.send(("progress", job_id, done, total)),
+            **kwargs,
+        ):
+            conn.send(("group", job_id, file_stem))
+            conn.send_bytes(pdf_bytes)
+    except RenderCancelled as exc:
+        conn.send(("cancelled", job_id, exc.reason))
+    except Exception:
+        conn.send(("error", job_id, traceback.format_exc()))
+    else:
+        conn.send(("done", job_id))
+
+
+def _process_main(conn, warm: dict[str, list]) -> None:
+    # Templates, layouts and fonts are loaded before the process reports ready, so no job pays for them.
+    _warm_process(warm)
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message[0] == "stop":
+            return
+        if message[0] == "ping":
+            conn.send(("pong", message[1]))
+        elif message[0] == "render":
+            _run_job(conn, *message[1:])
+
+
+# --- web worker side ---
+
+
+class _RenderProcess:
+    def __init__(self, context, warm: dict[str, list], slot: int) -> None:
+        self.slot = slot
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_process_main, args=(child_conn, warm), name=f"render-worker-{slot}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.busy = False
+        self.jobs = 0
+        self.busy_seconds = 0.0
+
+    def receive(self, timeout: float | None = None):
+        # The next message that is not the one-off "ready" notice, or None on timeout.
+        while True:
+            if timeout is not None and not self.conn.poll(timeout):
+                return None
+            message = self.conn.recv()
+            if message[0] != "ready":
+                return message
+            self.ready = True
+
+    def ping(self, token: int) -> bool:
+        try:
+            if not self.ready:
+                # Still preloading: fine until the startup timeout, then it counts as stuck.
+                self.receive(0)
+                if not self.ready:
+                    return time.monotonic() - self.started_at < STARTUP_TIMEOUT_SECONDS
+            self.conn.send(("ping", token))
+            deadline = time.monotonic() + PING_TIMEOUT_SECONDS
+            while True:
+                message = self.receive(max(0.0, deadline - time.monotonic()))
+                if message is None:
+                    return False
+                if message == ("pong", token):
+                    return True
+        except (EOFError, OSError):
+            return False
+
+    def stop(self, graceful: bool) -> None:
+        if graceful:
+            try:
+                self.conn.send(("stop",))
+            except (EOFError, OSError):
+                pass
+            self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1.0)
+        self.conn.close()
+
+
+class RenderPool:
+    # Web threads hand each render to an idle process over its pipe (normalized rows and fill settings in,
+    # one message per finished PDF out) and block on the pipe, which releases the GIL for other requests.
+    # A process serves one job at a time; requests beyond the pool size wait here for the next idle one.
+    def __init__(
+        self,
+        size: int = RENDER_POOL_WORKERS,
+        max_jobs: int = RENDER_POOL_MAX_JOBS,
+        health_interval_seconds: float = RENDER_POOL_HEALTH_INTERVAL_SECONDS,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.health_interval_seconds = health_interval_seconds
+        # forkserver children start from a clean interpreter, never from a copy of a threaded web worker.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        self._cond = threading.Condition()
+        self._processes: list[_RenderProcess] = []
+        self._idle: deque[_RenderProcess] = deque()
+        self._warm: dict[str, list] = {}
+        self._owner_pid: int | None = None
+        self._started_at = 0.0
+        self._job_ids = itertools.count(1)
+        self._waiting = 0
+        self._jobs_total = 0
+        self._failed_total = 0
+        self._queued_total = 0
+        self._wait_seconds_max = 0.0
+        self._busy_seconds_total = 0.0
+        self._restarts: dict[str, int] = {}
+
+    @property
+    def started(self) -> bool:
+        return self._owner_pid == os.getpid()
+
+    def start(self, warm: dict[str, list]) -> None:
+        with self._cond:
+            if self.started:
+                return
+            # A pool inherited through fork (gunicorn --preload) belongs to the parent; start a fresh one.
+            self._processes = []
+            self._idle = deque()
+            self._warm = warm
+            self._owner_pid = os.getpid()
+            self._started_at = time.monotonic()
+            for slot in range(self.size):
+                process = _RenderProcess(self._context, warm, slot)
+                self._processes.append(process)
+                self._idle.append(process)
+        if self.health_interval_seconds > 0:
+            threading.Thread(target=self._health_loop, name="render-pool-health", daemon=True).start()
+
+    def close(self) -> None:
+        with self._cond:
+            processes, self._processes, self._idle = self._processes, [], deque()
+            self._owner_pid = None
+        for process in processes:
+            process.stop(graceful=True)
+
+    def _acquire(self, cancel_token: CancellationToken | None) -> _RenderProcess:
+        started = time.monotonic()
+        with self._cond:
+            if not self._idle:
+                self._queued_total += 1
+            self._waiting += 1
+            try:
+                while not self._idle:
+                    self._cond.wait(0.25)
+                    if cancel_token is not None:
+                        cancel_token.check()
+                process = self._idle.popleft()
+                process.busy = True
+            finally:
+                self._waiting -= 1
+            self._wait_seconds_max = max(self._wait_seconds_max, time.monotonic() - started)
+            return process
+
+    def _release(self, process: _RenderProcess, healthy: bool) -> None:
+        reason = None if healthy else "unhealthy"
+        if healthy and self.max_jobs and process.jobs >= self.max_jobs:
+            reason = "max_jobs"
+        if reason is not None:
+            process = self._replace(process, reason)
+        with self._cond:
+            process.busy = False
+            if process in self._processes:
+                self._idle.append(process)
+                self._cond.notify()
+
+    def _replace(self, process: _RenderProcess, reason: str) -> _RenderProcess:
+        process.stop(graceful=reason == "max_jobs")
+        replacement = _RenderProcess(self._context, self._warm, process.slot)
+        with self._cond:
+            self._restarts[reason] = self._restarts.get(reason, 0) + 1
+            if process in self._processes:
+                self._processes[self._processes.index(process)] = replacement
+        return replacement
+
+    def _cancel(self, process: _RenderProcess, job_id: int) -> bool:
+        # Ask the job to stop and wait for its last message so the pipe is clean for the next job.
+        deadline = time.monotonic() + CANCEL_GRACE_SECONDS
+        try:
+            process.conn.send(("cancel", job_id))
+            while True:
+                message = process.receive(max(0.0, deadline - time.monotonic()))
+                if message is None:
+                    return False
+                if message[0] == "group":
+                    process.conn.recv_bytes()
+                elif message[0] in ("done", "cancelled", "error") and message[1] == job_id:
+                    return True
+        except (EOFError, OSError):
+            return False
+
+    def render_groups(
+        self,
+        groups: list[tuple[str, list[dict[str, str]]]],
+        *,
+        module_name: str,
+        function_name: str,
+        kwargs: dict[str, object],
+        cancel_token: CancellationToken | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> Iterator[tuple[str, bytes]]:
+        # Same contract as the fill_*_groups functions: yields (file_stem, pdf_bytes) per group.
+        process = self._acquire(cancel_token)
+        job_id = next(self._job_ids)
+        budget = None
+        if cancel_token is not None and cancel_token.deadline is not None:
+            budget = max(0.001, cancel_token.deadline - time.monotonic())
+        started = time.monotonic()
+        finished = False
+        healthy = True
+        try:
+            process.conn.send(("render", job_id, module_name, function_name, kwargs, groups, budget))
+            while True:
+                timeout = None
+                if cancel_token is not None and cancel_token.deadline is not None:
+                    timeout = max(0.0, cancel_token.deadline - time.monotonic()) + CANCEL_GRACE_SECONDS
+                message = process.receive(timeout)
+                if message is None:
+                    # Past its own deadline and silent: the process is stuck, so it is replaced, not reused.
+                    finished = True
+                    healthy = False
+                    raise RenderCancelled("deadline")
+                kind = message[0]
+                if kind == "progress":
+                    if progress is not None:
+                        progress(message[2], message[3])
+                    if cancel_token is not None:
+                        # Disconnect probes run here, in the web worker; the deadline is also enforced in the process.
+                        cancel_token.check()
+                elif kind == "group":
+                    pdf_bytes = process.conn.recv_bytes()
+                    yield message[2], pdf_bytes
+                elif kind == "done":
+                    finished = True
+                    return
+                elif kind == "cancelled":
+                    finished = True
+                    raise RenderCancelled((cancel_token.reason if cancel_token else None) or message[2])
+                elif kind == "error":
+                    finished = True
+                    self._failed_total += 1
+                    raise RenderWorkerError(message[2])
+        except (EOFError, OSError) as exc:
+            finished = True
+            healthy = False
+            self._failed_total += 1
+            raise RenderWorkerError(f"Render worker {process.slot} exited unexpectedly.") from exc
+        finally:
+            # Reached without a final message when the caller stopped early or the job was cancelled here.
+            if not finished:
+                healthy = self._cancel(process, job_id)
+            elapsed = time.monotonic() - started
+            with self._cond:
+                process.jobs += 1
+                process.busy_seconds += elapsed
+                self._jobs_total += 1
+                self._busy_seconds_total += elapsed
+            self._release(process, healthy)
+
+    def check_health(self) -> None:
+        # Pings idle processes (busy ones are plainly alive) and replaces any that are dead or unresponsive.
+        with self._cond:
+            candidates = list(self._idle)
+            self._idle.clear()
+            for process in candidates:
+                process.busy = True
+        for token, process in enumerate(candidates):
+            healthy = process.process.is_alive() and process.ping(token)
+            self._release(process, healthy)
+
+    def _health_loop(self) -> None:
+        owner_pid = self._owner_pid
+        while True:
+            time.sleep(self.health_interval_seconds)
+            if self._owner_pid != owner_pid:
+                return
+            self.check_health()
+
+    def snapshot(self) -> dict[str, object]:
+        now = time.monotonic()
+        with self._cond:
+            uptime = max(now - self._started_at, 1e-9) if self.started else 0.0
+            return {
+                "workers": len(self._processes),
+                "idle": len(self._idle),
+                "queue_depth": self._waiting,
+                "queued_total": self._queued_total,
+                "wait_seconds_max": round(self._wait_seconds_max, 4),
+                "jobs_total": self._jobs_total,
+                "failed_total": self._failed_total,
+                "restarts": dict(self._restarts),
+                "utilization": round(self._busy_seconds_total / (uptime * self.size), 4) if uptime else 0.0,
+                "per_worker": [
+                    {
+                        "slot": process.slot,
+                        "pid": process.process.pid,
+                        "ready": process.ready,
+                        "busy": process.busy,
+                        "jobs": process.jobs,
+                        "utilization": round(process.busy_seconds / max(now - process.started_at, 1e-9), 4),
+                    }
+                    for process in self._processes
+                ],
+            }
@@ -2,69 +2,135 @@
 from __future__ import annotations
 
 import csv
+import gc
+import hashlib
 import io
 import json
 import os
 import re
-import tempfile
+import secrets
+import select
+import socket
+import threading
 import time
-import zipfile
-from collections import defaultdict, deque
+from collections import OrderedDict
+from contextlib import ExitStack
+from functools import lru_cache, partial
 from pathlib import Path
-from threading import Lock
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
 
-from flask import Flask, jsonify, request, send_file
-from pypdf import PdfReader, PdfWriter
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 
+IMPORT_STARTED = time.perf_counter()
 UI_DIR = Path(__file__).resolve().parent
 REPO_ROOT = UI_DIR.parent.parent
-DEFAULT_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "cub_scout_award_certificate.pdf"
-DEFAULT_LION_RANK_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "lion_rank_card.pdf"
-DEFAULT_TIGER_RANK_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "tiger_rank_card.pdf"
-DEFAULT_WOLF_RANK_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "wolf_rank_card.pdf"
-DEFAULT_BEAR_RANK_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "bear_rank_card.pdf"
-DEFAULT_WEBELO_RANK_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "webelo_rank_card.pdf"
-DEFAULT_ARROW_OF_LIGHT_RANK_TEMPLATE_PATH = REPO_ROOT / "assets" / "templates" / "arrow_of_light_rank_card.pdf"
 FONTS_DIR = REPO_ROOT / "assets" / "fonts"
-TEMPLATE_PATH = Path(os.environ.get("CERT_TEMPLATE_PATH", str(DEFAULT_TEMPLATE_PATH))).expanduser()
-RANK_TEMPLATE_PATHS = {
-    "Lion": Path(os.environ.get("CERT_TEMPLATE_PATH_LION", str(DEFAULT_LION_RANK_TEMPLATE_PATH))).expanduser(),
-    "Tiger": Path(os.environ.get("CERT_TEMPLATE_PATH_TIGER", str(DEFAULT_TIGER_RANK_TEMPLATE_PATH))).expanduser(),
-    "Wolf": Path(
-        os.environ.get("CERT_TEMPLATE_PATH_WOLF", str(DEFAULT_WOLF_RANK_TEMPLATE_PATH))
-    ).expanduser(),
-    "Bear": Path(os.environ.get("CERT_TEMPLATE_PATH_BEAR", str(DEFAULT_BEAR_RANK_TEMPLATE_PATH))).expanduser(),
-    "Webelo": Path(os.environ.get("CERT_TEMPLATE_PATH_WEBELO", str(DEFAULT_WEBELO_RANK_TEMPLATE_PATH))).expanduser(),
-    "Arrow of Light": Path(
-        os.environ.get("CERT_TEMPLATE_PATH_ARROW_OF_LIGHT", str(DEFAULT_ARROW_OF_LIGHT_RANK_TEMPLATE_PATH))
-    ).expanduser(),
-}
 
 try:
-    from dev.fill_cub_scout_certs import fill_certificates
-    from dev.fill_cub_scout_rank_cards import fill_rank_cards
+    from dev.cert_form_ui.admission import ROWS_PER_PAGE, AdmissionController, AdmissionRejected, estimate_render_cost
+    from dev.cert_form_ui.memory_budget import (
+        MemoryStats,
+        RequestMemory,
+        estimate_render_memory,
+        estimate_streaming_memory,
+        memory_budget_bytes,
+    )
+    from dev.cert_form_ui.rate_limit import build_rate_limiter
+    from dev.cert_form_ui.render_jobs import LISTENER_MARK_INTERVAL_SECONDS, RenderJob, RenderJobStore, output_etag
+    from dev.cert_form_ui.render_pool import RENDER_POOL_WORKERS, RenderPool
+    from dev.cert_form_ui.singleflight import SingleFlight
+    from dev.cert_form_ui.static_assets import StaticAsset, StaticAssets
+    from dev.cert_form_ui.template_store import TemplateRejected, TemplateStore, TemplateStoreFull, summary
+    from dev.cert_form_ui.validation import MESSAGES, rules_document, validator_for
+    from dev.cert_form_ui.zip_assembly import ZipAssembler
+    from dev.cert_form_ui import startup
+    from dev.award_templates import (
+        RANK_OUTPUT_ROTATION_DEGREES,
+        RANK_TEMPLATE_PATHS,
+        TEMPLATE_PATH,
+        canonical_rank,
+        normalize_row,
+        selected_template,
+        template_supports_field_fill,
+    )
+    from dev.page_range import selection_slice
+    from dev.pdf_assets import cache_info, register_font
+    from dev.pdf_output import OPTIMIZE_LEVELS, linearize_available
+    from dev.render_control import CancellationToken, ProgressCallback, RenderCancelled
 except ModuleNotFoundError:
     # Fallback for direct script execution from source checkout.
     import sys
 
     DEV_DIR = REPO_ROOT / "dev"
-    if str(DEV_DIR) not in sys.path:
-        sys.path.insert(0, str(DEV_DIR))
-    from fill_cub_scout_certs import fill_certificates  # type: ignore
-    from fill_cub_scout_rank_cards import fill_rank_cards  # type: ignore
-
-app = Flask(__name__, static_folder=str(UI_DIR), static_url_path="")
+    for import_dir in (DEV_DIR, UI_DIR):
+        if str(import_dir) not in sys.path:
+            sys.path.insert(0, str(import_dir))
+    from admission import ROWS_PER_PAGE, AdmissionController, AdmissionRejected, estimate_render_cost  # type: ignore
+    from memory_budget import (  # type: ignore
+        MemoryStats,
+        RequestMemory,
+        estimate_render_memory,
+        estimate_streaming_memory,
+        memory_budget_bytes,
+    )
+    from rate_limit import build_rate_limiter  # type: ignore
+    from render_jobs import LISTENER_MARK_INTERVAL_SECONDS, RenderJob, RenderJobStore, output_etag  # type: ignore
+    from render_pool import RENDER_POOL_WORKERS, RenderPool  # type: ignore
+    from singleflight import SingleFlight  # type: ignore
+    from static_assets import StaticAsset, StaticAssets  # type: ignore
+    from template_store import TemplateRejected, TemplateStore, TemplateStoreFull, summary  # type: ignore
+    from validation import MESSAGES, rules_document, validator_for  # type: ignore
+    from zip_assembly import ZipAssembler  # type: ignore
+    import startup  # type: ignore
+    from award_templates import (  # type: ignore
+        RANK_OUTPUT_ROTATION_DEGREES,
+        RANK_TEMPLATE_PATHS,
+        TEMPLATE_PATH,
+        canonical_rank,
+        normalize_row,
+        selected_template,
+        template_supports_field_fill,
+    )
+    from page_range import selection_slice  # type: ignore
+    from pdf_assets import cache_info, register_font  # type: ignore
+    from pdf_output import OPTIMIZE_LEVELS, linearize_available  # type: ignore
+    from render_control import CancellationToken, ProgressCallback, RenderCancelled  # type: ignore
+
+# Static files are served by StaticAssets from an explicit list, not by Flask's static route over UI_DIR.
+app = Flask(__name__, static_folder=None)
 app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024  # 5 MB CSV upload limit
 
 GENERATOR_HEADERS = ["Date", "Pack Number", "Den Number", "Scout Name", "Award Name", "Den Leader", "Cubmaster"]
-COMMON_REQUIRED_HEADERS = ["Date", "Pack Number", "Scout Name", "Den Leader", "Cubmaster"]
-ADVENTURE_REQUIRED_HEADERS = COMMON_REQUIRED_HEADERS + ["Award Name"]
-RANK_REQUIRED_HEADERS = COMMON_REQUIRED_HEADERS + ["Rank"]
-DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
 GENERATE_PER_MINUTE = int(os.environ.get("RATE_LIMIT_GENERATE_PER_MINUTE", "12"))
 VALIDATE_PER_MINUTE = int(os.environ.get("RATE_LIMIT_VALIDATE_PER_MINUTE", "30"))
-RANK_OUTPUT_ROTATION_DEGREES = int(os.environ.get("RANK_OUTPUT_ROTATION_DEGREES", "90")) % 360
+PREVIEW_PER_MINUTE = int(os.environ.get("RATE_LIMIT_PREVIEW_PER_MINUTE", "60"))
+TEMPLATE_UPLOADS_PER_MINUTE = int(os.environ.get("RATE_LIMIT_TEMPLATE_UPLOADS_PER_MINUTE", "6"))
+# GET /templates lists every uploader's templates, so it needs "Authorization: Bearer <token>"; unset turns it off.
+TEMPLATE_ADMIN_TOKEN = os.environ.get("TEMPLATE_ADMIN_TOKEN", "")
+ZIP_OUTPUT_MODES = ("per_scout_zip", "per_den_zip", "per_rank_zip")
+# Adventure rows carry the adventure in "Award Name", so grouping them "by rank" would not; only ranks can.
+WORKFLOW_OUTPUT_MODES = {
+    "adventures": ("combined_pdf", "per_scout_zip", "per_den_zip"),
+    "ranks": ("combined_pdf", "per_scout_zip", "per_den_zip", "per_rank_zip"),
+}
+RENDER_BUDGET_SECONDS = float(os.environ.get("RENDER_BUDGET_SECONDS", "110"))
+PDF_OPTIMIZE_LEVEL = os.environ.get("PDF_OPTIMIZE_LEVEL", "fast")
+# Combined PDFs with at least this many pages are linearized when pikepdf is installed (0 = only on request).
+PDF_LINEARIZE_MIN_PAGES = int(os.environ.get("PDF_LINEARIZE_MIN_PAGES", "0"))
+if PDF_OPTIMIZE_LEVEL not in OPTIMIZE_LEVELS:
+    raise ValueError(f"PDF_OPTIMIZE_LEVEL must be one of {', '.join(OPTIMIZE_LEVELS)}; got {PDF_OPTIMIZE_LEVEL!r}.")
+UPLOAD_SESSION_TTL_SECONDS = int(os.environ.get("UPLOAD_SESSION_TTL_SECONDS", "900"))
+UPLOAD_SESSION_MAX_ENTRIES = int(os.environ.get("UPLOAD_SESSION_MAX_ENTRIES", "256"))
+JOB_EVENT_POLL_SECONDS = 0.25
+JOB_EVENT_HEARTBEAT_SECONDS = 15.0
+# Each progress stream holds a request thread (gunicorn --threads, or ASGI_THREADS) until its job ends. Past this many
+# per process, /jobs/<id>/events answers 503 and the page polls the download URL instead, so open progress tabs
+# cannot take every thread away from other requests and /healthz.
+JOB_EVENT_MAX_STREAMS = int(os.environ.get("JOB_EVENT_MAX_STREAMS", "2"))
+JOB_EVENT_RETRY_AFTER_SECONDS = 2
+OUTPUT_ETAG_CACHE_ENTRIES = int(os.environ.get("OUTPUT_ETAG_CACHE_ENTRIES", "4096"))
+# WSGI environ key holding a threading.Event that asgi.py sets once the client has disconnected.
+CLIENT_DISCONNECTED_ENVIRON_KEY = "cubscout.client_disconnected"
 
 FONT_CHOICES = {
     "Helvetica": {"pdf_name": "Helvetica", "paths": []},
@@ -146,29 +212,132 @@ LEGACY_FONT_ALIASES = {
 }
 
 
-class SlidingWindowLimiter:
-    def __init__(self, max_requests: int, window_seconds: int = 60) -> None:
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self._hits: dict[str, deque[float]] = defaultdict(deque)
-        self._lock = Lock()
+class UploadSessionCache:
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict[str, object]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session: dict[str, object]) -> str:
+        token = secrets.token_urlsafe(18)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            self._entries[token] = (now + self.ttl_seconds, session)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def get(self, token: str) -> dict[str, object] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at < now:
+                del self._entries[token]
+                return None
+            return session
+
+    def _evict_expired(self, now: float) -> None:
+        # Entries are kept in insertion order with a fixed TTL, so expired ones are always at the front.
+        while self._entries:
+            token, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at >= now:
+                break
+            del self._entries[token]
+
+
+class OutputEtags:
+    # Render key -> ETag of the bytes it produced. Output is deterministic (fixed PDF IDs, fixed ZIP timestamps), so
+    # a request whose If-None-Match already names its key's ETag is answered 304 without rendering again.
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._not_modified = {"not_modified_without_render_total": 0, "not_modified_after_render_total": 0}
+
+    def get(self, render_key: str) -> str | None:
+        with self._lock:
+            etag = self._entries.get(render_key)
+            if etag is not None:
+                self._entries.move_to_end(render_key)
+            return etag
+
+    def remember(self, render_key: str, output: bytes) -> str:
+        etag = output_etag(output)
+        with self._lock:
+            self._entries[render_key] = etag
+            self._entries.move_to_end(render_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def record_not_modified(self, rendered: bool) -> None:
+        with self._lock:
+            key = "not_modified_after_render_total" if rendered else "not_modified_without_render_total"
+            self._not_modified[key] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), **self._not_modified}
+
+
+class EventStreamSlots:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._active = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
 
-    def allow(self, key: str) -> bool:
-        now = time.time()
+    def try_acquire(self) -> bool:
         with self._lock:
-            q = self._hits[key]
-            cutoff = now - self.window_seconds
-            while q and q[0] < cutoff:
-                q.popleft()
-            if len(q) >= self.max_requests:
+            if self._active >= self.limit:
+                self._rejected += 1
                 return False
-            q.append(now)
+            self._active += 1
             return True
 
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {"active": self._active, "limit": self.limit, "rejected_total": self._rejected}
+
+
+class CancellationStats:
+    def __init__(self) -> None:
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, reason: str) -> None:
+        with self._lock:
+            self._counts[reason] = self._counts.get(reason, 0) + 1
 
-generate_limiter = SlidingWindowLimiter(GENERATE_PER_MINUTE)
-validate_limiter = SlidingWindowLimiter(VALIDATE_PER_MINUTE)
-_template_field_support_cache: dict[str, bool] = {}
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {"abandoned_total": sum(self._counts.values()), **self._counts}
+
+
+generate_limiter = build_rate_limiter("generate", GENERATE_PER_MINUTE)
+validate_limiter = build_rate_limiter("validate", VALIDATE_PER_MINUTE)
+preview_limiter = build_rate_limiter("preview", PREVIEW_PER_MINUTE)
+template_upload_limiter = build_rate_limiter("templates", TEMPLATE_UPLOADS_PER_MINUTE)
+upload_sessions = UploadSessionCache(UPLOAD_SESSION_MAX_ENTRIES, UPLOAD_SESSION_TTL_SECONDS)
+render_admission = AdmissionController()
+render_flights: SingleFlight[bytes] = SingleFlight()
+output_etags = OutputEtags(OUTPUT_ETAG_CACHE_ENTRIES)
+render_cancellations = CancellationStats()
+job_event_slots = EventStreamSlots(JOB_EVENT_MAX_STREAMS)
+render_memory = MemoryStats()
+render_jobs = RenderJobStore()
+static_assets = StaticAssets(UI_DIR)
+template_store = TemplateStore()
+render_pool = RenderPool(RENDER_POOL_WORKERS) if RENDER_POOL_WORKERS > 0 else None
 
 
 def _resolve_font_choice(choice_id: str, catalog: dict) -> tuple[Optional[str], Optional[str]]:
@@ -226,96 +395,54 @@ def _client_ip() -> str:
     return request.remote_addr or "unknown"
 
 
-def _rate_limited_response() -> tuple[dict, int]:
-    return {"error": "Rate limit exceeded. Please wait and try again."}, 429
-
+def _client_disconnect_probe(environ: dict) -> Optional[Callable[[], bool]]:
+    # Gunicorn exposes the client socket; a readable socket that yields no bytes has been closed by the peer.
+    # The ASGI entry point (asgi.py) sets an event when the server reports the disconnect.
+    # The dev server has no equivalent, so there renders are only bounded by RENDER_BUDGET_SECONDS.
+    disconnected_event = environ.get(CLIENT_DISCONNECTED_ENVIRON_KEY)
+    if disconnected_event is not None:
+        return disconnected_event.is_set
+    sock = environ.get("gunicorn.socket")
+    if sock is None:
+        return None
 
-def _is_valid_date(value: str) -> bool:
-    value = (value or "").strip()
-    if not value:
-        return True
-    for fmt in DATE_FORMATS:
+    def disconnected() -> bool:
         try:
-            time.strptime(value, fmt)
+            readable, _, _ = select.select([sock], [], [], 0)
+            if not readable:
+                return False
+            return sock.recv(1, socket.MSG_PEEK) == b""
+        except BlockingIOError:
+            return False
+        except (OSError, ValueError):
             return True
-        except ValueError:
-            continue
-    return False
-
-
-def _canonical_rank(value: str) -> str:
-    raw = (value or "").strip().lower()
-    aliases = {
-        "lion": "Lion",
-        "tiger": "Tiger",
-        "wolf": "Wolf",
-        "bear": "Bear",
-        "webelo": "Webelo",
-        "webelos": "Webelo",
-        "arrow of light": "Arrow of Light",
-        "arrow_of_light": "Arrow of Light",
-        "aol": "Arrow of Light",
-    }
-    return aliases.get(raw, "Wolf")
 
+    return disconnected
 
-def _selected_template(workflow: str, selected_rank: str) -> Path:
-    if workflow != "ranks":
-        return TEMPLATE_PATH
-    rank_key = _canonical_rank(selected_rank)
-    rank_template = RANK_TEMPLATE_PATHS.get(rank_key, TEMPLATE_PATH)
-    if rank_template.exists():
-        return rank_template
-    return TEMPLATE_PATH
 
+def _rate_limited_response() -> tuple[dict, int]:
+    return {"error": "Rate limit exceeded. Please wait and try again."}, 429
 
-def _template_supports_field_fill(template_path: Path) -> bool:
-    key = str(template_path.resolve())
-    cached = _template_field_support_cache.get(key)
-    if cached is not None:
-        return cached
 
-    try:
-        reader = PdfReader(str(template_path))
-        page = reader.pages[0]
-        annots = page.get("/Annots")
-        if annots and len(annots.get_object()) > 0:
-            _template_field_support_cache[key] = True
-            return True
-        acroform = reader.trailer["/Root"].get("/AcroForm")
-        if acroform:
-            fields = acroform.get_object().get("/Fields", [])
-            supported = len(fields) > 0
-            _template_field_support_cache[key] = supported
-            return supported
-    except Exception:
-        pass
+def _certs_module():
+    return startup.lazy_import("dev.fill_cub_scout_certs", "fill_cub_scout_certs")
+
 
-    _template_field_support_cache[key] = False
-    return False
+def _rank_cards_module():
+    return startup.lazy_import("dev.fill_cub_scout_rank_cards", "fill_cub_scout_rank_cards")
 
 
 def _normalize_rows_for_generator(
     rows: list[dict[str, str]], workflow: str, selected_rank: str
 ) -> list[dict[str, str]]:
     normalized_rows: list[dict[str, str]] = []
-    canonical_rank = _canonical_rank(selected_rank) if workflow == "ranks" else ""
+    selected_rank_name = canonical_rank(selected_rank) if workflow == "ranks" else ""
     for row in rows:
         award_name = (row.get("Award Name") or "").strip()
         rank_name = (row.get("Rank") or "").strip()
         if workflow == "ranks":
-            award_name = rank_name or canonical_rank or award_name
-        normalized_rows.append(
-            {
-                "Date": (row.get("Date") or "").strip(),
-                "Pack Number": (row.get("Pack Number") or "").strip(),
-                "Den Number": (row.get("Den Number") or row.get("Den No.") or "").strip(),
-                "Scout Name": (row.get("Scout Name") or "").strip(),
-                "Award Name": award_name,
-                "Den Leader": (row.get("Den Leader") or "").strip(),
-                "Cubmaster": (row.get("Cubmaster") or "").strip(),
-            }
-        )
+            award_name = rank_name or selected_rank_name or award_name
+        normalized_rows.append(normalize_row(row, award_name))
     return normalized_rows
 
 
@@ -347,7 +474,7 @@ def _parse_csv_mapping(raw_mapping: str | None) -> tuple[dict[str, str], list[st
         if not target or not source:
             continue
         if target not in allowed_targets:
-            errors.append(f"Unsupported mapping target: {target}")
+            errors.append(MESSAGES["mapping_target_unsupported"].format(target=target))
             continue
         mapping[target] = source
     return mapping, errors
@@ -363,7 +490,7 @@ def _apply_csv_mapping(
     errors: list[str] = []
     for target, source in mapping.items():
         if source not in source_headers:
-            errors.append(f"CSV mapping source header not found: {source} (for {target})")
+            errors.append(MESSAGES["mapping_source_missing"].format(source=source, target=target))
     if errors:
         return fieldnames, rows, errors
 
@@ -382,65 +509,252 @@ def _apply_csv_mapping(
     return mapped_fieldnames, mapped_rows, []
 
 
-def _normalize_pdf_rotation_in_place(pdf_path: Path, target_rotation: int) -> None:
-    target = target_rotation % 360
-    reader = PdfReader(str(pdf_path))
-    writer = PdfWriter()
-    for page in reader.pages:
-        current = int(page.get("/Rotate") or 0) % 360
-        delta = (target - current) % 360
-        if delta:
-            page.rotate(delta)
-        writer.add_page(page)
-    with pdf_path.open("wb") as f:
-        writer.write(f)
+def _group_rows_for_output(
+    rows: list[dict[str, str]], output_mode: str
+) -> list[tuple[str, list[dict[str, str]]]]:
+    if output_mode == "per_scout_zip":
+        groups = []
+        for i, row in enumerate(rows, start=1):
+            scout = _safe_base_name(row.get("Scout Name", "scout"))
+            award = _safe_base_name(row.get("Award Name", "award"))
+            groups.append((f"{i:03d}_{scout}_{award}", [row]))
+        return groups
+
+    # One pass over the rows; groups keep the order in which they first appear in the CSV.
+    if output_mode == "per_den_zip":
+        column, prefix, empty_label = "Den Number", "den", "no_den"
+    else:
+        column, prefix, empty_label = "Award Name", "rank", "no_rank"
+    grouped: dict[str, list[dict[str, str]]] = {}
+    for row in rows:
+        value = (row.get(column) or "").strip()
+        grouped.setdefault(value, []).append(row)
+    # Distinct values can sanitize to the same name ("Den 1" and "Den/1" are both den_Den_1); a repeated ZIP entry
+    # name would make most extractors overwrite one den's certificates with another's.
+    used: set[str] = set()
+    groups = []
+    for value, group_rows in grouped.items():
+        stem = f"{prefix}_{_safe_base_name(value) if value else empty_label}"
+        unique_stem, suffix = stem, 1
+        while unique_stem.lower() in used:
+            suffix += 1
+            unique_stem = f"{stem}_{suffix}"
+        used.add(unique_stem.lower())
+        groups.append((unique_stem, group_rows))
+    return groups
+
+
+def _render_key(
+    normalized_rows: list[dict[str, str]],
+    workflow: str,
+    output_mode: str,
+    template_path: Path,
+    use_rank_layout: bool,
+    fill_settings: dict[str, object],
+) -> str:
+    payload = {
+        "rows": [[row.get(k, "") for k in GENERATOR_HEADERS] for row in normalized_rows],
+        "workflow": workflow,
+        "output_mode": output_mode,
+        "template": str(template_path.resolve()),
+        "template_mtime_ns": template_path.stat().st_mtime_ns,
+        "rank_layout": use_rank_layout,
+        "rank_rotation": RANK_OUTPUT_ROTATION_DEGREES,
+        "settings": fill_settings,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _group_renderer(
+    workflow: str,
+    template_path: Path,
+    use_rank_layout: bool,
+    fill_settings: dict[str, object],
+    cancel_token: CancellationToken | None = None,
+    progress: ProgressCallback | None = None,
+) -> Callable:
+    render_kwargs = {
+        "template_path": template_path,
+        # Rank rotation is applied per page while rendering, so no output needs a rewrite pass.
+        "final_rotation_degrees": RANK_OUTPUT_ROTATION_DEGREES if workflow == "ranks" else None,
+        **fill_settings,
+    }
+    if start_render_pool():
+        # Same groups in, same (file_stem, pdf_bytes) out, but rendered in a pool process off this worker's GIL.
+        module_name, function_name = (
+            ("fill_cub_scout_rank_cards", "fill_rank_card_groups")
+            if use_rank_layout
+            else ("fill_cub_scout_certs", "fill_certificate_groups")
+        )
+        return partial(
+            render_pool.render_groups,
+            module_name=module_name,
+            function_name=function_name,
+            kwargs=render_kwargs,
+            cancel_token=cancel_token,
+            progress=progress,
+        )
+    group_function = (
+        _rank_cards_module().fill_rank_card_groups if use_rank_layout else _certs_module().fill_certificate_groups
+    )
+    return partial(group_function, cancel_token=cancel_token, progress=progress, **render_kwargs)
+
+
+def _render_generate_output(
+    normalized_rows: list[dict[str, str]],
+    workflow: str,
+    output_mode: str,
+    template_path: Path,
+    use_rank_layout: bool,
+    fill_settings: dict[str, object],
+    cancel_token: CancellationToken | None = None,
+    progress: ProgressCallback | None = None,
+) -> bytes:
+    render_groups = _group_renderer(workflow, template_path, use_rank_layout, fill_settings, cancel_token, progress)
+    if output_mode in ZIP_OUTPUT_MODES:
+        zip_buffer = io.BytesIO()
+        # Each entry is probed and compressed on the ZIP threads while the next one renders.
+        with ZipAssembler(zip_buffer.write) as archive:
+            for file_stem, pdf_bytes in render_groups(_group_rows_for_output(normalized_rows, output_mode)):
+                archive.add(f"{file_stem}.pdf", pdf_bytes)
+        return zip_buffer.getvalue()
+
+    # Combined PDFs and previews are a single group rendered straight to bytes.
+    for _, pdf_bytes in render_groups([(output_mode, normalized_rows)]):
+        return pdf_bytes
+    raise ValueError("CSV has no data rows.")
+
+
+class _ZipSink:
+    # Collects what ZipAssembler writes, so each entry can be sent as soon as it is written.
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _stream_zip_output(
+    groups: list[tuple[str, list[dict[str, str]]]], render_groups: Callable, usage: RequestMemory
+) -> Iterator[bytes]:
+    # Only one group is rendering at a time, with at most one finished PDF waiting on its compression; the archive
+    # itself is never held in memory.
+    sink = _ZipSink()
+    with usage.stage("stream"):
+        with ZipAssembler(sink.write, max_pending=1) as archive:
+            for file_stem, pdf_bytes in render_groups(groups):
+                archive.add(f"{file_stem}.pdf", pdf_bytes)
+                yield sink.drain()
+                # Each finished document leaves a parsed PDF object graph full of reference cycles; left to the
+                # generational collector they pile up to ~30 MB before a full pass runs. Collecting per entry costs
+                # ~25 ms and keeps the stream's peak at one document.
+                gc.collect()
+        yield sink.drain()
+
+
+def _log_render_memory(usage: RequestMemory, output_mode: str, row_count: int, streamed: bool = False) -> None:
+    if not usage.stages:
+        return
+    render_memory.record(usage)
+    app.logger.info(
+        "render memory: mode=%s rows=%d streamed=%s %s",
+        output_mode,
+        row_count,
+        streamed,
+        json.dumps(usage.summary(), separators=(",", ":")),
+    )
+
+
+def _render_failure(exc: Exception) -> tuple[dict, int, dict[str, str]]:
+    if isinstance(exc, RenderCancelled):
+        render_cancellations.record(exc.reason)
+        if exc.reason == "deadline":
+            return (
+                {"error": "Rendering took too long. Try a smaller CSV or a combined PDF."},
+                503,
+                {"Retry-After": "30"},
+            )
+        # The client is gone; nobody will read this response.
+        return {"error": "Client disconnected."}, 499, {}
+    if isinstance(exc, AdmissionRejected):
+        return (
+            {"error": "Server is busy rendering other requests. Please retry shortly."},
+            503,
+            {"Retry-After": str(exc.retry_after)},
+        )
+    raise exc
+
+
+def _run_render_job(job: RenderJob, render_key: str, render: Callable[[], bytes]) -> None:
+    try:
+        output_bytes, _ = render_flights.do(render_key, render)
+    except (RenderCancelled, AdmissionRejected) as exc:
+        payload, status_code, headers = _render_failure(exc)
+        job.fail(payload["error"], status_code, headers.get("Retry-After"))
+    except Exception:
+        app.logger.exception("Render job %s failed", job.job_id)
+        job.fail("Failed to generate file.", 500)
+    else:
+        job.complete(output_bytes, output_etags.remember(render_key, output_bytes))
 
 
-def _build_validation_report(
-    fieldnames: list[str], rows: list[dict[str, str]], workflow: str, selected_rank: str
-) -> dict[str, object]:
-    errors: list[str] = []
-    warnings: list[str] = []
-    required_headers = ADVENTURE_REQUIRED_HEADERS if workflow != "ranks" else RANK_REQUIRED_HEADERS
-    missing = [h for h in required_headers if h not in fieldnames]
-    if workflow == "ranks" and "Rank" in missing and selected_rank:
-        missing.remove("Rank")
-    if missing:
-        errors.append(f"Missing required headers: {', '.join(missing)}")
-    if not rows:
-        errors.append("CSV has no data rows.")
-
-    rank_fallback = _canonical_rank(selected_rank) if workflow == "ranks" else ""
-    for idx, row in enumerate(rows, start=2):
-        scout_name = (row.get("Scout Name") or "").strip()
-        award_name = (row.get("Award Name") or "").strip()
-        if workflow == "ranks":
-            award_name = (row.get("Rank") or "").strip() or rank_fallback or award_name
-        pack_number = (row.get("Pack Number") or "").strip()
-        date_value = (row.get("Date") or "").strip()
-        if not scout_name:
-            errors.append(f"Row {idx}: Scout Name is required.")
-        if not award_name:
-            label = "Rank" if workflow == "ranks" else "Award Name"
-            errors.append(f"Row {idx}: {label} is required.")
-        if not pack_number:
-            warnings.append(f"Row {idx}: Pack Number is empty.")
-        if date_value and not _is_valid_date(date_value):
-            warnings.append(f"Row {idx}: Date '{date_value}' is not in a recognized format.")
-
-    return {
-        "header_count": len(fieldnames),
-        "row_count": len(rows),
-        "errors": errors,
-        "warnings": warnings,
-        "ok": len(errors) == 0,
-    }
+def _run_streamed_job(job: RenderJob, stream: Callable[[], Iterator[bytes]]) -> None:
+    try:
+        job.complete_stream(stream())
+    except (RenderCancelled, AdmissionRejected) as exc:
+        payload, status_code, headers = _render_failure(exc)
+        job.fail(payload["error"], status_code, headers.get("Retry-After"))
+    except Exception:
+        app.logger.exception("Render job %s failed", job.job_id)
+        job.fail("Failed to generate file.", 500)
 
 
 def _csv_missing_response() -> tuple[dict, int]:
     return {"error": "CSV file missing"}, 400
 
 
+@app.post("/templates")
+def upload_template():
+    if not template_upload_limiter.allow(_client_ip()):
+        payload, code = _rate_limited_response()
+        return jsonify(payload), code
+    template_file = request.files.get("template")
+    if template_file is None or not template_file.filename:
+        return jsonify({"error": "Template PDF missing"}), 400
+    name = (request.form.get("name") or template_file.filename).strip()[:120]
+    try:
+        index, created = template_store.put(template_file.read(), name)
+    except TemplateRejected as exc:
+        return jsonify({"error": str(exc)}), 400
+    except TemplateStoreFull as exc:
+        return jsonify({"error": str(exc)}), 507
+    return jsonify(summary(index)), 201 if created else 200
+
+
+@app.get("/templates")
+def list_templates():
+    supplied = request.headers.get("Authorization", "").encode("utf-8")
+    expected = f"Bearer {TEMPLATE_ADMIN_TOKEN}".encode("utf-8")
+    if not TEMPLATE_ADMIN_TOKEN or not secrets.compare_digest(supplied, expected):
+        return jsonify({"error": "Not found."}), 404
+    return jsonify({"templates": template_store.list()})
+
+
+@app.get("/templates/<template_hash>")
+def template_details(template_hash: str):
+    index = template_store.index(template_hash.lower())
+    if index is None:
+        return jsonify({"error": "Not found."}), 404
+    return jsonify(index)
+
+
 @app.post("/validate-csv")
 def validate_csv():
     if not validate_limiter.allow(_client_ip()):
@@ -470,24 +784,44 @@ def validate_csv():
     if apply_errors:
         return jsonify({"error": "CSV mapping is invalid.", "mapping_errors": apply_errors}), 400
 
-    report = _build_validation_report(fieldnames, rows, workflow=workflow, selected_rank=selected_rank)
+    report = validator_for(workflow).report(fieldnames, rows, selected_rank)
+    if report["ok"]:
+        # Hold the parsed rows so /generate can skip re-uploading and re-parsing the same CSV.
+        report["upload_token"] = upload_sessions.put(
+            {
+                "workflow": workflow,
+                "rank": selected_rank,
+                "csv_mapping": csv_mapping,
+                "normalized_rows": _normalize_rows_for_generator(
+                    rows, workflow=workflow, selected_rank=selected_rank
+                ),
+            }
+        )
+        report["upload_token_ttl_seconds"] = UPLOAD_SESSION_TTL_SECONDS
     return jsonify(report)
 
 
 @app.post("/generate")
 def generate_pdf():
-    if not generate_limiter.allow(_client_ip()):
+    # Previews render a single page (or a short range) per settings change, so they get their own budget.
+    preview = request.form.get("preview") == "1"
+    page_range = (request.form.get("pageRange") or "").strip()
+    row_range = (request.form.get("rowRange") or "").strip()
+    preview = preview or bool(page_range or row_range)
+    limiter = preview_limiter if preview else generate_limiter
+    if not limiter.allow(_client_ip()):
         payload, code = _rate_limited_response()
         return jsonify(payload), code
 
-    if "csv" not in request.files:
-        payload, code = _csv_missing_response()
-        return jsonify(payload), code
-
-    csv_file = request.files["csv"]
-    if not csv_file.filename:
-        payload, code = _csv_missing_response()
-        return jsonify(payload), code
+    upload_token = (request.form.get("uploadToken") or "").strip()
+    if not upload_token:
+        if "csv" not in request.files:
+            payload, code = _csv_missing_response()
+            return jsonify(payload), code
+        csv_file = request.files["csv"]
+        if not csv_file.filename:
+            payload, code = _csv_missing_response()
+            return jsonify(payload), code
 
     font_choice = request.form.get("fontName", "Helvetica")
     script_choice = request.form.get("scriptFont", "PatrickHand")
@@ -501,137 +835,530 @@ def generate_pdf():
     csv_mapping, mapping_errors = _parse_csv_mapping(request.form.get("csvMapping"))
     if mapping_errors:
         return jsonify({"error": "CSV mapping is invalid.", "mapping_errors": mapping_errors}), 400
+    if output_mode not in WORKFLOW_OUTPUT_MODES.get(workflow, ()):
+        return jsonify({"error": f"Output mode {output_mode!r} is not available for this workflow."}), 400
     output_name = _safe_output_name(request.form.get("outputName", "filled_awards.pdf"))
-    template_path = _selected_template(workflow, selected_rank)
+    template_hash = (request.form.get("templateHash") or "").strip().lower()
+    if template_hash:
+        template_path = template_store.template_path(template_hash)
+        if template_path is None:
+            return jsonify({"error": "Unknown template. Upload it again with POST /templates."}), 404
+        if workflow != "ranks" and not template_supports_field_fill(template_path):
+            return jsonify({"error": "This template is a rank card layout; use it with the ranks workflow."}), 400
+    else:
+        template_path = selected_template(workflow, selected_rank)
 
     if not template_path.exists():
         return jsonify({"error": "Template PDF not configured on server."}), 500
 
-    try:
-        csv_bytes = csv_file.read()
-        fieldnames, rows = _parse_csv_bytes(csv_bytes)
-    except UnicodeDecodeError:
-        return jsonify({"error": "CSV must be UTF-8 encoded."}), 400
-    fieldnames, rows, apply_errors = _apply_csv_mapping(fieldnames, rows, csv_mapping)
-    if apply_errors:
-        return jsonify({"error": "CSV mapping is invalid.", "mapping_errors": apply_errors}), 400
-
-    report = _build_validation_report(fieldnames, rows, workflow=workflow, selected_rank=selected_rank)
-    if not report["ok"]:
-        return jsonify({"error": "CSV validation failed.", "report": report}), 400
-    normalized_rows = _normalize_rows_for_generator(rows, workflow=workflow, selected_rank=selected_rank)
-    use_rank_layout = workflow == "ranks" and not _template_supports_field_fill(template_path)
-    fill_function = fill_rank_cards if use_rank_layout else fill_certificates
-    fill_kwargs: dict[str, object] = {}
-    if workflow == "ranks":
-        # Rank templates can have mixed native /Rotate metadata.
-        # Use the target final rotation for shift mapping so "left/down" behave in display space
-        # the same way users experience it on Adventures.
-        fill_kwargs["output_rotation_degrees"] = RANK_OUTPUT_ROTATION_DEGREES
+    usage = RequestMemory()
+    if upload_token:
+        session = upload_sessions.get(upload_token)
+        if (
+            session is None
+            or session["workflow"] != workflow
+            or session["rank"] != selected_rank
+            or session["csv_mapping"] != csv_mapping
+        ):
+            return (
+                jsonify({"error": "Upload session expired. Please upload the CSV again.", "session_expired": True}),
+                410,
+            )
+        normalized_rows = session["normalized_rows"]
+    else:
+        with usage.stage("upload"):
+            try:
+                csv_bytes = csv_file.read()
+                fieldnames, rows = _parse_csv_bytes(csv_bytes)
+            except UnicodeDecodeError:
+                return jsonify({"error": "CSV must be UTF-8 encoded."}), 400
+            fieldnames, rows, apply_errors = _apply_csv_mapping(fieldnames, rows, csv_mapping)
+            if apply_errors:
+                return jsonify({"error": "CSV mapping is invalid.", "mapping_errors": apply_errors}), 400
+
+            report = validator_for(workflow).report(fieldnames, rows, selected_rank)
+            if not report["ok"]:
+                return jsonify({"error": "CSV validation failed.", "report": report}), 400
+            normalized_rows = _normalize_rows_for_generator(rows, workflow=workflow, selected_rank=selected_rank)
+    if preview:
+        try:
+            selection = selection_slice(ROWS_PER_PAGE, pages=page_range or "1", rows=row_range)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        normalized_rows = normalized_rows[selection]
+        if not normalized_rows:
+            return jsonify({"error": "No CSV rows fall inside the selected page/row range."}), 400
+        output_mode = "preview"
+    use_rank_layout = workflow == "ranks" and not template_supports_field_fill(template_path)
 
     font_name, font_file = _resolve_font_choice(font_choice, FONT_CHOICES)
     if not font_name:
         font_name = "Helvetica"
         font_file = None
     script_font_name, script_font_file = _resolve_font_choice(script_choice, SCRIPT_FONT_CHOICES)
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir_path = Path(tmpdir)
-        csv_path = tmpdir_path / "input.csv"
-        with csv_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=GENERATOR_HEADERS)
-            writer.writeheader()
-            for row in normalized_rows:
-                writer.writerow({k: row.get(k, "") for k in GENERATOR_HEADERS})
-
-        if output_mode == "per_scout_zip":
-            zip_name = _safe_zip_name(request.form.get("outputName", "scout_awards.zip"))
-            zip_path = tmpdir_path / zip_name
-            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for i, row in enumerate(normalized_rows, start=1):
-                    scout = _safe_base_name(row.get("Scout Name", "scout"))
-                    award = _safe_base_name(row.get("Award Name", "award"))
-                    file_stem = f"{i:03d}_{scout}_{award}"
-                    row_csv = tmpdir_path / f"{file_stem}.csv"
-                    row_pdf = tmpdir_path / f"{file_stem}.pdf"
-                    with row_csv.open("w", newline="", encoding="utf-8") as f:
-                        writer = csv.DictWriter(f, fieldnames=GENERATOR_HEADERS)
-                        writer.writeheader()
-                        writer.writerow({k: row.get(k, "") for k in GENERATOR_HEADERS})
-                    fill_function(
-                        csv_path=row_csv,
-                        output_path=row_pdf,
-                        template_path=template_path,
-                        shift_left_inch=shift_left,
-                        shift_down_inch=shift_down,
-                        font_name=font_name,
-                        script_font_name=script_font_name,
-                        font_size=font_size,
-                        script_font_size=script_font_size,
-                        font_file=font_file,
-                        script_font_file=script_font_file,
-                        **fill_kwargs,
-                    )
-                    if workflow == "ranks":
-                        _normalize_pdf_rotation_in_place(row_pdf, RANK_OUTPUT_ROTATION_DEGREES)
-                    zf.write(row_pdf, arcname=row_pdf.name)
-
-            return send_file(
-                zip_path,
-                as_attachment=True,
-                download_name=zip_name,
-                mimetype="application/zip",
+    fill_settings: dict[str, object] = {
+        "shift_left_inch": shift_left,
+        "shift_down_inch": shift_down,
+        "font_name": font_name,
+        "script_font_name": script_font_name,
+        "font_size": font_size,
+        "script_font_size": script_font_size,
+        "font_file": font_file,
+        "script_font_file": script_font_file,
+        "optimize": PDF_OPTIMIZE_LEVEL,
+    }
+    if output_mode == "combined_pdf":
+        if request.form.get("linearize") == "1":
+            if not linearize_available():
+                return jsonify({"error": "Linearized output is not available on this server."}), 400
+            fill_settings["linearize"] = True
+        elif PDF_LINEARIZE_MIN_PAGES and linearize_available():
+            pages = -(-len(normalized_rows) // ROWS_PER_PAGE)
+            fill_settings["linearize"] = pages >= PDF_LINEARIZE_MIN_PAGES
+    if workflow == "ranks":
+        # Rank templates can have mixed native /Rotate metadata.
+        # Use the target final rotation for shift mapping so "left/down" behave in display space
+        # the same way users experience it on Adventures.
+        fill_settings["output_rotation_degrees"] = RANK_OUTPUT_ROTATION_DEGREES
+
+    if output_mode in ZIP_OUTPUT_MODES:
+        download_name = _safe_zip_name(request.form.get("outputName", "scout_awards.zip"))
+        mimetype = "application/zip"
+    else:
+        download_name = output_name
+        mimetype = "application/pdf"
+
+    cost = estimate_render_cost(len(normalized_rows), output_mode, workflow)
+    wants_progress = request.form.get("progress") == "1" and not preview
+
+    budget = memory_budget_bytes()
+    template_size = template_path.stat().st_size
+    if budget and estimate_render_memory(len(normalized_rows), output_mode, template_size) > budget:
+        # Over budget: ZIPs fall back to streaming one entry at a time; a single PDF cannot be split, so refuse it.
+        groups = _group_rows_for_output(normalized_rows, output_mode) if output_mode in ZIP_OUTPUT_MODES else []
+        largest_group = max((len(group_rows) for _, group_rows in groups), default=len(normalized_rows))
+        needed = estimate_streaming_memory(largest_group, template_size)
+        if not groups or needed > budget:
+            render_memory.record_refused()
+            advice = "Split the largest group into smaller CSVs." if groups else "Choose a ZIP output or split the CSV."
+            return (
+                jsonify(
+                    {
+                        "error": f"This roster needs about {needed // 1048576 + 1} MB to render, over the server's "
+                        f"{budget // 1048576} MB limit. {advice}"
+                    }
+                ),
+                413,
             )
+        render_memory.record_streamed()
+        return _streamed_zip_response(
+            groups,
+            workflow,
+            output_mode,
+            template_path,
+            use_rank_layout,
+            fill_settings,
+            cost,
+            usage,
+            download_name,
+            job=render_jobs.create(download_name, mimetype) if wants_progress else None,
+        )
 
-        out_path = tmpdir_path / output_name
-        fill_function(
-            csv_path=csv_path,
-            output_path=out_path,
-            template_path=template_path,
-            shift_left_inch=shift_left,
-            shift_down_inch=shift_down,
-            font_name=font_name,
-            script_font_name=script_font_name,
-            font_size=font_size,
-            script_font_size=script_font_size,
-            font_file=font_file,
-            script_font_file=script_font_file,
-            **fill_kwargs,
+    render_key = _render_key(normalized_rows, workflow, output_mode, template_path, use_rank_layout, fill_settings)
+    known_etag = output_etags.get(render_key)
+    if known_etag is not None and request.if_none_match.contains(known_etag):
+        # The client already holds exactly what this render would produce (the UI keeps recent results and sends
+        # their ETags), so there is nothing to render or send, with or without progress=1.
+        output_etags.record_not_modified(rendered=False)
+        return _not_modified(known_etag)
+    # With progress=1 the render runs as a background job: the client follows /jobs/<id>/events
+    # and fetches the result from /jobs/<id>/download instead of holding this request open.
+    job = render_jobs.create(download_name, mimetype) if wants_progress else None
+    # A job outlives this request, so it is cancelled when nobody follows it rather than when this client leaves.
+    disconnected = _client_disconnect_probe(request.environ) if job is None else job.abandoned
+    cancel_token = CancellationToken.with_budget(
+        RENDER_BUDGET_SECONDS,
+        # A coalesced render keeps going while other requests are still waiting for its bytes.
+        probe=(lambda: disconnected() and not render_flights.has_waiters(render_key)) if disconnected else None,
+    )
+
+    def render() -> bytes:
+        try:
+            with render_admission.admit(cost), usage.stage("render"):
+                return _render_generate_output(
+                    normalized_rows,
+                    workflow,
+                    output_mode,
+                    template_path,
+                    use_rank_layout,
+                    fill_settings,
+                    cancel_token,
+                    progress=job.progress if job is not None else None,
+                )
+        finally:
+            _log_render_memory(usage, output_mode, len(normalized_rows))
+
+    if job is not None:
+        threading.Thread(
+            target=_run_render_job, args=(job, render_key, render), name=f"render-job-{job.job_id}", daemon=True
+        ).start()
+        return (
+            jsonify(
+                {
+                    "job_id": job.job_id,
+                    "events_url": f"/jobs/{job.job_id}/events",
+                    "download_url": f"/jobs/{job.job_id}/download",
+                }
+            ),
+            202,
         )
-        if workflow == "ranks":
-            _normalize_pdf_rotation_in_place(out_path, RANK_OUTPUT_ROTATION_DEGREES)
 
-        return send_file(
-            out_path,
-            as_attachment=True,
-            download_name=output_name,
-            mimetype="application/pdf",
+    try:
+        # Identical concurrent requests (same rows and settings) wait on one render and share its bytes.
+        output_bytes, _ = render_flights.do(render_key, render)
+    except (RenderCancelled, AdmissionRejected) as exc:
+        payload, status_code, headers = _render_failure(exc)
+        response = jsonify(payload)
+        response.status_code = status_code
+        response.headers.update(headers)
+        return response
+
+    etag = output_etags.remember(render_key, output_bytes)
+    if request.if_none_match.contains(etag):
+        # Rendered by another worker or before this process knew the key: the bytes still need not be sent.
+        output_etags.record_not_modified(rendered=True)
+        return _not_modified(etag)
+    return send_file(
+        io.BytesIO(output_bytes),
+        # Previews open inline so the UI can show them in a frame next to the settings.
+        as_attachment=not preview,
+        download_name=download_name,
+        mimetype=mimetype,
+        etag=etag,
+    )
+
+
+def _not_modified(etag: str) -> Response:
+    # A POST normally answers a matching If-None-Match with 412; /generate is a read of a deterministic function
+    # of its form, so it answers like a GET would.
+    return Response(status=304, headers={"ETag": f'"{etag}"'})
+
+
+def _streamed_zip_response(
+    groups: list[tuple[str, list[dict[str, str]]]],
+    workflow: str,
+    output_mode: str,
+    template_path: Path,
+    use_rank_layout: bool,
+    fill_settings: dict[str, object],
+    cost: float,
+    usage: RequestMemory,
+    download_name: str,
+    job: RenderJob | None,
+):
+    # Streamed renders skip coalescing: sharing them would mean buffering the whole archive again.
+    row_count = sum(len(group_rows) for _, group_rows in groups)
+    disconnected = _client_disconnect_probe(request.environ) if job is None else job.abandoned
+    cancel_token = CancellationToken.with_budget(RENDER_BUDGET_SECONDS, probe=disconnected)
+    render_groups = _group_renderer(
+        workflow,
+        template_path,
+        use_rank_layout,
+        fill_settings,
+        cancel_token,
+        progress=job.progress if job is not None else None,
+    )
+
+    if job is not None:
+
+        def stream() -> Iterator[bytes]:
+            try:
+                with render_admission.admit(cost):
+                    yield from _stream_zip_output(groups, render_groups, usage)
+            finally:
+                _log_render_memory(usage, output_mode, row_count, streamed=True)
+
+        threading.Thread(
+            target=_run_streamed_job, args=(job, stream), name=f"render-job-{job.job_id}", daemon=True
+        ).start()
+        return (
+            jsonify(
+                {
+                    "job_id": job.job_id,
+                    "events_url": f"/jobs/{job.job_id}/events",
+                    "download_url": f"/jobs/{job.job_id}/download",
+                }
+            ),
+            202,
         )
 
+    # The admission slot is taken before the response starts so a full queue can still answer 503;
+    # it is released when the stream finishes or the server closes the response, whichever comes first.
+    admitted = ExitStack()
+    try:
+        admitted.enter_context(render_admission.admit(cost))
+    except AdmissionRejected as exc:
+        payload, status_code, headers = _render_failure(exc)
+        return jsonify(payload), status_code, headers
+
+    def body() -> Iterator[bytes]:
+        try:
+            yield from _stream_zip_output(groups, render_groups, usage)
+        except RenderCancelled as exc:
+            # Headers are already sent; all that is left to do is stop and count it.
+            render_cancellations.record(exc.reason)
+        finally:
+            admitted.close()
+            _log_render_memory(usage, output_mode, row_count, streamed=True)
+
+    response = Response(
+        body(),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'},
+    )
+    response.call_on_close(admitted.close)
+    return response
+
+
+def _sse_event(event: str, data: dict[str, object]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/jobs/<job_id>/events")
+def job_events(job_id: str):
+    if render_jobs.status(job_id) is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+    if not job_event_slots.try_acquire():
+        response = jsonify({"error": "Too many progress streams; poll download_url instead."})
+        response.headers["Retry-After"] = str(JOB_EVENT_RETRY_AFTER_SECONDS)
+        return response, 503
+
+    disconnected = _client_disconnect_probe(request.environ)
+
+    def stream():
+        last_sent = None
+        last_change = last_write = time.monotonic()
+        last_mark = 0.0
+        # A job whose worker died never finishes; give up once it has been silent longer than any render can take.
+        stall_seconds = RENDER_BUDGET_SECONDS + render_admission.queue_timeout_seconds
+        while True:
+            if disconnected is not None and disconnected():
+                # Stop marking the job as followed so the render can notice it has been abandoned.
+                return
+            if time.monotonic() - last_mark >= LISTENER_MARK_INTERVAL_SECONDS:
+                last_mark = time.monotonic()
+                render_jobs.mark_listening(job_id)
+            status = render_jobs.status(job_id)
+            if status is None:
+                yield _sse_event("failed", {"error": "Job expired.", "status_code": 410})
+                return
+            if status != last_sent:
+                last_sent = status
+                last_change = last_write = time.monotonic()
+                if status["state"] == "complete":
+                    yield _sse_event("complete", {"download_url": f"/jobs/{job_id}/download", **status})
+                    return
+                if status["state"] == "failed":
+                    yield _sse_event("failed", status)
+                    return
+                yield _sse_event("progress", status)
+            elif time.monotonic() - last_change >= stall_seconds:
+                yield _sse_event("failed", {"error": "Job stopped responding.", "status_code": 504})
+                return
+            elif time.monotonic() - last_write >= JOB_EVENT_HEARTBEAT_SECONDS:
+                # Comment lines keep proxies from closing an idle stream while the job waits in the queue.
+                last_write = time.monotonic()
+                yield ": keep-alive\n\n"
+            time.sleep(JOB_EVENT_POLL_SECONDS)
+
+    response = Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs when the server closes the response, including a stream that was never iterated.
+    response.call_on_close(job_event_slots.release)
+    return response
+
+
+@app.get("/jobs/<job_id>/download")
+def job_download(job_id: str):
+    status = render_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+    if status["state"] == "failed":
+        return jsonify({"error": status.get("error", "Failed to generate file.")}), int(status.get("status_code", 500))
+    if status["state"] != "complete":
+        # Polling clients (no progress stream) keep the job alive the same way a stream does.
+        render_jobs.mark_listening(job_id)
+        return jsonify({"error": "Job is still rendering.", "state": status["state"]}), 409
+    output_path = render_jobs.output_path(job_id)
+    if not output_path.exists():
+        return jsonify({"error": "This file was already downloaded. Generate it again."}), 410
+    # A GET, so send_file answers a matching If-None-Match with 304 itself.
+    response = send_file(
+        output_path,
+        as_attachment=True,
+        download_name=str(status["download_name"]),
+        mimetype=str(status["mimetype"]),
+        etag=status.get("etag") or True,
+    )
+    # Outputs sit in RENDER_JOB_DIR (often memory-backed) until the TTL; once the client has the file, drop it.
+    if response.status_code == 304:
+        render_jobs.remove_output(job_id)
+    elif response.status_code == 200:
+        response.response = _remove_when_sent(response.response, partial(render_jobs.remove_output, job_id))
+    return response
+
+
+def _remove_when_sent(chunks: Iterable[bytes], remove: Callable[[], None]) -> Iterator[bytes]:
+    # Removes the file only after the last chunk was handed to the server, so an interrupted download can retry.
+    try:
+        yield from chunks
+        remove()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+@app.get("/metrics")
+def metrics():
+    return jsonify(
+        {
+            "admission": render_admission.snapshot(),
+            "coalescing": render_flights.snapshot(),
+            "conditional": output_etags.snapshot(),
+            "event_streams": job_event_slots.snapshot(),
+            "cancellation": render_cancellations.snapshot(),
+            "memory": render_memory.snapshot(),
+            "render_pool": render_pool.snapshot() if render_pool is not None else None,
+        }
+    )
+
+
+def _bundled_font_files() -> list[tuple[str, str]]:
+    fonts: list[tuple[str, str]] = []
+    for catalog in (FONT_CHOICES, SCRIPT_FONT_CHOICES):
+        for choice_id in catalog:
+            pdf_name, path = _resolve_font_choice(choice_id, catalog)
+            if pdf_name and path:
+                fonts.append((pdf_name, path))
+    return fonts
+
+
+def start_render_pool() -> bool:
+    # Started once per web worker process: from gunicorn's post_worker_init, main(), or the first render.
+    if render_pool is None:
+        return False
+    if not render_pool.started:
+        templates = [str(path) for path in {TEMPLATE_PATH, *RANK_TEMPLATE_PATHS.values()} if path.exists()]
+        render_pool.start({"fonts": _bundled_font_files(), "templates": templates})
+    return True
+
+
+def warm_up() -> dict[str, float]:
+    # Pay import, template parsing, field indexing and TTF loading once per worker instead of on the first request.
+    if startup.is_ready():
+        return startup.timings()
+    with startup.timed("warmup:total"):
+        with startup.timed("warmup:static"):
+            static_assets.build()
+            _validation_rules_asset()
+        certs = _certs_module()
+        rank_cards = _rank_cards_module()
+        with startup.timed("warmup:templates"):
+            for template_path in {TEMPLATE_PATH, *RANK_TEMPLATE_PATHS.values()}:
+                if not template_path.exists():
+                    continue
+                if template_supports_field_fill(template_path):
+                    certs.warm_template(template_path)
+                else:
+                    rank_cards.warm_template(template_path)
+        with startup.timed("warmup:fonts"):
+            for pdf_name, path in _bundled_font_files():
+                try:
+                    register_font(pdf_name, path)
+                except Exception:
+                    continue
+        if TEMPLATE_PATH.exists():
+            with startup.timed("warmup:first_render"):
+                # One throwaway page exercises the remaining lazy paths in pypdf and reportlab.
+                for _ in certs.fill_certificate_groups(
+                    [("warmup", [{"Scout Name": "Warm Up", "Award Name": "Warm Up"}])],
+                    template_path=TEMPLATE_PATH,
+                    shift_left_inch=0.0,
+                    shift_down_inch=0.0,
+                    font_name="Helvetica",
+                    script_font_name=None,
+                    font_size=12.0,
+                ):
+                    pass
+    startup.mark_ready()
+    return startup.timings()
+
+
+@app.get("/readyz")
+def readyz():
+    payload = {
+        "ready": startup.is_ready(),
+        "timings": startup.timings(),
+        "caches": {**cache_info(), "static": static_assets.info()},
+    }
+    return jsonify(payload), 200 if payload["ready"] else 503
+
+
+@lru_cache(maxsize=1)
+def _validation_rules_asset() -> StaticAsset:
+    # Built once per process; served like a page (gzip, ETag, short revalidation window).
+    data = json.dumps(rules_document(GENERATOR_HEADERS + ["Rank"]), sort_keys=True).encode("utf-8")
+    return StaticAsset("validation-rules.json", data, static_assets.revalidate_cache_control)
 
 
+@app.get("/validation-rules")
+def validation_rules():
+    return _validation_rules_asset().response(request)
+
+
+def _static_response(name: str):
+    asset = static_assets.get(name)
+    if asset is None:
+        return jsonify({"error": "Not found."}), 404
+    return asset.response(request)
+
 
 @app.get("/")
 def index():
-    return app.send_static_file("index.html")
+    return _static_response("index.html")
 
 
 @app.get("/adventures")
 def adventures_page():
-    return app.send_static_file("adventures.html")
+    return _static_response("adventures.html")
 
 
 @app.get("/ranks")
 def ranks_page():
-    return app.send_static_file("ranks.html")
+    return _static_response("ranks.html")
 
 
 @app.get("/favicon.ico")
 def favicon():
-    return app.send_static_file("favicon.png")
+    return _static_response("favicon.png")
+
+
+@app.get("/<path:filename>")
+def static_file(filename: str):
+    return _static_response(filename)
+
+
+startup.record_timing("import:server", time.perf_counter() - IMPORT_STARTED)
 
 
 def main() -> None:
+    # Warm caches in the background so the dev server starts listening immediately; /readyz reports progress.
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    start_render_pool()
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "5178")), debug=False)
 
 
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    # Concurrent calls with the same key share one execution: the first caller runs `fn`,
+    # later callers block until it finishes and receive the same result (or exception).
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight[T]] = {}
+        self._lock = threading.Lock()
+        self._executed_total = 0
+        self._coalesced_total = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> tuple[T, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self._coalesced_total += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._executed_total += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True  # type: ignore[return-value]
+
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            # Drop the key before waking waiters so requests arriving afterwards start a fresh render.
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def has_waiters(self, key: str) -> bool:
+        with self._lock:
+            flight = self._flights.get(key)
+            return flight is not None and flight.waiters > 0
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "waiting": sum(flight.waiters for flight in self._flights.values()),
+                "executed_total": self._executed_total,
+                "coalesced_total": self._coalesced_total,
+            }
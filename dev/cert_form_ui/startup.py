@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Iterator
+
+PROCESS_STARTED = time.perf_counter()
+
+_lock = threading.Lock()
+_timings: dict[str, float] = {}
+_modules: dict[str, ModuleType] = {}
+_ready = threading.Event()
+
+
+def record_timing(name: str, seconds: float) -> None:
+    with _lock:
+        _timings[name] = round(seconds, 4)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started)
+
+
+def lazy_import(module_name: str, fallback_name: str) -> ModuleType:
+    # Heavy modules (pypdf, reportlab via the fillers) are imported on first use instead of at app import.
+    module = _modules.get(module_name)
+    if module is not None:
+        return module
+    with _lock:
+        module = _modules.get(module_name)
+        if module is not None:
+            return module
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        except ModuleNotFoundError:
+            # Fallback for direct script execution from source checkout.
+            module = importlib.import_module(fallback_name)
+        _timings[f"import:{fallback_name}"] = round(time.perf_counter() - started, 4)
+        _modules[module_name] = module
+    return module
+
+
+def mark_ready() -> None:
+    if not _ready.is_set():
+        record_timing("time_to_ready", time.perf_counter() - PROCESS_STARTED)
+        _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def timings() -> dict[str, float]:
+    with _lock:
+        return dict(_timings)
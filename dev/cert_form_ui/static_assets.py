@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import copy
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+
+from flask import Request, Response
+
+# Pages get a short freshness window and then revalidate with their ETag (a 304 costs no body).
+STATIC_HTML_MAX_AGE = int(os.environ.get("STATIC_HTML_MAX_AGE", "60"))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Served under a content-hashed name from the HTML; the plain name keeps working with the short window.
+FINGERPRINTED_ASSETS = ("styles.css", "app.js", "nav.js", "campfire-accent.gif", "favicon.png")
+PAGES = ("index.html", "adventures.html", "ranks.html")
+DOWNLOADS = ("cub_scout_award_template.csv", "rank_template.csv", "wolf_rank_template.csv")
+# GIF and PNG are already compressed; only text gets gzip/brotli variants.
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".csv")
+MIN_COMPRESS_BYTES = 512
+
+_ASSET_REF_RE = re.compile(r'\b(href|src)="/?([\w.-]+)"')
+
+
+def _brotli(data: bytes) -> bytes | None:
+    # Optional dependency (pip install -e ".[brotli]"); without it clients get gzip.
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+class StaticAsset:
+    def __init__(self, name: str, data: bytes, cache_control: str) -> None:
+        # Flask adds "; charset=utf-8" to text types itself.
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.cache_control = cache_control
+        digest = hashlib.sha256(data).hexdigest()
+        self.fingerprint = digest[:10]
+        # Encodings in server preference order; each representation gets its own strong ETag.
+        self.variants: dict[str, bytes] = {}
+        if name.endswith(COMPRESSIBLE_SUFFIXES) and len(data) >= MIN_COMPRESS_BYTES:
+            encoded = _brotli(data)
+            if encoded is not None and len(encoded) < len(data):
+                self.variants["br"] = encoded
+            encoded = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(encoded) < len(data):
+                self.variants["gzip"] = encoded
+        self.variants["identity"] = data
+        self.etags = {encoding: f"{digest[:32]}-{encoding}" for encoding in self.variants}
+
+    def with_cache_control(self, cache_control: str) -> "StaticAsset":
+        # Same bytes and ETags under another URL, without compressing everything a second time.
+        asset = copy.copy(self)
+        asset.cache_control = cache_control
+        return asset
+
+    def response(self, request: Request) -> Response:
+        encoding = request.accept_encodings.best_match(list(self.variants), default="identity")
+        if encoding not in self.variants:
+            encoding = "identity"
+        headers = {"Cache-Control": self.cache_control, "ETag": f'"{self.etags[encoding]}"'}
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        # Every variant decodes to the same bytes, so a match on any of them is still a valid 304.
+        if any(request.if_none_match.contains_weak(etag) for etag in self.etags.values()):
+            return Response(status=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], mimetype=self.mimetype, headers=headers)
+
+
+class StaticAssets:
+    # Built once per process (in warm_up, or by the first request): files are read, hashed and compressed
+    # up front so serving one is a dict lookup and a write, with no filesystem access on the request path.
+    def __init__(self, root: Path, html_max_age: int = STATIC_HTML_MAX_AGE) -> None:
+        self.root = root
+        self.revalidate_cache_control = f"public, max-age={html_max_age}, must-revalidate"
+        self._assets: dict[str, StaticAsset] | None = None
+        self._lock = threading.Lock()
+
+    def build(self) -> dict[str, StaticAsset]:
+        with self._lock:
+            if self._assets is None:
+                self._assets = self._build()
+            return self._assets
+
+    def _build(self) -> dict[str, StaticAsset]:
+        assets: dict[str, StaticAsset] = {}
+        urls: dict[str, str] = {}
+        for name in FINGERPRINTED_ASSETS + DOWNLOADS:
+            path = self.root / name
+            if not path.exists():
+                continue
+            data = path.read_bytes()
+            assets[name] = StaticAsset(name, data, self.revalidate_cache_control)
+            if name in FINGERPRINTED_ASSETS:
+                stem, suffix = os.path.splitext(name)
+                hashed = f"{stem}.{assets[name].fingerprint}{suffix}"
+                assets[hashed] = assets[name].with_cache_control(IMMUTABLE_CACHE_CONTROL)
+                urls[name] = f"/{hashed}"
+
+        def fingerprint_ref(match: re.Match) -> str:
+            url = urls.get(match.group(2))
+            return f'{match.group(1)}="{url}"' if url else match.group(0)
+
+        for name in PAGES:
+            path = self.root / name
+            if path.exists():
+                html = _ASSET_REF_RE.sub(fingerprint_ref, path.read_text(encoding="utf-8"))
+                assets[name] = StaticAsset(name, html.encode("utf-8"), self.revalidate_cache_control)
+        return assets
+
+    def get(self, name: str) -> StaticAsset | None:
+        return self.build().get(name)
+
+    def info(self) -> dict[str, int]:
+        assets = self.build()
+        # Fingerprinted and plain URLs share their variants; count each buffer once.
+        buffers = {id(data): data for asset in assets.values() for data in asset.variants.values()}
+        return {"assets": len(assets), "bytes": sum(len(data) for data in buffers.values())}
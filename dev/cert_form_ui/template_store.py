@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    from dev.award_templates import FIELD_FILL_KIND, detect_field_fill_support
+    from dev.cert_form_ui import startup
+    from dev.pdf_assets import open_buffer, seed_template_values
+except ModuleNotFoundError:
+    from award_templates import FIELD_FILL_KIND, detect_field_fill_support  # type: ignore
+    import startup  # type: ignore
+    from pdf_assets import open_buffer, seed_template_values  # type: ignore
+
+# The temp-directory default is in memory on Cloud Run (tmpfs), so production should mount a persistent volume here.
+TEMPLATE_STORE_DIR = Path(
+    os.environ.get("TEMPLATE_STORE_DIR", str(Path(tempfile.gettempdir()) / "cubscout-templates"))
+).expanduser()
+# Uploads are unauthenticated, so the store is bounded. When a new upload would go over either cap, the least
+# recently used templates are evicted, but only ones idle for TEMPLATE_STORE_EVICT_IDLE_SECONDS so a template
+# someone is rendering with is not pulled away; if that frees too little the upload is refused.
+TEMPLATE_STORE_MAX_BYTES = int(os.environ.get("TEMPLATE_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+TEMPLATE_STORE_MAX_TEMPLATES = int(os.environ.get("TEMPLATE_STORE_MAX_TEMPLATES", "50"))
+TEMPLATE_STORE_EVICT_IDLE_SECONDS = float(os.environ.get("TEMPLATE_STORE_EVICT_IDLE_SECONDS", "3600"))
+# A template's last use is the mtime of an empty <sha256>.used file next to it, shared by every worker on the volume;
+# renders refresh it at most this often. The PDF's own mtime never changes: template caches and render keys use it.
+_TOUCH_INTERVAL_SECONDS = 60.0
+# Bump when the stored layout index changes shape; older indexes are rebuilt from their PDF on first use.
+INDEX_VERSION = 1
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class TemplateRejected(ValueError):
+    pass
+
+
+class TemplateStoreFull(Exception):
+    pass
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # A temp name of its own per write: workers storing the same upload, or an index rebuild racing put(), must not
+    # rename each other's half-written files.
+    tmp = tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".part", delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+    except BaseException:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+
+class TemplateStore:
+    # Custom templates are stored as <sha256>.pdf with their layout index in <sha256>.json, so the same design
+    # uploaded twice (or by two workers) is one file, and field extraction / anchor detection runs once per upload
+    # instead of once per worker. Parsed templates then live in pdf_assets' bounded LRU like the built-in ones.
+    def __init__(
+        self,
+        directory: Path = TEMPLATE_STORE_DIR,
+        max_bytes: int = TEMPLATE_STORE_MAX_BYTES,
+        max_templates: int = TEMPLATE_STORE_MAX_TEMPLATES,
+        evict_idle_seconds: float = TEMPLATE_STORE_EVICT_IDLE_SECONDS,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_templates = max_templates
+        self.evict_idle_seconds = evict_idle_seconds
+
+    def pdf_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.pdf"
+
+    def index_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.json"
+
+    def used_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.used"
+
+    def put(self, data: bytes, name: str) -> tuple[dict[str, object], bool]:
+        # Returns the stored index and whether this upload created it.
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self.index(digest)
+        if existing is not None:
+            self._touch(digest, force=True)
+            return existing, False
+        if len(data) > self.max_bytes:
+            raise TemplateStoreFull("Template is larger than the template store allows.")
+        index = self._build_index(digest, data, name)
+        encoded = json.dumps(index).encode("utf-8")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._make_room(len(data) + len(encoded))
+        _write_atomic(self.pdf_path(digest), data)
+        _write_atomic(self.index_path(digest), encoded)
+        self._touch(digest, force=True)
+        return index, True
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        # (last used, digest, bytes on disk) for every stored template, least recently used first.
+        entries = []
+        for pdf_path in self.directory.glob("*.pdf"):
+            if not _DIGEST_RE.match(pdf_path.stem):
+                continue
+            try:
+                stat = pdf_path.stat()
+                size = stat.st_size + self.index_path(pdf_path.stem).stat().st_size
+            except OSError:
+                continue
+            entries.append((self._last_used(pdf_path.stem, stat.st_mtime), pdf_path.stem, size))
+        return sorted(entries)
+
+    def _make_room(self, incoming_bytes: int) -> None:
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        count = len(entries)
+        idle_before = time.time() - self.evict_idle_seconds
+        for last_used, digest, size in entries:
+            if total + incoming_bytes <= self.max_bytes and count < self.max_templates:
+                break
+            if last_used > idle_before:
+                # Oldest first, so everything after this one is in use too.
+                break
+            self.remove(digest)
+            total -= size
+            count -= 1
+        if total + incoming_bytes > self.max_bytes or count >= self.max_templates:
+            raise TemplateStoreFull("The template store is full; try again later.")
+
+    def remove(self, digest: str) -> None:
+        # Index first: a template without its index is invisible, never half-listed.
+        self.index_path(digest).unlink(missing_ok=True)
+        self.pdf_path(digest).unlink(missing_ok=True)
+        self.used_path(digest).unlink(missing_ok=True)
+
+    def _last_used(self, digest: str, stored_at: float) -> float:
+        try:
+            return self.used_path(digest).stat().st_mtime
+        except OSError:
+            return stored_at
+
+    def _touch(self, digest: str, force: bool = False) -> None:
+        try:
+            if force or time.time() - self._last_used(digest, 0.0) >= _TOUCH_INTERVAL_SECONDS:
+                self.used_path(digest).touch()
+        except OSError:
+            pass
+
+    def _build_index(self, digest: str, data: bytes, name: str) -> dict[str, object]:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+
+        if not data.startswith(b"%PDF-"):
+            raise TemplateRejected("Template must be a PDF file.")
+        buffer = memoryview(data)
+        try:
+            reader = PdfReader(open_buffer(buffer))
+            page = reader.pages[0]
+        except (PdfReadError, IndexError, ValueError) as exc:
+            raise TemplateRejected(f"Template PDF could not be read: {exc}") from exc
+        supports_field_fill = detect_field_fill_support(buffer)
+        module_name = "fill_cub_scout_certs" if supports_field_fill else "fill_cub_scout_rank_cards"
+        filler = startup.lazy_import(f"dev.{module_name}", module_name)
+        try:
+            layout = filler.layout_index(buffer)
+        except ValueError as exc:
+            raise TemplateRejected(str(exc)) from exc
+        return {
+            "hash": digest,
+            "name": name,
+            "size": len(data),
+            "pages": len(reader.pages),
+            "page_size": [float(page.mediabox.width), float(page.mediabox.height)],
+            "layout": "fields" if supports_field_fill else "cards",
+            "uploaded_at": int(time.time()),
+            "index_version": INDEX_VERSION,
+            "values": {FIELD_FILL_KIND: supports_field_fill, filler.LAYOUT_KIND: layout},
+        }
+
+    def index(self, digest: str) -> dict[str, object] | None:
+        if not _DIGEST_RE.match(digest):
+            return None
+        try:
+            index = json.loads(self.index_path(digest).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if index.get("index_version") != INDEX_VERSION:
+            try:
+                data = self.pdf_path(digest).read_bytes()
+                index = self._build_index(digest, data, str(index.get("name") or ""))
+            except (OSError, TemplateRejected):
+                return None
+            _write_atomic(self.index_path(digest), json.dumps(index).encode("utf-8"))
+        return index
+
+    def template_path(self, digest: str) -> Path | None:
+        # The path to render with, with its layout already handed to pdf_assets.
+        path = self.pdf_path(digest)
+        if not _DIGEST_RE.match(digest) or not path.exists():
+            return None
+        self._touch(digest)
+        seed_stored_layout(path)
+        return path
+
+    def list(self) -> list[dict[str, object]]:
+        summaries = []
+        for index_path in sorted(self.directory.glob("*.json")):
+            index = self.index(index_path.stem)
+            if index is not None:
+                summaries.append(summary(index))
+        return sorted(summaries, key=lambda item: item["uploaded_at"], reverse=True)
+
+
+def seed_stored_layout(template_path: Path) -> None:
+    # Hands a stored template's saved index to pdf_assets, so a template that was evicted from the cache (or never
+    # seen by this process) is not re-parsed. Other templates are left alone.
+    index_path = template_path.with_suffix(".json")
+    if not _DIGEST_RE.match(template_path.stem) or not index_path.exists():
+        return
+    store = TemplateStore(template_path.parent)
+    seed_template_values(template_path, lambda: (store.index(template_path.stem) or {}).get("values", {}))
+
+
+def summary(index: dict[str, object]) -> dict[str, object]:
+    # The index without its layout values, for listings.
+    return {key: value for key, value in index.items() if key != "values"}
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+try:
+    from dev.award_templates import canonical_rank
+    from dev.dates import date_rules, normalize_date
+except ModuleNotFoundError:
+    from award_templates import canonical_rank  # type: ignore
+    from dates import date_rules, normalize_date  # type: ignore
+
+COMMON_REQUIRED_HEADERS = ["Date", "Pack Number", "Scout Name", "Den Leader", "Cubmaster"]
+ADVENTURE_REQUIRED_HEADERS = COMMON_REQUIRED_HEADERS + ["Award Name"]
+RANK_REQUIRED_HEADERS = COMMON_REQUIRED_HEADERS + ["Rank"]
+# Past this many errors the scan stops: the CSV has to be fixed anyway, and a 50k-row file with a broken
+# column would otherwise produce a 50k-line report. Warnings never stop the scan, but only this many are listed.
+VALIDATION_MAX_ERRORS = int(os.environ.get("VALIDATION_MAX_ERRORS", "100"))
+VALIDATION_MAX_WARNINGS = int(os.environ.get("VALIDATION_MAX_WARNINGS", "100"))
+
+# str.format templates shared with app.js through the rules document, so both sides word issues the same way.
+MESSAGES = {
+    "missing_headers": "Missing required headers: {headers}",
+    "no_rows": "CSV has no data rows.",
+    "field_required": "Row {row}: {field} is required.",
+    "pack_number_empty": "Row {row}: Pack Number is empty.",
+    "date_unrecognized": "Row {row}: Date '{value}' is not in a recognized format.",
+    "mapping_target_unsupported": "Unsupported mapping target: {target}",
+    "mapping_source_missing": "CSV mapping source header not found: {source} (for {target})",
+}
+
+# Anything with a non-space character; cheaper than strip() on every cell of every row.
+_PRESENT_RE = re.compile(r"\S")
+
+
+class RowValidator:
+    # Header lists, column lookups and messages are resolved once per workflow instead of once per row.
+    def __init__(self, workflow: str) -> None:
+        self.workflow = workflow
+        self.ranks = workflow == "ranks"
+        self.required_headers = RANK_REQUIRED_HEADERS if self.ranks else ADVENTURE_REQUIRED_HEADERS
+        self.award_label = "Rank" if self.ranks else "Award Name"
+        # Ranks read the Rank column first and fall back to the selected rank, then to Award Name.
+        self.award_columns = ("Rank", "Award Name") if self.ranks else ("Award Name",)
+        # Only ranks may leave Rank out of the header, and only when a rank is picked in the form.
+        self.optional_with_rank = ("Rank",) if self.ranks else ()
+
+    def rules(self) -> dict[str, object]:
+        return {
+            "required_headers": self.required_headers,
+            "optional_with_rank": list(self.optional_with_rank),
+            "award_label": self.award_label,
+            "award_columns": list(self.award_columns),
+            # Unknown rank names resolve to Wolf, so a rank row never lacks an award.
+            "award_required": not (self.ranks and bool(canonical_rank(""))),
+        }
+
+    def report(
+        self,
+        fieldnames: list[str],
+        rows: list[dict[str, str]],
+        selected_rank: str,
+        max_errors: int = VALIDATION_MAX_ERRORS,
+        max_warnings: int = VALIDATION_MAX_WARNINGS,
+    ) -> dict[str, object]:
+        errors: list[str] = []
+        warnings: list[str] = []
+        counts: dict[str, int] = {}
+        missing = [h for h in self.required_headers if h not in fieldnames]
+        if selected_rank:
+            missing = [h for h in missing if h not in self.optional_with_rank]
+        if missing:
+            errors.append(MESSAGES["missing_headers"].format(headers=", ".join(missing)))
+            counts["missing_headers"] = len(missing)
+        if not rows:
+            errors.append(MESSAGES["no_rows"])
+
+        present = _PRESENT_RE.search
+        award_columns = self.award_columns
+        has_award_fallback = self.ranks and bool(canonical_rank(selected_rank))
+        field_required = MESSAGES["field_required"].format
+        error_count = len(errors)
+        warning_count = 0
+        rows_checked = 0
+        for idx, row in enumerate(rows, start=2):
+            rows_checked += 1
+            if not present(row.get("Scout Name") or ""):
+                error_count += 1
+                counts["scout_name_missing"] = counts.get("scout_name_missing", 0) + 1
+                if len(errors) < max_errors:
+                    errors.append(field_required(row=idx, field="Scout Name"))
+            if not has_award_fallback and not any(present(row.get(column) or "") for column in award_columns):
+                error_count += 1
+                counts["award_missing"] = counts.get("award_missing", 0) + 1
+                if len(errors) < max_errors:
+                    errors.append(field_required(row=idx, field=self.award_label))
+            if not present(row.get("Pack Number") or ""):
+                warning_count += 1
+                counts["pack_number_empty"] = counts.get("pack_number_empty", 0) + 1
+                if len(warnings) < max_warnings:
+                    warnings.append(MESSAGES["pack_number_empty"].format(row=idx))
+            date_value = row.get("Date") or ""
+            if present(date_value):
+                date_value = date_value.strip()
+                if normalize_date(date_value) is None:
+                    warning_count += 1
+                    counts["date_unrecognized"] = counts.get("date_unrecognized", 0) + 1
+                    if len(warnings) < max_warnings:
+                        warnings.append(MESSAGES["date_unrecognized"].format(row=idx, value=date_value))
+            if error_count >= max(max_errors, 1):
+                break
+
+        truncated = rows_checked < len(rows) or error_count > len(errors) or warning_count > len(warnings)
+        return {
+            "header_count": len(fieldnames),
+            "row_count": len(rows),
+            "rows_checked": rows_checked,
+            "errors": errors,
+            "warnings": warnings,
+            "error_count": error_count,
+            "warning_count": warning_count,
+            "issue_counts": counts,
+            "truncated": truncated,
+            "ok": error_count == 0,
+        }
+
+
+_validators: dict[str, RowValidator] = {}
+_validators_lock = threading.Lock()
+
+
+def validator_for(workflow: str) -> RowValidator:
+    with _validators_lock:
+        validator = _validators.get(workflow)
+        if validator is None:
+            validator = _validators[workflow] = RowValidator(workflow)
+        return validator
+
+
+def rules_document(mapping_targets: list[str]) -> dict[str, object]:
+    # Everything app.js needs to run the same checks before uploading; the server still validates every upload.
+    document: dict[str, object] = {
+        "max_errors": VALIDATION_MAX_ERRORS,
+        "max_warnings": VALIDATION_MAX_WARNINGS,
+        "mapping_targets": mapping_targets,
+        "workflows": {workflow: validator_for(workflow).rules() for workflow in ("adventures", "ranks")},
+        "dates": date_rules(),
+        "messages": MESSAGES,
+    }
+    document["version"] = hashlib.sha256(json.dumps(document, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return document
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+COMPRESSION_POLICIES = ("auto", "deflate", "store")
+# auto: deflate an entry only when a quick probe says it saves at least ZIP_DEFLATE_MIN_SAVING of its size.
+# Rendered PDFs already have compressed streams and save about 5%, so they are normally stored.
+ZIP_COMPRESSION = os.environ.get("ZIP_COMPRESSION", "auto").strip().lower()
+ZIP_DEFLATE_MIN_SAVING = float(os.environ.get("ZIP_DEFLATE_MIN_SAVING", "0.10"))
+# zlib releases the GIL while it works, so entries are checksummed and deflated in parallel; 0 does it inline.
+ZIP_COMPRESS_THREADS = int(os.environ.get("ZIP_COMPRESS_THREADS", str(min(4, os.cpu_count() or 1))))
+ZIP_DEFLATE_LEVEL = 6
+if ZIP_COMPRESSION not in COMPRESSION_POLICIES:
+    raise ValueError(f"ZIP_COMPRESSION must be one of {', '.join(COMPRESSION_POLICIES)}; got {ZIP_COMPRESSION!r}.")
+# Entries carry this timestamp instead of the render time, so identical input gives an identical archive.
+ZIP_ENTRY_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+PROBE_SLICES = 4
+PROBE_SLICE_BYTES = 16 * 1024
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_VERSION = 20
+# Made by Unix (3), like zipfile on Linux, so the rw-owner mode in the external attributes is honored.
+_MADE_BY = (3 << 8) | _VERSION
+_EXTERNAL_ATTR = 0o600 << 16
+_UTF8_FLAG = 0x800
+_ZIP32_LIMIT = 0xFFFFFFFF
+_DOS_TIME = (ZIP_ENTRY_DATE_TIME[3] << 11) | (ZIP_ENTRY_DATE_TIME[4] << 5) | (ZIP_ENTRY_DATE_TIME[5] // 2)
+_DOS_DATE = ((ZIP_ENTRY_DATE_TIME[0] - 1980) << 9) | (ZIP_ENTRY_DATE_TIME[1] << 5) | ZIP_ENTRY_DATE_TIME[2]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _compress_executor() -> Optional[ThreadPoolExecutor]:
+    global _executor
+    if ZIP_COMPRESS_THREADS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ZIP_COMPRESS_THREADS, thread_name_prefix="zip-compress")
+        return _executor
+
+
+class _Entry(NamedTuple):
+    name: bytes
+    flags: int
+    crc: int
+    size: int
+    method: int
+    payload: bytes
+
+
+def probe_saving(data: bytes) -> float:
+    # Fraction a fast deflate saves on a few slices spread through the data; about 2 ms for any size.
+    view = memoryview(data)
+    if len(view) <= PROBE_SLICES * PROBE_SLICE_BYTES:
+        slices = [view]
+    else:
+        step = (len(view) - PROBE_SLICE_BYTES) // (PROBE_SLICES - 1)
+        slices = [view[i * step : i * step + PROBE_SLICE_BYTES] for i in range(PROBE_SLICES)]
+    compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+    compressed = sum(len(compressor.compress(part)) for part in slices) + len(compressor.flush())
+    sampled = sum(len(part) for part in slices)
+    return 1.0 - compressed / sampled if sampled else 0.0
+
+
+def _prepare(name: str, data: bytes, policy: str, min_saving: float) -> _Entry:
+    encoded = name.encode("utf-8")
+    flags = 0 if encoded.isascii() else _UTF8_FLAG
+    method, payload = zipfile.ZIP_STORED, data
+    if data and (policy == "deflate" or (policy == "auto" and probe_saving(data) >= min_saving)):
+        compressor = zlib.compressobj(ZIP_DEFLATE_LEVEL, zlib.DEFLATED, -15)
+        deflated = compressor.compress(data) + compressor.flush()
+        if len(deflated) < len(data):
+            method, payload = zipfile.ZIP_DEFLATED, deflated
+    return _Entry(encoded, flags, zlib.crc32(data), len(data), method, payload)
+
+
+class ZipAssembler:
+    # Builds a ZIP from entries added in order. Each entry is checksummed, probed and (when worth it) deflated on a
+    # thread pool while the caller renders the next one, and entries are written in the order they were added.
+    # Sizes and CRCs are known before an entry is written, so local headers carry them and the output is written
+    # strictly forward: `write` can be a socket, a queue of chunks or BytesIO.write.
+    def __init__(
+        self,
+        write: Callable[[bytes], object],
+        policy: str = ZIP_COMPRESSION,
+        min_saving: float = ZIP_DEFLATE_MIN_SAVING,
+        max_pending: int = max(1, ZIP_COMPRESS_THREADS) * 2,
+        parallel: bool = ZIP_COMPRESS_THREADS > 0,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        if policy not in COMPRESSION_POLICIES:
+            raise ValueError(f"Unknown ZIP compression policy {policy!r}; expected one of {COMPRESSION_POLICIES}.")
+        self._write = write
+        self.policy = policy
+        self.min_saving = min_saving
+        # Bounds the finished-but-unwritten entries held in memory.
+        self.max_pending = max(1, max_pending)
+        self._executor = (executor or _compress_executor()) if parallel else None
+        self._pending: deque[Future] = deque()
+        self._central: list[bytes] = []
+        self._offset = 0
+        self.stats = {"entries": 0, "stored": 0, "deflated": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def __enter__(self) -> "ZipAssembler":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+    def add(self, name: str, data: bytes) -> None:
+        if self._executor is None:
+            self._emit(_prepare(name, data, self.policy, self.min_saving))
+            return
+        self._pending.append(self._executor.submit(_prepare, name, data, self.policy, self.min_saving))
+        # Write whatever is ready at the front without waiting; block only when too many entries are in flight.
+        while self._pending and (self._pending[0].done() or len(self._pending) > self.max_pending):
+            self._emit(self._pending.popleft().result())
+
+    def close(self) -> None:
+        while self._pending:
+            self._emit(self._pending.popleft().result())
+        directory = b"".join(self._central)
+        if len(self._central) > 0xFFFF or self._offset + len(directory) > _ZIP32_LIMIT:
+            raise zipfile.LargeZipFile("Archive needs ZIP64, which this writer does not produce.")
+        count = len(self._central)
+        self._put(directory)
+        self._put(_END_RECORD.pack(0x06054B50, 0, 0, count, count, len(directory), self._offset - len(directory), 0))
+
+    def _emit(self, entry: _Entry) -> None:
+        if entry.size > _ZIP32_LIMIT or self._offset > _ZIP32_LIMIT:
+            raise zipfile.LargeZipFile("Archive needs ZIP64, which this writer does not produce.")
+        header_offset = self._offset
+        common = (entry.flags, entry.method, _DOS_TIME, _DOS_DATE, entry.crc, len(entry.payload), entry.size)
+        self._put(_LOCAL_HEADER.pack(0x04034B50, _VERSION, *common, len(entry.name), 0) + entry.name)
+        self._put(entry.payload)
+        self._central.append(
+            _CENTRAL_HEADER.pack(
+                0x02014B50, _MADE_BY, _VERSION, *common, len(entry.name), 0, 0, 0, 0, _EXTERNAL_ATTR, header_offset
+            )
+            + entry.name
+        )
+        self.stats["entries"] += 1
+        self.stats["deflated" if entry.method == zipfile.ZIP_DEFLATED else "stored"] += 1
+        self.stats["bytes_in"] += entry.size
+        self.stats["bytes_out"] += len(entry.payload)
+
+    def _put(self, data: bytes) -> None:
+        self._write(data)
+        self._offset += len(data)
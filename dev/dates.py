@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import os
+import re
+from datetime import date
+from functools import lru_cache
+
+# Accepted input formats, in the order they are tried; every output uses mm/dd/yyyy.
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+# Rosters repeat a handful of dates (one ceremony, a few meetings), so a small memo covers almost every row.
+DATE_MEMO_SIZE = int(os.environ.get("DATE_MEMO_SIZE", "4096"))
+# Same pivot as strptime's %y: 69-99 are 1969-1999, 00-68 are 2000-2068.
+TWO_DIGIT_YEAR_PIVOT = 69
+
+# One anchored pattern per format, matching what time.strptime accepts for it, so a value is only
+# converted with the layout it can possibly have instead of trying every format in turn.
+# (strptime's %d also takes a space-padded day.)
+_ISO_RE = re.compile(r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2}| [1-9])")
+_US_RE = re.compile(r"([0-9]{1,2})/([0-9]{1,2}| [1-9])/([0-9]{4}|[0-9]{2})")
+
+
+@lru_cache(maxsize=DATE_MEMO_SIZE)
+def normalize_date(value: str) -> str | None:
+    # Returns mm/dd/yyyy, or None when the (already stripped) value is not a recognized date.
+    match = _ISO_RE.fullmatch(value)
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+    else:
+        match = _US_RE.fullmatch(value)
+        if not match:
+            return None
+        month, day = int(match.group(1)), int(match.group(2))
+        year = int(match.group(3))
+        if len(match.group(3)) == 2:
+            year += 1900 if year >= TWO_DIGIT_YEAR_PIVOT else 2000
+    try:
+        date(year, month, day)
+    except ValueError:
+        return None
+    return f"{month:02d}/{day:02d}/{year}"
+
+
+def date_rules() -> dict[str, object]:
+    # normalize_date in a form the browser can run: both patterns are valid JavaScript regexes too.
+    return {
+        "patterns": [
+            {"regex": _ISO_RE.pattern, "order": ["year", "month", "day"]},
+            {"regex": _US_RE.pattern, "order": ["month", "day", "year"]},
+        ],
+        "two_digit_year_pivot": TWO_DIGIT_YEAR_PIVOT,
+    }
+
+
+def format_date(value: str) -> str:
+    value = (value or "").strip()
+    if not value:
+        return ""
+    # Unrecognized dates are printed as entered; validation already warned about them.
+    return normalize_date(value) or value
+
+
+def is_valid_date(value: str) -> bool:
+    value = (value or "").strip()
+    return not value or normalize_date(value) is not None
@@ -13,20 +13,61 @@ from __future__ import annotations
 import argparse
 import csv
 import io
-import math
-from datetime import datetime
+import os
+import sys
+import time
 from pathlib import Path
-
-from pypdf import PdfReader, PdfWriter, Transformation
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from typing import Callable, Iterable, Iterator
+
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    ContentStream,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+)
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 
+try:
+    from dev.dates import format_date
+    from dev.overlay_forms import RepeatedText
+    from dev.page_range import ROWS_PER_PAGE, selection_slice
+    from dev.pdf_assets import cached_template_value, open_buffer, register_font, template_buffer
+    from dev.pdf_output import (
+        DEFAULT_OPTIMIZE_LEVEL,
+        OPTIMIZE_LEVELS,
+        add_indirect_object,
+        linearize_available,
+        write_pdf,
+    )
+    from dev.render_control import CancellationToken, ProgressCallback, page_progress
+except ModuleNotFoundError:
+    # Fallback for direct script execution from source checkout.
+    from dates import format_date  # type: ignore
+    from overlay_forms import RepeatedText  # type: ignore
+    from page_range import ROWS_PER_PAGE, selection_slice  # type: ignore
+    from pdf_assets import cached_template_value, open_buffer, register_font, template_buffer  # type: ignore
+    from pdf_output import (  # type: ignore
+        DEFAULT_OPTIMIZE_LEVEL,
+        OPTIMIZE_LEVELS,
+        add_indirect_object,
+        linearize_available,
+        write_pdf,
+    )
+    from render_control import CancellationToken, ProgressCallback, page_progress  # type: ignore
+
 
 DEFAULT_TEMPLATE = str(
     Path(__file__).resolve().parents[1] / "assets" / "templates" / "cub_scout_award_certificate.pdf"
 )
-FIELDS_PER_PAGE = 8
+FIELDS_PER_PAGE = ROWS_PER_PAGE
+LAYOUT_KIND = "field_positions"
+# First-slot field of each layout _build_page_field_map knows how to fill.
+_LAYOUT_MARKERS = ("name 1", "Childs name 1")
 
 
 def _field_name(base: str, index: int) -> str:
@@ -43,7 +84,7 @@ def _build_page_field_map(
 
     for i, row in enumerate(rows, start=1):
         scout_name = row.get("Scout Name", "").strip()
-        date_value = _format_date(row.get("Date", ""))
+        date_value = format_date(row.get("Date", ""))
         pack_number = row.get("Pack Number", "").strip()
         den_number = (row.get("Den Number") or row.get("Den No.") or "").strip()
         award_name = (row.get("Award Name") or row.get("Rank") or "").strip()
@@ -70,23 +111,14 @@ def _build_page_field_map(
     return field_map
 
 
-def _format_date(value: str) -> str:
-    value = (value or "").strip()
-    if not value:
-        return ""
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
-        try:
-            dt = datetime.strptime(value, fmt)
-            return dt.strftime("%m/%d/%Y")
-        except ValueError:
-            continue
-    return value
-
-
 def _chunk_rows(rows: list[dict[str, str]], size: int) -> list[list[dict[str, str]]]:
     return [rows[i : i + size] for i in range(0, len(rows), size)]
 
 
+def _page_count(row_count: int) -> int:
+    return -(-row_count // FIELDS_PER_PAGE)
+
+
 def _read_rows(csv_path: Path) -> list[dict[str, str]]:
     with csv_path.open(newline="") as f:
         reader = csv.DictReader(f)
@@ -140,6 +172,29 @@ def _extract_field_positions(template_reader: PdfReader) -> dict[str, dict[str,
     return fields
 
 
+def _template_field_positions(template_path: Path) -> dict[str, dict[str, object]]:
+    return cached_template_value(
+        template_path,
+        LAYOUT_KIND,
+        lambda data: _extract_field_positions(PdfReader(open_buffer(data))),
+    )
+
+
+def layout_index(template_data: memoryview) -> dict[str, dict[str, object]]:
+    # JSON-ready field positions for a template indexed once at upload time (see template_store).
+    fields = _extract_field_positions(PdfReader(open_buffer(template_data)))
+    if not any(marker in fields for marker in _LAYOUT_MARKERS):
+        raise ValueError("Template form fields do not match the certificate or rank card layout.")
+    return {
+        name: {"rect": [float(v) for v in info["rect"]], "rotation": info["rotation"]}
+        for name, info in fields.items()
+    }
+
+
+def warm_template(template_path: Path) -> None:
+    _template_field_positions(template_path)
+
+
 def _fit_font_size(
     text: str,
     max_width: float,
@@ -149,38 +204,49 @@ def _fit_font_size(
     max_size: float = 12.0,
 ) -> float:
     size = min(max_size, base_size)
-    while size > min_size and canvas.Canvas(io.BytesIO()).stringWidth(
-        text, font_name, size
-    ) > max_width:
+    while size > min_size and stringWidth(text, font_name, size) > max_width:
         size -= 0.5
     return max(size, min_size)
 
 
+def _overlay_texts(
+    field_positions: dict[str, dict[str, object]],
+    field_values: dict[str, str],
+    font_name: str,
+    script_font_name: str | None,
+    base_font_size: float,
+    script_font_size: float | None,
+    shift_x: float,
+) -> Iterator[tuple[float, float, tuple[str, str, float, float, int, str]]]:
+    # The centre of each filled field's box and the _draw_text arguments that draw its value around it.
+    for field_name, value in field_values.items():
+        info = field_positions.get(field_name)
+        if not info or not value:
+            continue
+        use_font = font_name
+        use_size = base_font_size
+        if script_font_name and field_name.startswith(("Den Leader", "Cubmaster")):
+            use_font = script_font_name
+            use_size = script_font_size if script_font_size is not None else base_font_size
+        x1, y1, x2, y2 = [float(v) for v in info["rect"]]
+        x1 += shift_x
+        x2 += shift_x
+        rotation = int(info["rotation"])
+        draw_width = x2 - x1 if rotation in (0, 180) else y2 - y1
+        yield (x1 + x2) / 2.0, (y1 + y2) / 2.0, (value, use_font, use_size, draw_width, rotation, "center")
+
+
 def _draw_text(
     c: canvas.Canvas,
-    rect: list,
-    rotation: int,
     text: str,
     font_name: str,
     base_size: float,
+    draw_width: float,
+    rotation: int,
     align: str,
-    shift_x: float,
 ) -> None:
-    if not text:
-        return
-    x1, y1, x2, y2 = [float(v) for v in rect]
-    x1 += shift_x
-    x2 += shift_x
-    width = x2 - x1
-    height = y2 - y1
-    cx = (x1 + x2) / 2.0
-    cy = (y1 + y2) / 2.0
-    draw_width = width if rotation in (0, 180) else height
+    # Draws around the origin; callers translate to the centre of the field's box.
     font_size = _fit_font_size(text, max(draw_width - 2, 1), font_name, base_size)
-    text_width = c.stringWidth(text, font_name, font_size)
-
-    c.saveState()
-    c.translate(cx, cy)
     if rotation:
         c.rotate(rotation)
     c.setFont(font_name, font_size)
@@ -190,7 +256,6 @@ def _draw_text(
     else:
         x = -draw_width / 2.0 + 1.5
         c.drawString(x, y, text)
-    c.restoreState()
 
 
 def _render_overlay(
@@ -202,29 +267,20 @@ def _render_overlay(
     base_font_size: float,
     script_font_size: float | None,
     shift_x: float,
+    repeated: RepeatedText | None = None,
 ) -> bytes:
+    # Texts `repeated` has a form for are left out here and placed on the page afterwards.
     buffer = io.BytesIO()
     c = canvas.Canvas(buffer, pagesize=page_size)
-    for field_name, value in field_values.items():
-        info = field_positions.get(field_name)
-        if not info:
+    for x, y, args in _overlay_texts(
+        field_positions, field_values, font_name, script_font_name, base_font_size, script_font_size, shift_x
+    ):
+        if repeated is not None and repeated.defer(x, y, _draw_text, args):
             continue
-        use_font = font_name
-        use_size = base_font_size
-        if script_font_name and field_name.startswith(("Den Leader", "Cubmaster")):
-            use_font = script_font_name
-            use_size = script_font_size if script_font_size is not None else base_font_size
-        align = "center"
-        _draw_text(
-            c,
-            info["rect"],
-            int(info["rotation"]),
-            value,
-            use_font,
-            use_size,
-            align,
-            shift_x,
-        )
+        c.saveState()
+        c.translate(x, y)
+        _draw_text(c, *args)
+        c.restoreState()
     c.showPage()
     c.save()
     return buffer.getvalue()
@@ -243,6 +299,92 @@ def _map_display_shift_to_page(rotate: int, dx_display: float, dy_display: float
     return dx_display, dy_display
 
 
+def _translate_contents(page: PageObject, tx: float, ty: float) -> None:
+    # Same result as page.add_transformation(Transformation().translate(tx, ty)), but wraps the raw
+    # content bytes instead of parsing every operator of the (large) template content stream first.
+    content = page.get_contents()
+    if content is None:
+        return
+    shifted = ContentStream(None, page.pdf)
+    shifted.set_data(b"q\n" + f"1 0 0 1 {tx:.4f} {ty:.4f} cm\n".encode("ascii") + content.get_data() + b"\nQ\n")
+    page.replace_contents(shifted)
+
+
+def _register_fonts(
+    font_name: str,
+    script_font_name: str | None,
+    font_file: str | None,
+    script_font_file: str | None,
+) -> None:
+    if font_file and Path(font_file).exists():
+        register_font(font_name, font_file)
+    if script_font_name and script_font_file and Path(script_font_file).exists():
+        register_font(script_font_name, script_font_file)
+
+
+def _add_certificate_pages(
+    writer: PdfWriter,
+    rows: list[dict[str, str]],
+    template_data: memoryview,
+    field_positions: dict[str, dict[str, object]],
+    dx_display: float,
+    dy_display: float,
+    font_name: str,
+    script_font_name: str | None,
+    font_size: float,
+    script_font_size: float | None,
+    output_rotation_degrees: int | None,
+    final_rotation_degrees: int | None = None,
+    cancel_token: CancellationToken | None = None,
+    on_page: Callable[[], None] | None = None,
+) -> None:
+    field_maps = [_build_page_field_map(page_rows, field_positions) for page_rows in _chunk_rows(rows, FIELDS_PER_PAGE)]
+    repeated = RepeatedText()
+    for field_map in field_maps:
+        for _, _, args in _overlay_texts(
+            field_positions, field_map, font_name, script_font_name, font_size, script_font_size, 0.0
+        ):
+            repeated.count(_draw_text, args)
+    for index, field_map in enumerate(field_maps):
+        if cancel_token is not None:
+            cancel_token.check()
+        # A fresh reader per page keeps each merged page independent of the others.
+        page = PdfReader(open_buffer(template_data)).pages[0]
+
+        page_size = (
+            float(page.mediabox.width),
+            float(page.mediabox.height),
+        )
+        if index == 0:
+            repeated.build(writer, page_size)
+        overlay_pdf = _render_overlay(
+            page_size,
+            field_positions,
+            field_map,
+            font_name,
+            script_font_name,
+            font_size,
+            script_font_size,
+            0.0,
+            repeated,
+        )
+        overlay_page = PdfReader(io.BytesIO(overlay_pdf)).pages[0]
+        page.merge_page(overlay_page)
+        repeated.place(page)
+
+        rotate = output_rotation_degrees if output_rotation_degrees is not None else (page.get("/Rotate") or 0)
+        tx, ty = _map_display_shift_to_page(rotate, dx_display, dy_display)
+        if tx or ty:
+            _translate_contents(page, tx, ty)
+        if final_rotation_degrees is not None:
+            delta = (final_rotation_degrees - int(page.get("/Rotate") or 0)) % 360
+            if delta:
+                page.rotate(delta)
+        writer.add_page(page)
+        if on_page is not None:
+            on_page()
+
+
 def fill_certificates(
     csv_path: Path,
     output_path: Path,
@@ -256,6 +398,11 @@ def fill_certificates(
     font_file: str | None = None,
     script_font_file: str | None = None,
     output_rotation_degrees: int | None = None,
+    cancel_token: CancellationToken | None = None,
+    progress: ProgressCallback | None = None,
+    row_slice: slice | None = None,
+    optimize: str = DEFAULT_OPTIMIZE_LEVEL,
+    linearize: bool = False,
 ) -> None:
     if not template_path.exists():
         raise FileNotFoundError(f"Template PDF not found: {template_path}")
@@ -263,56 +410,244 @@ def fill_certificates(
     rows = _read_rows(csv_path)
     if not rows:
         raise ValueError("CSV has no data rows.")
+    if row_slice is not None:
+        rows = rows[row_slice]
+        if not rows:
+            raise ValueError("No CSV rows fall inside the selected page/row range.")
 
-    if font_file and Path(font_file).exists():
-        pdfmetrics.registerFont(TTFont(font_name, font_file))
-    if script_font_name and script_font_file and Path(script_font_file).exists():
-        pdfmetrics.registerFont(TTFont(script_font_name, script_font_file))
+    _register_fonts(font_name, script_font_name, font_file, script_font_file)
 
-    template_reader = PdfReader(str(template_path))
-    field_positions = _extract_field_positions(template_reader)
+    template_data = template_buffer(template_path)
+    field_positions = _template_field_positions(template_path)
     writer = PdfWriter()
+    _add_certificate_pages(
+        writer,
+        rows,
+        template_data,
+        field_positions,
+        -72.0 * shift_left_inch,
+        -72.0 * shift_down_inch,
+        font_name,
+        script_font_name,
+        font_size,
+        script_font_size,
+        output_rotation_degrees,
+        cancel_token=cancel_token,
+        on_page=page_progress(progress, _page_count(len(rows))),
+    )
 
-    dx_display = -72.0 * shift_left_inch
-    dy_display = -72.0 * shift_down_inch
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(write_pdf(writer, optimize, linearize))
 
-    page_count = int(math.ceil(len(rows) / FIELDS_PER_PAGE))
-    row_chunks = _chunk_rows(rows, FIELDS_PER_PAGE)
 
-    for page_index in range(page_count):
-        page_reader = PdfReader(str(template_path))
-        page = page_reader.pages[0]
+def fill_certificate_groups(
+    groups: Iterable[tuple[str, list[dict[str, str]]]],
+    template_path: Path,
+    shift_left_inch: float,
+    shift_down_inch: float,
+    font_name: str,
+    script_font_name: str | None,
+    font_size: float,
+    script_font_size: float | None = None,
+    font_file: str | None = None,
+    script_font_file: str | None = None,
+    output_rotation_degrees: int | None = None,
+    final_rotation_degrees: int | None = None,
+    cancel_token: CancellationToken | None = None,
+    progress: ProgressCallback | None = None,
+    optimize: str = DEFAULT_OPTIMIZE_LEVEL,
+    linearize: bool = False,
+) -> Iterator[tuple[str, bytes]]:
+    if not template_path.exists():
+        raise FileNotFoundError(f"Template PDF not found: {template_path}")
+
+    _register_fonts(font_name, script_font_name, font_file, script_font_file)
 
-        page_rows = row_chunks[page_index]
-        field_map = _build_page_field_map(page_rows, field_positions)
+    template_data = template_buffer(template_path)
+    field_positions = _template_field_positions(template_path)
+    dx_display = -72.0 * shift_left_inch
+    dy_display = -72.0 * shift_down_inch
 
-        page_size = (
-            float(page.mediabox.width),
-            float(page.mediabox.height),
-        )
-        overlay_pdf = _render_overlay(
-            page_size,
+    groups = list(groups)
+    on_page = page_progress(progress, sum(_page_count(len(rows)) for _, rows in groups))
+
+    # Yield each group as soon as it is written so callers can stream results into a ZIP.
+    for key, rows in groups:
+        if not rows:
+            continue
+        writer = PdfWriter()
+        _add_certificate_pages(
+            writer,
+            rows,
+            template_data,
             field_positions,
-            field_map,
+            dx_display,
+            dy_display,
             font_name,
             script_font_name,
             font_size,
             script_font_size,
-            0.0,
+            output_rotation_degrees,
+            final_rotation_degrees,
+            cancel_token=cancel_token,
+            on_page=on_page,
         )
-        overlay_page = PdfReader(io.BytesIO(overlay_pdf)).pages[0]
-        page.merge_page(overlay_page)
-
-        rotate = output_rotation_degrees if output_rotation_degrees is not None else (page.get("/Rotate") or 0)
-        tx, ty = _map_display_shift_to_page(rotate, dx_display, dy_display)
-        if tx or ty:
-            page.add_transformation(Transformation().translate(tx=tx, ty=ty))
-        writer.add_page(page)
-
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("wb") as f:
-        writer.write(f)
+        yield key, write_pdf(writer, optimize, linearize)
+
+
+def _form_xobject(
+    writer: PdfWriter, data: bytes, bbox: ArrayObject, resources: DictionaryObject
+) -> IndirectObject:
+    form = DecodedStreamObject()
+    form.set_data(data)
+    form.update(
+        {
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): bbox,
+            NameObject("/Resources"): resources,
+        }
+    )
+    return add_indirect_object(writer, form.flate_encode())
+
+
+class IncrementalCertificateRenderer:
+    # Re-renders a roster while it is being edited (--watch). The template is written once as a shared
+    # Form XObject and each page only draws its own text overlay on top, so an unchanged page costs
+    # nothing but a cache lookup and the output does not carry a copy of the template per page.
+    _PAGE_BOX_KEYS = ("/MediaBox", "/CropBox", "/BleedBox", "/TrimBox", "/ArtBox", "/Rotate", "/Group")
+
+    def __init__(
+        self,
+        template_path: Path,
+        shift_left_inch: float,
+        shift_down_inch: float,
+        font_name: str,
+        script_font_name: str | None,
+        font_size: float,
+        script_font_size: float | None = None,
+        font_file: str | None = None,
+        script_font_file: str | None = None,
+        output_rotation_degrees: int | None = None,
+    ) -> None:
+        if not template_path.exists():
+            raise FileNotFoundError(f"Template PDF not found: {template_path}")
+        _register_fonts(font_name, script_font_name, font_file, script_font_file)
+        self._template_page = PdfReader(open_buffer(template_buffer(template_path))).pages[0]
+        self._template_content = self._template_page.get_contents().get_data()
+        self._template_annots = [annot.get_object() for annot in self._template_page.get("/Annots") or []]
+        self._field_positions = _template_field_positions(template_path)
+        self._page_size = (float(self._template_page.mediabox.width), float(self._template_page.mediabox.height))
+        rotate = (
+            output_rotation_degrees
+            if output_rotation_degrees is not None
+            else int(self._template_page.get("/Rotate") or 0)
+        )
+        tx, ty = _map_display_shift_to_page(rotate, -72.0 * shift_left_inch, -72.0 * shift_down_inch)
+        self._page_content = f"q 1 0 0 1 {tx:.4f} {ty:.4f} cm /Template Do /Fill Do Q".encode("ascii")
+        self._overlay_args = (font_name, script_font_name, font_size, script_font_size, 0.0)
+        self._overlays: dict[tuple[tuple[str, str], ...], PageObject] = {}
+
+    def render(
+        self, rows: list[dict[str, str]], optimize: str = DEFAULT_OPTIMIZE_LEVEL, linearize: bool = False
+    ) -> tuple[bytes, int]:
+        # Returns the PDF and how many pages had to be redrawn. Pages are keyed by their field values,
+        # so editing one row redraws one page; inserting or deleting a row shifts every page after it.
+        writer = PdfWriter()
+        bbox = ArrayObject(FloatObject(value) for value in self._template_page.mediabox)
+        template = _form_xobject(
+            writer, self._template_content, bbox, self._template_page["/Resources"].clone(writer)
+        )
+        overlays: dict[tuple[tuple[str, str], ...], PageObject] = {}
+        redrawn = 0
+        for page_rows in _chunk_rows(rows, FIELDS_PER_PAGE):
+            field_map = _build_page_field_map(page_rows, self._field_positions)
+            key = tuple(field_map.items())
+            # Cached overlays keep their reader, so the fonts in them are not parsed again.
+            overlay_page = overlays.get(key) or self._overlays.get(key)
+            if overlay_page is None:
+                overlay_pdf = _render_overlay(self._page_size, self._field_positions, field_map, *self._overlay_args)
+                overlay_page = PdfReader(io.BytesIO(overlay_pdf)).pages[0]
+                redrawn += 1
+            overlays[key] = overlay_page
+            fill = _form_xobject(
+                writer, overlay_page.get_contents().get_data(), bbox, overlay_page["/Resources"].clone(writer)
+            )
+
+            page = writer.add_blank_page(*self._page_size)
+            for name in self._PAGE_BOX_KEYS:
+                if name in self._template_page:
+                    page[NameObject(name)] = self._template_page[name].clone(writer)
+            page[NameObject("/Resources")] = DictionaryObject(
+                {
+                    NameObject("/XObject"): DictionaryObject(
+                        {NameObject("/Template"): template, NameObject("/Fill"): fill}
+                    )
+                }
+            )
+            content = DecodedStreamObject()
+            content.set_data(self._page_content)
+            page[NameObject("/Contents")] = add_indirect_object(writer, content)
+            if self._template_annots:
+                # Links, widgets and other annotations are not part of the Form XObject; like a regular render,
+                # every page gets its own copy, left where the template has it.
+                page[NameObject("/Annots")] = ArrayObject(
+                    self._page_annotation(writer, page, annot) for annot in self._template_annots
+                )
+        # Only keep overlays the current roster still uses.
+        self._overlays = overlays
+        return write_pdf(writer, optimize, linearize), redrawn
+
+    @staticmethod
+    def _page_annotation(writer: PdfWriter, page: PageObject, annot: DictionaryObject) -> IndirectObject:
+        copy = annot.clone(writer, force_duplicate=True, ignore_fields=("/P",))
+        copy[NameObject("/P")] = page.indirect_reference
+        return copy.indirect_reference or add_indirect_object(writer, copy)
+
+
+def watch_certificates(
+    csv_path: Path,
+    output_path: Path,
+    renderer: IncrementalCertificateRenderer,
+    row_slice: slice | None = None,
+    optimize: str = DEFAULT_OPTIMIZE_LEVEL,
+    linearize: bool = False,
+    poll_interval: float = 0.5,
+) -> None:
+    # Polls the CSV's mtime and size instead of using inotify so it works the same on every OS.
+    last_seen: tuple[int, int] | None = None
+    print(f"Watching {csv_path} (Ctrl+C to stop)")
+    while True:
+        try:
+            stat = csv_path.stat()
+            seen: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            # Editors that save by rename briefly remove the file.
+            seen = None
+        if seen is not None and seen != last_seen:
+            last_seen = seen
+            started = time.perf_counter()
+            try:
+                rows = _read_rows(csv_path)
+                if row_slice is not None:
+                    rows = rows[row_slice]
+                if not rows:
+                    raise ValueError("CSV has no data rows in the selected range.")
+                pdf_bytes, redrawn = renderer.render(rows, optimize, linearize)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+                tmp_path.write_bytes(pdf_bytes)
+                # Replace atomically so an open viewer never reloads a half-written file.
+                os.replace(tmp_path, output_path)
+            except (OSError, ValueError, UnicodeDecodeError, csv.Error) as exc:
+                # Most often a half-saved CSV; the next save triggers another attempt.
+                print(f"[{time.strftime('%H:%M:%S')}] Not rendered: {exc}", file=sys.stderr)
+            else:
+                print(
+                    f"[{time.strftime('%H:%M:%S')}] Redrew {redrawn} of {_page_count(len(rows))} pages "
+                    f"in {time.perf_counter() - started:.2f}s -> {output_path}"
+                )
+        time.sleep(poll_interval)
 
 
 def main() -> None:
@@ -368,13 +703,79 @@ def main() -> None:
         default=None,
         help="Optional font size override for Den Leader/Cubmaster fields.",
     )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Render only the first page (8 rows) to check alignment and font sizes.",
+    )
+    parser.add_argument("--pages", default=None, help="Only render these output pages, e.g. 2 or 2-3.")
+    parser.add_argument("--rows", default=None, help="Only render these CSV data rows, e.g. 1 or 9-16.")
+    parser.add_argument(
+        "--optimize",
+        choices=OPTIMIZE_LEVELS,
+        default=DEFAULT_OPTIMIZE_LEVEL,
+        help="Output size optimization: compress content streams and merge duplicate objects (small = slower, smaller).",
+    )
+    parser.add_argument(
+        "--linearize",
+        action="store_true",
+        help="Write a linearized (fast web view) PDF so viewers can show page 1 early. Requires pikepdf.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rewrite --output whenever the CSV is saved, redrawing only pages whose rows changed.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between CSV change checks in --watch mode.",
+    )
     args = parser.parse_args()
+    if args.linearize and not linearize_available():
+        parser.error('--linearize requires pikepdf (pip install -e ".[optimize]").')
+
+    try:
+        row_slice = selection_slice(
+            FIELDS_PER_PAGE,
+            pages=args.pages or ("1" if args.preview else None),
+            rows=args.rows,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
 
     script_font_name = None
     script_font_path = Path(args.script_font_file)
     if script_font_path.exists():
         script_font_name = args.script_font_name
 
+    if args.watch:
+        renderer = IncrementalCertificateRenderer(
+            template_path=Path(args.template),
+            shift_left_inch=args.shift_left_inch,
+            shift_down_inch=args.shift_down_inch,
+            font_name=args.font_name,
+            script_font_name=script_font_name,
+            font_size=args.font_size,
+            script_font_size=args.script_font_size,
+            font_file=args.font_file,
+            script_font_file=str(script_font_path) if script_font_name else None,
+        )
+        try:
+            watch_certificates(
+                Path(args.csv),
+                Path(args.output),
+                renderer,
+                row_slice=row_slice,
+                optimize=args.optimize,
+                linearize=args.linearize,
+                poll_interval=args.poll_interval,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
     fill_certificates(
         csv_path=Path(args.csv),
         output_path=Path(args.output),
@@ -387,6 +788,9 @@ def main() -> None:
         script_font_size=args.script_font_size,
         font_file=args.font_file,
         script_font_file=str(script_font_path) if script_font_name else None,
+        row_slice=row_slice,
+        optimize=args.optimize,
+        linearize=args.linearize,
     )
 
 
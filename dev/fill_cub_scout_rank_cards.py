@@ -3,15 +3,31 @@ from __future__ import annotations
 
 import csv
 import io
-from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from pypdf import PdfReader, PdfWriter, Transformation
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import ContentStream
 from reportlab.pdfgen import canvas
 
-CARDS_PER_PAGE = 8
+try:
+    from dev.dates import format_date
+    from dev.overlay_forms import RepeatedText
+    from dev.page_range import ROWS_PER_PAGE
+    from dev.pdf_assets import cached_template_value, open_buffer, register_font, template_buffer
+    from dev.pdf_output import DEFAULT_OPTIMIZE_LEVEL, write_pdf
+    from dev.render_control import CancellationToken, ProgressCallback, page_progress
+except ModuleNotFoundError:
+    # Fallback for direct script execution from source checkout.
+    from dates import format_date  # type: ignore
+    from overlay_forms import RepeatedText  # type: ignore
+    from page_range import ROWS_PER_PAGE  # type: ignore
+    from pdf_assets import cached_template_value, open_buffer, register_font, template_buffer  # type: ignore
+    from pdf_output import DEFAULT_OPTIMIZE_LEVEL, write_pdf  # type: ignore
+    from render_control import CancellationToken, ProgressCallback, page_progress  # type: ignore
+
+CARDS_PER_PAGE = ROWS_PER_PAGE
+LAYOUT_KIND = "card_anchors"
 CARD_ANCHOR_X = 52.6
 CARD_X_STEP = 180.0
 DEFAULT_CARD_ANCHORS = [
@@ -58,6 +74,26 @@ def _extract_card_anchors(page) -> list[tuple[float, float]]:
     return [(x, y) for x, y in top_row] + [(x, y) for x, y in bottom_row]
 
 
+def _template_card_anchors(template_path: Path) -> list[tuple[float, float]]:
+    return cached_template_value(
+        template_path,
+        LAYOUT_KIND,
+        lambda data: _extract_card_anchors(PdfReader(open_buffer(data)).pages[0]),
+    )
+
+
+def layout_index(template_data: memoryview) -> list[list[float]]:
+    # JSON-ready card anchors for a template indexed once at upload time (see template_store).
+    anchors = _extract_card_anchors(PdfReader(open_buffer(template_data)).pages[0])
+    if anchors is DEFAULT_CARD_ANCHORS:
+        raise ValueError("Template has no form fields and its rank card anchors could not be detected.")
+    return [[x, y] for x, y in anchors]
+
+
+def warm_template(template_path: Path) -> None:
+    _template_card_anchors(template_path)
+
+
 def _read_rows(csv_path: Path) -> list[dict[str, str]]:
     with csv_path.open(newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -70,16 +106,8 @@ def _chunk_rows(rows: list[dict[str, str]], size: int) -> list[list[dict[str, st
     return [rows[i : i + size] for i in range(0, len(rows), size)]
 
 
-def _format_date(value: str) -> str:
-    value = (value or "").strip()
-    if not value:
-        return ""
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
-        try:
-            return datetime.strptime(value, fmt).strftime("%m/%d/%Y")
-        except ValueError:
-            continue
-    return value
+def _page_count(row_count: int) -> int:
+    return -(-row_count // CARDS_PER_PAGE)
 
 
 def _fit_font_size(c: canvas.Canvas, text: str, font_name: str, base_size: float, max_width: float) -> float:
@@ -93,53 +121,62 @@ def _fit_font_size(c: canvas.Canvas, text: str, font_name: str, base_size: float
 
 def _draw_rotated_text_in_box(
     c: canvas.Canvas,
-    anchor_x: float,
-    anchor_y: float,
     text: str,
     font_name: str,
     base_size: float,
     box_width: float,
     box_height: float,
-    field_x: float,
-    field_y: float,
-    max_size: float | None = None,
 ) -> None:
-    if not text:
-        return
-    if max_size is not None:
-        base_size = min(base_size, max_size)
     size = _fit_font_size(c, text, font_name, base_size, box_width - 2.0)
-    c.saveState()
-    c.translate(anchor_x + (field_x - CARD_ANCHOR_X), anchor_y + field_y)
     c.rotate(90)
     c.setFont(font_name, size)
     c.drawCentredString(box_width / 2.0, (box_height - size) / 2.0, text)
-    c.restoreState()
 
 
 def _draw_rotated_text_at_anchor(
     c: canvas.Canvas,
-    anchor_x: float,
-    anchor_y: float,
     text: str,
     font_name: str,
     base_size: float,
     max_width: float,
-    field_x: float,
-    field_y: float,
-    max_size: float | None = None,
 ) -> None:
-    if not text:
-        return
-    if max_size is not None:
-        base_size = min(base_size, max_size)
     size = _fit_font_size(c, text, font_name, base_size, max_width)
-    c.saveState()
-    c.translate(anchor_x + (field_x - CARD_ANCHOR_X), anchor_y + field_y)
     c.rotate(90)
     c.setFont(font_name, size)
     c.drawString(0, 0, text)
-    c.restoreState()
+
+
+def _card_texts(
+    anchor_x: float,
+    anchor_y: float,
+    row: dict[str, str],
+    font_name: str,
+    font_size: float,
+    signature_font: str,
+    signature_size: float,
+) -> Iterator[tuple[float, float, Callable[..., None], tuple]]:
+    # Where each filled field of one card goes, and the draw call (relative to that point) that writes it.
+    texts = (
+        ("den_number", (row.get("Den Number") or row.get("Den No.") or "").strip(), font_name, 0.0),
+        ("pack_number", (row.get("Pack Number") or "").strip(), font_name, 0.0),
+        ("date", format_date(row.get("Date") or ""), font_name, 0.0),
+        ("name", (row.get("Scout Name") or "").strip(), font_name, font_size),
+        ("den_leader", (row.get("Den Leader") or "").strip(), signature_font, signature_size),
+        ("cubmaster", (row.get("Cubmaster") or "").strip(), signature_font, signature_size),
+    )
+    for field, text, field_font, requested_size in texts:
+        if not text:
+            continue
+        layout = FIELD_LAYOUT[field]
+        x = anchor_x + (layout["x"] - CARD_ANCHOR_X)
+        y = anchor_y + layout["y"]
+        if "max_width" in layout:
+            yield x, y, _draw_rotated_text_at_anchor, (text, field_font, layout["size"], layout["max_width"])
+            continue
+        base_size = max(layout["size"], requested_size)
+        if layout.get("max_size") is not None:
+            base_size = min(base_size, layout["max_size"])
+        yield x, y, _draw_rotated_text_in_box, (text, field_font, base_size, layout["width"], layout["height"])
 
 
 def _map_display_shift_to_page(rotate: int, dx_display: float, dy_display: float) -> tuple[float, float]:
@@ -155,6 +192,97 @@ def _map_display_shift_to_page(rotate: int, dx_display: float, dy_display: float
     return dx_display, dy_display
 
 
+def _translate_contents(page: PageObject, tx: float, ty: float) -> None:
+    # Same result as page.add_transformation(Transformation().translate(tx, ty)), but wraps the raw
+    # content bytes instead of parsing every operator of the (large) template content stream first.
+    content = page.get_contents()
+    if content is None:
+        return
+    shifted = ContentStream(None, page.pdf)
+    shifted.set_data(b"q\n" + f"1 0 0 1 {tx:.4f} {ty:.4f} cm\n".encode("ascii") + content.get_data() + b"\nQ\n")
+    page.replace_contents(shifted)
+
+
+def _register_fonts(
+    font_name: str,
+    script_font_name: str | None,
+    font_file: str | None,
+    script_font_file: str | None,
+) -> None:
+    if font_file and Path(font_file).exists():
+        register_font(font_name, font_file)
+    if script_font_name and script_font_file and Path(script_font_file).exists():
+        register_font(script_font_name, script_font_file)
+
+
+def _add_rank_card_pages(
+    writer: PdfWriter,
+    rows: list[dict[str, str]],
+    template_data: memoryview,
+    card_anchors: list[tuple[float, float]],
+    dx_display: float,
+    dy_display: float,
+    font_name: str,
+    font_size: float,
+    signature_font: str,
+    signature_size: float,
+    output_rotation_degrees: int | None,
+    final_rotation_degrees: int | None = None,
+    cancel_token: CancellationToken | None = None,
+    on_page: Callable[[], None] | None = None,
+) -> None:
+    chunks = _chunk_rows(rows, CARDS_PER_PAGE)
+    repeated = RepeatedText()
+    for chunk in chunks:
+        for idx, row in enumerate(chunk):
+            anchor_x, anchor_y = card_anchors[idx]
+            for _, _, draw, args in _card_texts(
+                anchor_x, anchor_y, row, font_name, font_size, signature_font, signature_size
+            ):
+                repeated.count(draw, args)
+    for index, chunk in enumerate(chunks):
+        if cancel_token is not None:
+            cancel_token.check()
+        page = PdfReader(open_buffer(template_data)).pages[0]
+        page_size = (float(page.mediabox.width), float(page.mediabox.height))
+        if index == 0:
+            repeated.build(writer, page_size)
+
+        overlay_buffer = io.BytesIO()
+        c = canvas.Canvas(overlay_buffer, pagesize=page_size)
+
+        for idx, row in enumerate(chunk):
+            anchor_x, anchor_y = card_anchors[idx]
+            for x, y, draw, args in _card_texts(
+                anchor_x, anchor_y, row, font_name, font_size, signature_font, signature_size
+            ):
+                if repeated.defer(x, y, draw, args):
+                    continue
+                c.saveState()
+                c.translate(x, y)
+                draw(c, *args)
+                c.restoreState()
+
+        c.showPage()
+        c.save()
+        overlay_pdf = PdfReader(io.BytesIO(overlay_buffer.getvalue())).pages[0]
+        page.merge_page(overlay_pdf)
+        repeated.place(page)
+
+        rotate = output_rotation_degrees if output_rotation_degrees is not None else (page.get("/Rotate") or 0)
+        tx, ty = _map_display_shift_to_page(rotate, dx_display, dy_display)
+        if tx or ty:
+            _translate_contents(page, tx, ty)
+        if final_rotation_degrees is not None:
+            delta = (final_rotation_degrees - int(page.get("/Rotate") or 0)) % 360
+            if delta:
+                page.rotate(delta)
+
+        writer.add_page(page)
+        if on_page is not None:
+            on_page()
+
+
 def fill_rank_cards(
     csv_path: Path,
     output_path: Path,
@@ -168,6 +296,11 @@ def fill_rank_cards(
     font_file: str | None = None,
     script_font_file: str | None = None,
     output_rotation_degrees: int | None = None,
+    cancel_token: CancellationToken | None = None,
+    progress: ProgressCallback | None = None,
+    row_slice: slice | None = None,
+    optimize: str = DEFAULT_OPTIMIZE_LEVEL,
+    linearize: bool = False,
 ) -> None:
     if not template_path.exists():
         raise FileNotFoundError(f"Template PDF not found: {template_path}")
@@ -175,122 +308,93 @@ def fill_rank_cards(
     rows = _read_rows(csv_path)
     if not rows:
         raise ValueError("CSV has no data rows.")
+    if row_slice is not None:
+        rows = rows[row_slice]
+        if not rows:
+            raise ValueError("No CSV rows fall inside the selected page/row range.")
 
-    if font_file and Path(font_file).exists():
-        pdfmetrics.registerFont(TTFont(font_name, font_file))
-    if script_font_name and script_font_file and Path(script_font_file).exists():
-        pdfmetrics.registerFont(TTFont(script_font_name, script_font_file))
+    _register_fonts(font_name, script_font_name, font_file, script_font_file)
 
     signature_font = script_font_name or font_name
     signature_size = script_font_size if script_font_size is not None else max(font_size - 1.0, 7.0)
 
-    dx_display = -72.0 * shift_left_inch
-    dy_display = -72.0 * shift_down_inch
+    template_data = template_buffer(template_path)
+    card_anchors = _template_card_anchors(template_path)
 
     writer = PdfWriter()
-    chunks = _chunk_rows(rows, CARDS_PER_PAGE)
-    for chunk in chunks:
-        page = PdfReader(str(template_path)).pages[0]
-        card_anchors = _extract_card_anchors(page)
-        page_size = (float(page.mediabox.width), float(page.mediabox.height))
+    _add_rank_card_pages(
+        writer,
+        rows,
+        template_data,
+        card_anchors,
+        -72.0 * shift_left_inch,
+        -72.0 * shift_down_inch,
+        font_name,
+        font_size,
+        signature_font,
+        signature_size,
+        output_rotation_degrees,
+        cancel_token=cancel_token,
+        on_page=page_progress(progress, _page_count(len(rows))),
+    )
 
-        overlay_buffer = io.BytesIO()
-        c = canvas.Canvas(overlay_buffer, pagesize=page_size)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(write_pdf(writer, optimize, linearize))
 
-        for idx, row in enumerate(chunk):
-            anchor_x, anchor_y = card_anchors[idx]
-            den_number = (row.get("Den Number") or row.get("Den No.") or "").strip()
-            pack_number = (row.get("Pack Number") or "").strip()
-            date_value = _format_date(row.get("Date") or "")
-            scout_name = (row.get("Scout Name") or "").strip()
-            den_leader = (row.get("Den Leader") or "").strip()
-            cubmaster = (row.get("Cubmaster") or "").strip()
-
-            _draw_rotated_text_at_anchor(
-                c,
-                anchor_x,
-                anchor_y,
-                den_number,
-                font_name,
-                FIELD_LAYOUT["den_number"]["size"],
-                FIELD_LAYOUT["den_number"]["max_width"],
-                FIELD_LAYOUT["den_number"]["x"],
-                FIELD_LAYOUT["den_number"]["y"],
-            )
-            _draw_rotated_text_at_anchor(
-                c,
-                anchor_x,
-                anchor_y,
-                pack_number,
-                font_name,
-                FIELD_LAYOUT["pack_number"]["size"],
-                FIELD_LAYOUT["pack_number"]["max_width"],
-                FIELD_LAYOUT["pack_number"]["x"],
-                FIELD_LAYOUT["pack_number"]["y"],
-            )
-            _draw_rotated_text_at_anchor(
-                c,
-                anchor_x,
-                anchor_y,
-                date_value,
-                font_name,
-                FIELD_LAYOUT["date"]["size"],
-                FIELD_LAYOUT["date"]["max_width"],
-                FIELD_LAYOUT["date"]["x"],
-                FIELD_LAYOUT["date"]["y"],
-            )
-            _draw_rotated_text_in_box(
-                c,
-                anchor_x,
-                anchor_y,
-                scout_name,
-                font_name,
-                max(FIELD_LAYOUT["name"]["size"], font_size),
-                FIELD_LAYOUT["name"]["width"],
-                FIELD_LAYOUT["name"]["height"],
-                FIELD_LAYOUT["name"]["x"],
-                FIELD_LAYOUT["name"]["y"],
-                FIELD_LAYOUT["name"].get("max_size"),
-            )
-            _draw_rotated_text_in_box(
-                c,
-                anchor_x,
-                anchor_y,
-                den_leader,
-                signature_font,
-                max(FIELD_LAYOUT["den_leader"]["size"], signature_size),
-                FIELD_LAYOUT["den_leader"]["width"],
-                FIELD_LAYOUT["den_leader"]["height"],
-                FIELD_LAYOUT["den_leader"]["x"],
-                FIELD_LAYOUT["den_leader"]["y"],
-                FIELD_LAYOUT["den_leader"].get("max_size"),
-            )
-            _draw_rotated_text_in_box(
-                c,
-                anchor_x,
-                anchor_y,
-                cubmaster,
-                signature_font,
-                max(FIELD_LAYOUT["cubmaster"]["size"], signature_size),
-                FIELD_LAYOUT["cubmaster"]["width"],
-                FIELD_LAYOUT["cubmaster"]["height"],
-                FIELD_LAYOUT["cubmaster"]["x"],
-                FIELD_LAYOUT["cubmaster"]["y"],
-                FIELD_LAYOUT["cubmaster"].get("max_size"),
-            )
 
-        c.showPage()
-        c.save()
-        overlay_pdf = PdfReader(io.BytesIO(overlay_buffer.getvalue())).pages[0]
-        page.merge_page(overlay_pdf)
+def fill_rank_card_groups(
+    groups: Iterable[tuple[str, list[dict[str, str]]]],
+    template_path: Path,
+    shift_left_inch: float,
+    shift_down_inch: float,
+    font_name: str,
+    script_font_name: str | None,
+    font_size: float,
+    script_font_size: float | None = None,
+    font_file: str | None = None,
+    script_font_file: str | None = None,
+    output_rotation_degrees: int | None = None,
+    final_rotation_degrees: int | None = None,
+    cancel_token: CancellationToken | None = None,
+    progress: ProgressCallback | None = None,
+    optimize: str = DEFAULT_OPTIMIZE_LEVEL,
+    linearize: bool = False,
+) -> Iterator[tuple[str, bytes]]:
+    if not template_path.exists():
+        raise FileNotFoundError(f"Template PDF not found: {template_path}")
 
-        rotate = output_rotation_degrees if output_rotation_degrees is not None else (page.get("/Rotate") or 0)
-        tx, ty = _map_display_shift_to_page(rotate, dx_display, dy_display)
-        if tx or ty:
-            page.add_transformation(Transformation().translate(tx=tx, ty=ty))
+    _register_fonts(font_name, script_font_name, font_file, script_font_file)
 
-        writer.add_page(page)
+    signature_font = script_font_name or font_name
+    signature_size = script_font_size if script_font_size is not None else max(font_size - 1.0, 7.0)
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("wb") as f:
-        writer.write(f)
+    template_data = template_buffer(template_path)
+    card_anchors = _template_card_anchors(template_path)
+    dx_display = -72.0 * shift_left_inch
+    dy_display = -72.0 * shift_down_inch
+
+    groups = list(groups)
+    on_page = page_progress(progress, sum(_page_count(len(rows)) for _, rows in groups))
+
+    # Yield each group as soon as it is written so callers can stream results into a ZIP.
+    for key, rows in groups:
+        if not rows:
+            continue
+        writer = PdfWriter()
+        _add_rank_card_pages(
+            writer,
+            rows,
+            template_data,
+            card_anchors,
+            dx_display,
+            dy_display,
+            font_name,
+            font_size,
+            signature_font,
+            signature_size,
+            output_rotation_degrees,
+            final_rotation_degrees,
+            cancel_token=cancel_token,
+            on_page=on_page,
+        )
+        yield key, write_pdf(writer, optimize, linearize)
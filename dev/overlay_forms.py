@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import io
+import os
+from collections import Counter
+from typing import Callable, Hashable
+
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, ContentStream, DecodedStreamObject, DictionaryObject, FloatObject, NameObject
+from reportlab.pdfgen import canvas
+
+try:
+    from dev.pdf_output import add_indirect_object
+except ModuleNotFoundError:
+    # Fallback for direct script execution from source checkout.
+    from pdf_output import add_indirect_object  # type: ignore
+
+# Texts drawn at least this many times in one document become a shared Form XObject; 0 draws every one inline.
+OVERLAY_FORM_MIN_USES = int(os.environ.get("OVERLAY_FORM_MIN_USES", "2"))
+
+# Draws one piece of text around the origin of its box; the caller supplies the translation.
+TextDraw = Callable[..., None]
+
+
+class RepeatedText:
+    # Den leader, cubmaster, pack number and date are usually the same on every card of a roster. A document is
+    # counted before it is drawn; every (draw, args) pair seen at least `min_uses` times is rendered once as a Form
+    # XObject and placed with a translation wherever it appears, so its glyphs are fitted, drawn, parsed and merged
+    # once per document instead of once per slot. Text used once is still drawn into the page overlay.
+    def __init__(self, min_uses: int | None = None) -> None:
+        self.min_uses = OVERLAY_FORM_MIN_USES if min_uses is None else min_uses
+        self._uses: Counter[tuple[TextDraw, tuple[Hashable, ...]]] = Counter()
+        self._forms: dict[tuple[TextDraw, tuple[Hashable, ...]], tuple[NameObject, object]] = {}
+        self._pending: list[tuple[NameObject, object, float, float]] = []
+
+    def count(self, draw: TextDraw, args: tuple[Hashable, ...]) -> None:
+        self._uses[(draw, args)] += 1
+
+    def build(self, writer: PdfWriter, page_size: tuple[float, float]) -> None:
+        # Renders every repeated text as one page of a single scratch document, so the forms share one subset of
+        # each font, then adds each page's content to the writer as a Form XObject.
+        shared = [key for key, uses in self._uses.items() if uses >= self.min_uses]
+        if not shared or self.min_uses <= 0:
+            return
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=page_size)
+        for draw, args in shared:
+            draw(c, *args)
+            c.showPage()
+        c.save()
+        # Texts are drawn around their box origin, so the form's box covers a page-sized margin on every side.
+        reach = sum(page_size)
+        bbox = ArrayObject(FloatObject(value) for value in (-reach, -reach, reach, reach))
+        for index, (key, page) in enumerate(zip(shared, PdfReader(io.BytesIO(buffer.getvalue())).pages)):
+            form = DecodedStreamObject()
+            form.set_data(page.get_contents().get_data())
+            form.update(
+                {
+                    NameObject("/Type"): NameObject("/XObject"),
+                    NameObject("/Subtype"): NameObject("/Form"),
+                    NameObject("/BBox"): bbox,
+                    NameObject("/Resources"): page["/Resources"].clone(writer),
+                }
+            )
+            self._forms[key] = (NameObject(f"/RepeatedText{index}"), add_indirect_object(writer, form.flate_encode()))
+
+    def defer(self, x: float, y: float, draw: TextDraw, args: tuple[Hashable, ...]) -> bool:
+        # True when the text has a form; it is then placed at (x, y) by the next place() instead of being drawn.
+        form = self._forms.get((draw, args))
+        if form is None:
+            return False
+        self._pending.append((*form, x, y))
+        return True
+
+    def place(self, page: PageObject) -> None:
+        # Appends the deferred placements to the page content and adds the forms they use to its resources.
+        if not self._pending:
+            return
+        resources = page[NameObject("/Resources")].get_object()
+        if "/XObject" not in resources:
+            resources[NameObject("/XObject")] = DictionaryObject()
+        xobjects = resources["/XObject"].get_object()
+        operators = []
+        for name, form, x, y in self._pending:
+            xobjects[name] = form
+            operators.append(f"q 1 0 0 1 {x:.4f} {y:.4f} cm {name} Do Q")
+        self._pending.clear()
+        content = page.get_contents()
+        placed = ContentStream(None, page.pdf)
+        placed.set_data(
+            (content.get_data() if content is not None else b"") + b"\n" + "\n".join(operators).encode("ascii")
+        )
+        page.replace_contents(placed)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import re
+
+# Award slots on one template sheet: eight certificates or eight rank cards. The renderers and the cost and memory
+# estimates all read it from here, so a layout change cannot leave an estimate behind.
+ROWS_PER_PAGE = 8
+
+_RANGE_RE = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$")
+
+
+def parse_range(value: str) -> tuple[int, int]:
+    # "3" or "2-5", 1-based and inclusive, as users number pages and CSV rows.
+    match = _RANGE_RE.match(value or "")
+    if not match:
+        raise ValueError(f"Invalid range {value!r}; use N or N-M.")
+    start = int(match.group(1))
+    end = int(match.group(2) or start)
+    if start < 1 or end < start:
+        raise ValueError(f"Invalid range {value!r}; use N or N-M with 1 <= N <= M.")
+    return start, end
+
+
+def selection_slice(per_page: int, pages: str | None = None, rows: str | None = None) -> slice:
+    # Rows are the unit of selection: a page range covers the rows that land on those output pages.
+    if rows:
+        start, end = parse_range(rows)
+        return slice(start - 1, end)
+    if pages:
+        start, end = parse_range(pages)
+        return slice((start - 1) * per_page, end * per_page)
+    return slice(None)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# Assets are memory-mapped read-only, so every worker process shares the same physical pages
+# through the OS page cache instead of holding its own copy of each file.
+# PDF_ASSET_MMAP=0 reads them into private memory instead (for comparison, or filesystems without mmap).
+ASSET_MMAP = os.environ.get("PDF_ASSET_MMAP", "1") != "0"
+# Templates (mapping plus everything derived from it) kept per process, least recently used evicted first.
+# The built-in set is seven files; the bound matters once uploaded custom templates are in use.
+TEMPLATE_CACHE_ENTRIES = int(os.environ.get("PDF_TEMPLATE_CACHE_ENTRIES", "32"))
+
+_lock = threading.Lock()
+_registered_fonts: dict[str, str] = {}
+_font_bytes = 0
+_template_evictions = 0
+
+
+class _CachedTemplate:
+    def __init__(self, mtime_ns: int) -> None:
+        self.mtime_ns = mtime_ns
+        self.mapping: mmap.mmap | bytes | None = None
+        self.values: dict[str, object] = {}
+
+
+# Keyed by resolved path; an entry is replaced when the file's mtime changes.
+_templates: OrderedDict[str, _CachedTemplate] = OrderedDict()
+
+
+class _MappedFile(io.RawIOBase):
+    # An independent read position over a shared mapping; reads copy only the bytes asked for.
+    def __init__(self, buffer: memoryview) -> None:
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = max(0, min(len(b), len(self._buffer) - self._pos))
+        b[:size] = self._buffer[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class _MappedFont:
+    # reportlab's TTF parser keeps whatever read() returns and only indexes and slices it,
+    # so it can work straight off the mapping.
+    def __init__(self, path: str, mapping: mmap.mmap | bytes) -> None:
+        self.name = path
+        self._mapping = mapping
+
+    def read(self) -> mmap.mmap | bytes:
+        return self._mapping
+
+
+def _map_file(path: str) -> mmap.mmap | bytes:
+    with open(path, "rb") as f:
+        if not ASSET_MMAP:
+            return f.read()
+        # The mapping stays valid after the file is closed.
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _template_key(template_path: Path) -> tuple[str, int]:
+    resolved = template_path.resolve()
+    return str(resolved), resolved.stat().st_mtime_ns
+
+
+def _entry(key: str, mtime_ns: int) -> _CachedTemplate:
+    # Caller holds _lock.
+    entry = _templates.get(key)
+    if entry is None or entry.mtime_ns != mtime_ns:
+        entry = _templates[key] = _CachedTemplate(mtime_ns)
+    _templates.move_to_end(key)
+    return entry
+
+
+def _evict() -> None:
+    # Caller holds _lock. Evicted mappings are not closed: renders still reading one keep it alive until they finish.
+    global _template_evictions
+    while len(_templates) > max(TEMPLATE_CACHE_ENTRIES, 1):
+        _templates.popitem(last=False)
+        _template_evictions += 1
+
+
+def template_buffer(template_path: Path) -> memoryview:
+    key, mtime_ns = _template_key(template_path)
+    with _lock:
+        mapping = _entry(key, mtime_ns).mapping
+    if mapping is not None:
+        return memoryview(mapping)
+    mapping = _map_file(key)
+    with _lock:
+        entry = _entry(key, mtime_ns)
+        if entry.mapping is None:
+            entry.mapping = mapping
+        mapping = entry.mapping
+        _evict()
+    return memoryview(mapping)
+
+
+def open_buffer(buffer: memoryview) -> io.BufferedReader:
+    # A fresh seekable stream for PdfReader; readers never share a file position.
+    return io.BufferedReader(_MappedFile(buffer))
+
+
+def cached_template_value(template_path: Path, kind: str, compute: Callable[[memoryview], T]) -> T:
+    # Memoize anything derived from a template (field rects, card anchors, ...) alongside its mapping.
+    key, mtime_ns = _template_key(template_path)
+    with _lock:
+        values = _entry(key, mtime_ns).values
+        if kind in values:
+            return values[kind]  # type: ignore[return-value]
+    value = compute(template_buffer(template_path))
+    with _lock:
+        _entry(key, mtime_ns).values[kind] = value
+        _evict()
+    return value
+
+
+def seed_template_values(template_path: Path, load: Callable[[], dict[str, object]]) -> None:
+    # For templates indexed ahead of time (see template_store): on a cache miss the stored values are
+    # loaded instead of being re-derived from the PDF by each cached_template_value caller.
+    key, mtime_ns = _template_key(template_path)
+    with _lock:
+        if _entry(key, mtime_ns).values:
+            return
+    values = load()
+    with _lock:
+        entry = _entry(key, mtime_ns)
+        for kind, value in values.items():
+            entry.values.setdefault(kind, value)
+        _evict()
+
+
+def register_font(font_name: str, font_file: str) -> None:
+    # Parsing a TTF is far more expensive than rendering a page, so only do it once per name and file.
+    global _font_bytes
+    with _lock:
+        if _registered_fonts.get(font_name) == font_file:
+            return
+    # Imported here so importing this module stays cheap for callers that only need template caching.
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    mapping = _map_file(font_file)
+    pdfmetrics.registerFont(TTFont(font_name, _MappedFont(font_file, mapping)))
+    with _lock:
+        _registered_fonts[font_name] = font_file
+        _font_bytes += len(mapping)
+
+
+def cache_info() -> dict[str, int]:
+    with _lock:
+        mappings = [entry.mapping for entry in _templates.values() if entry.mapping is not None]
+        return {
+            "templates": len(mappings),
+            "template_bytes": sum(len(mapping) for mapping in mappings),
+            "template_values": sum(len(entry.values) for entry in _templates.values()),
+            "template_evictions": _template_evictions,
+            "fonts": len(_registered_fonts),
+            "font_bytes": _font_bytes,
+        }
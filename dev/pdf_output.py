@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import io
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Type-only import keeps this module cheap for the server, which reads the level names at startup.
+    from pypdf import PdfWriter
+    from pypdf.generic import IndirectObject, PdfObject
+
+OPTIMIZE_LEVELS = ("none", "fast", "small")
+DEFAULT_OPTIMIZE_LEVEL = "fast"
+_CONTENT_COMPRESSION_LEVEL = {"fast": 6, "small": 9}
+
+
+def _optimize_writer(writer: PdfWriter, level: str) -> None:
+    # Merged page content is otherwise written uncompressed, and because every page is merged from
+    # its own copy of the template, its fonts, images and ExtGStates repeat once per page until
+    # identical objects are collapsed.
+    for page in writer.pages:
+        page.compress_content_streams(level=_CONTENT_COMPRESSION_LEVEL[level])
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+
+
+def add_indirect_object(writer: PdfWriter, obj: PdfObject) -> IndirectObject:
+    # pypdf 6 has no public PdfWriter.add_object. clone() is public: it copies an object that has an
+    # indirect_reference attribute (None for one not yet in any file) into the writer and gives the copy its reference.
+    obj.indirect_reference = None
+    return obj.clone(writer).indirect_reference
+
+
+def linearize_available() -> bool:
+    # pypdf can neither linearize nor write object streams; both need pikepdf (qpdf).
+    return importlib.util.find_spec("pikepdf") is not None
+
+
+def _with_document_id(pdf_bytes: bytes) -> bytes:
+    # pypdf writes no /ID, and qpdf would otherwise invent a random one. Deriving it from the file's own bytes keeps
+    # identical rows and settings byte-identical (so their ETags match) while different outputs get different IDs.
+    # The trailer comes after the cross-reference table, so inserting into it moves no offsets.
+    trailer = pdf_bytes.rindex(b"trailer")
+    start = pdf_bytes.index(b"<<", trailer) + 2
+    if b"/ID" in pdf_bytes[start:]:
+        return pdf_bytes
+    digest = hashlib.md5(pdf_bytes, usedforsecurity=False).hexdigest()
+    return pdf_bytes[:start] + f"\n/ID [<{digest}> <{digest}>]".encode("ascii") + pdf_bytes[start:]
+
+
+def _qpdf_rewrite(pdf_bytes: bytes, object_streams: bool, linearize: bool) -> bytes:
+    import pikepdf
+
+    stream_mode = pikepdf.ObjectStreamMode.generate if object_streams else pikepdf.ObjectStreamMode.preserve
+    with pikepdf.open(io.BytesIO(pdf_bytes)) as pdf:
+        buffer = io.BytesIO()
+        pdf.save(
+            buffer,
+            object_stream_mode=stream_mode,
+            compress_streams=True,
+            recompress_flate=object_streams,
+            linearize=linearize,
+            # Keeps the first /ID half and computes the second from the content instead of the clock.
+            deterministic_id=True,
+        )
+    return buffer.getvalue()
+
+
+def write_pdf(writer: PdfWriter, level: str = DEFAULT_OPTIMIZE_LEVEL, linearize: bool = False) -> bytes:
+    # none: write as-is. fast: compress content streams and merge identical objects.
+    # small: maximum compression, plus object and cross-reference streams when pikepdf is installed.
+    # linearize: "fast web view" layout so viewers can show page 1 before the rest arrives (needs pikepdf).
+    if level not in OPTIMIZE_LEVELS:
+        raise ValueError(f"Unknown optimize level {level!r}; expected one of {', '.join(OPTIMIZE_LEVELS)}.")
+    if linearize and not linearize_available():
+        raise RuntimeError("Linearized output requires pikepdf (pip install -e \".[optimize]\").")
+    if level != "none":
+        _optimize_writer(writer, level)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    pdf_bytes = _with_document_id(buffer.getvalue())
+    object_streams = level == "small" and linearize_available()
+    if linearize or object_streams:
+        rewritten = _qpdf_rewrite(pdf_bytes, object_streams, linearize)
+        # Object streams are only worth keeping when they actually save bytes.
+        if linearize or len(rewritten) < len(pdf_bytes):
+            pdf_bytes = rewritten
+    return pdf_bytes
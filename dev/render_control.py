@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+
+class RenderCancelled(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Render cancelled: {reason}")
+        self.reason = reason
+
+
+class CancellationToken:
+    # Cooperative cancellation for long renders: fill loops call check() between pages or scouts.
+    # A token trips when cancel() is called, when its deadline passes, or when the optional probe
+    # (for example "has the client disconnected?") returns True. The probe is rate-limited because
+    # check() runs once per page.
+    def __init__(
+        self,
+        deadline: float | None = None,
+        probe: Callable[[], bool] | None = None,
+        probe_reason: str = "client_disconnect",
+        probe_interval_seconds: float = 0.5,
+    ) -> None:
+        self.deadline = deadline
+        self._probe = probe
+        self._probe_reason = probe_reason
+        self._probe_interval = probe_interval_seconds
+        self._next_probe = 0.0
+        self._reason: str | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def with_budget(cls, budget_seconds: float | None, **kwargs) -> "CancellationToken":
+        deadline = time.monotonic() + budget_seconds if budget_seconds and budget_seconds > 0 else None
+        return cls(deadline=deadline, **kwargs)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._reason is None:
+                self._reason = reason
+
+    @property
+    def reason(self) -> str | None:
+        return self._reason
+
+    @property
+    def cancelled(self) -> bool:
+        return self._reason is not None
+
+    def check(self) -> None:
+        if self._reason is None:
+            now = time.monotonic()
+            if self.deadline is not None and now >= self.deadline:
+                self.cancel("deadline")
+            elif self._probe is not None and now >= self._next_probe:
+                self._next_probe = now + self._probe_interval
+                if self._probe():
+                    self.cancel(self._probe_reason)
+        if self._reason is not None:
+            raise RenderCancelled(self._reason)
+
+
+# progress(pages_done, pages_total), called after each page is merged.
+ProgressCallback = Callable[[int, int], None]
+
+
+def page_progress(progress: ProgressCallback | None, pages_total: int) -> Callable[[], None] | None:
+    # Fill loops get a bare per-page callback, or None so the no-progress path costs one comparison.
+    if progress is None:
+        return None
+    pages_done = 0
+
+    def on_page() -> None:
+        nonlocal pages_done
+        pages_done += 1
+        progress(pages_done, pages_total)
+
+    return on_page
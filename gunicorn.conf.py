@@ -0,0 +1,46 @@
+# Gunicorn hooks that warm template, font and field caches before a worker serves traffic.
+# Usage: gunicorn -c gunicorn.conf.py --chdir dev/cert_form_ui server:app
+from __future__ import annotations
+
+import os
+import sys
+
+# With GUNICORN_PRELOAD=1 the app is imported and warmed once in the master, and forked
+# workers share those pages copy-on-write; otherwise each worker warms up after it loads the app.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+# Set in the master by a successful preload warm-up; workers are forked afterwards and inherit it.
+_warmed_in_master = False
+
+
+def _warm_up_app(log) -> bool:
+    module = sys.modules.get("server") or sys.modules.get("dev.cert_form_ui.server")
+    warm_up = getattr(module, "warm_up", None)
+    if warm_up is None:
+        return False
+    try:
+        timings = warm_up()
+    except Exception:
+        log.exception("Warm-up failed; caches will fill on first request.")
+        return False
+    log.info("Warm-up finished: %s", timings)
+    return True
+
+
+def when_ready(server) -> None:
+    global _warmed_in_master
+    if preload_app:
+        _warmed_in_master = _warm_up_app(server.log)
+
+
+def post_worker_init(worker) -> None:
+    # A worker forked from a warmed master already shares its caches; only a failed or skipped preload warms here.
+    if not _warmed_in_master:
+        _warm_up_app(worker.log)
+    # Render pools are per worker and always started after the fork (a preloaded master never owns one).
+    module = sys.modules.get("server") or sys.modules.get("dev.cert_form_ui.server")
+    start_render_pool = getattr(module, "start_render_pool", None)
+    if start_render_pool is not None:
+        try:
+            start_render_pool()
+        except Exception:
+            worker.log.exception("Render pool failed to start; the first render will retry.")
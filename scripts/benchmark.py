@@ -0,0 +1,919 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+from dev.cert_form_ui.rate_limit import SQLiteTokenBucketLimiter, TokenBucketLimiter
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SAMPLE_CSV = REPO_ROOT / "dev" / "cert_form_ui" / "cub_scout_award_template.csv"
+RANK_SAMPLE_CSV = REPO_ROOT / "dev" / "cert_form_ui" / "rank_template.csv"
+MEMORY_WORKERS = 2
+MEMORY_THREADS = 4
+
+# Runs in a fresh interpreter so import and first-render costs are measured from a cold process.
+STARTUP_PROBE = '''
+import io, json, sys, time
+started = time.perf_counter()
+from dev.cert_form_ui import server
+imported = time.perf_counter()
+if sys.argv[1] == "warm":
+    server.warm_up()
+warmed = time.perf_counter()
+client = server.app.test_client()
+csv_bytes = open(sys.argv[2], "rb").read()
+response = client.post(
+    "/generate",
+    data={"csv": (io.BytesIO(csv_bytes), "input.csv"), "fontName": "Merriweather", "scriptFont": "DancingScript"},
+    content_type="multipart/form-data",
+)
+first = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "import_seconds": round(imported - started, 4),
+    "warmup_seconds": round(warmed - imported, 4),
+    "first_pdf_seconds": round(first - warmed, 4),
+    "time_to_first_pdf_seconds": round(first - started, 4),
+}))
+'''
+
+
+def _bench_limiter_allow(limiter, keys: list[str], calls: int) -> dict[str, float]:
+    rng = random.Random(42)
+    picks = [rng.choice(keys) for _ in range(calls)]
+    started = time.perf_counter()
+    allowed = 0
+    for key in picks:
+        allowed += limiter.allow(key)
+    elapsed = time.perf_counter() - started
+    return {
+        "calls": calls,
+        "allowed": allowed,
+        "seconds": round(elapsed, 4),
+        "us_per_call": round(elapsed / calls * 1e6, 2),
+    }
+
+
+def bench_rate_limit(args: argparse.Namespace) -> dict[str, object]:
+    keys = [f"203.0.{i // 256}.{i % 256}" for i in range(args.keys)]
+    results: dict[str, object] = {"keys": args.keys}
+
+    tracemalloc.start()
+    memory_limiter = TokenBucketLimiter(max_requests=12, window_seconds=60)
+    results["memory"] = _bench_limiter_allow(memory_limiter, keys, args.calls)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["memory"]["tracked_keys"] = len(memory_limiter)
+    results["memory"]["peak_kib"] = round(peak / 1024, 1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sqlite_limiter = SQLiteTokenBucketLimiter(
+            "bench",
+            max_requests=12,
+            window_seconds=60,
+            db_path=Path(tmpdir) / "ratelimit.sqlite3",
+        )
+        # The SQLite backend does disk I/O per call, so a smaller sample keeps the run short.
+        results["sqlite"] = _bench_limiter_allow(sqlite_limiter, keys, max(args.calls // 10, 1))
+        results["sqlite"]["tracked_keys"] = len(sqlite_limiter)
+    return results
+
+
+def bench_startup(args: argparse.Namespace) -> dict[str, object]:
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    results: dict[str, object] = {}
+    for mode in ("cold", "warm"):
+        completed = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE, mode, str(SAMPLE_CSV)],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return results
+
+
+def bench_pdf_output(args: argparse.Namespace) -> dict[str, object]:
+    from dev import fill_cub_scout_certs as certs
+    from dev.pdf_output import OPTIMIZE_LEVELS
+
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as f:
+        sample_rows = list(csv.DictReader(f))
+    rows = [sample_rows[i % len(sample_rows)] for i in range(args.rows)]
+    fonts_dir = REPO_ROOT / "assets" / "fonts"
+    settings = {
+        "template_path": Path(certs.DEFAULT_TEMPLATE),
+        "shift_left_inch": 0.5,
+        "shift_down_inch": 0.5,
+        "font_name": "Lora",
+        "font_file": str(fonts_dir / "Lora-Regular.ttf"),
+        "script_font_name": "PatrickHand",
+        "script_font_file": str(fonts_dir / "PatrickHand-Regular.ttf"),
+        "font_size": 14.0,
+        "script_font_size": 24.0,
+    }
+    # Untimed pass so font registration and template parsing do not count against the first level.
+    list(certs.fill_certificate_groups([("warm", rows[:1])], **settings))
+
+    results: dict[str, object] = {"rows": args.rows, "pikepdf": importlib.util.find_spec("pikepdf") is not None}
+    for level in OPTIMIZE_LEVELS:
+        started = time.perf_counter()
+        [(_, pdf_bytes)] = certs.fill_certificate_groups([("bench", rows)], optimize=level, **settings)
+        results[level] = {"bytes": len(pdf_bytes), "seconds": round(time.perf_counter() - started, 4)}
+    baseline = results["none"]
+    for level in OPTIMIZE_LEVELS:
+        results[level]["size_ratio"] = round(results[level]["bytes"] / baseline["bytes"], 3)
+        results[level]["extra_seconds"] = round(results[level]["seconds"] - baseline["seconds"], 4)
+    return results
+
+
+def bench_linearize(args: argparse.Namespace) -> dict[str, object]:
+    from dev import fill_cub_scout_certs as certs
+    from dev.pdf_output import linearize_available
+
+    if not linearize_available():
+        return {"skipped": "pikepdf is not installed"}
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as f:
+        sample_rows = list(csv.DictReader(f))
+    rows = [sample_rows[i % len(sample_rows)] for i in range(args.rows)]
+    settings = {
+        "template_path": Path(certs.DEFAULT_TEMPLATE),
+        "shift_left_inch": 0.5,
+        "shift_down_inch": 0.5,
+        "font_name": "Helvetica",
+        "script_font_name": None,
+        "font_size": 14.0,
+    }
+    list(certs.fill_certificate_groups([("warm", rows[:1])], **settings))
+
+    bytes_per_second = args.mbps * 1_000_000 / 8
+    results: dict[str, object] = {"rows": args.rows, "mbps": args.mbps}
+    for linearize in (False, True):
+        started = time.perf_counter()
+        [(_, pdf_bytes)] = certs.fill_certificate_groups([("bench", rows)], linearize=linearize, **settings)
+        seconds = time.perf_counter() - started
+        # A plain PDF keeps its cross-reference table at the end, so viewers need every byte before page 1.
+        # A linearized one can draw page 1 once /E (end of the first-page section) has arrived.
+        first_page_bytes = len(pdf_bytes)
+        if linearize:
+            first_page_bytes = int(re.search(rb"/E\s+(\d+)", pdf_bytes[:1024]).group(1))
+        results["linearized" if linearize else "plain"] = {
+            "bytes": len(pdf_bytes),
+            "render_seconds": round(seconds, 4),
+            "first_page_bytes": first_page_bytes,
+            "est_first_page_seconds": round(first_page_bytes / bytes_per_second, 3),
+            "est_full_download_seconds": round(len(pdf_bytes) / bytes_per_second, 3),
+        }
+    return results
+
+
+def bench_render_memory(args: argparse.Namespace) -> dict[str, object]:
+    from dev.cert_form_ui import server
+
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as f:
+        sample_rows = list(csv.DictReader(f))
+    rows = server._normalize_rows_for_generator(
+        [sample_rows[i % len(sample_rows)] for i in range(args.memory_rows)], workflow="adventures", selected_rank=""
+    )
+    settings: dict[str, object] = {
+        "shift_left_inch": 0.5,
+        "shift_down_inch": 0.5,
+        "font_name": "Helvetica",
+        "script_font_name": None,
+        "font_size": 14.0,
+        "script_font_size": 24.0,
+        "optimize": server.PDF_OPTIMIZE_LEVEL,
+    }
+    render = partial(
+        server._render_generate_output,
+        workflow="adventures",
+        template_path=server.TEMPLATE_PATH,
+        use_rank_layout=False,
+        fill_settings=settings,
+    )
+
+    def streamed(rows: list[dict[str, str]]) -> None:
+        groups = server._group_rows_for_output(rows, "per_scout_zip")
+        render_groups = server._group_renderer("adventures", server.TEMPLATE_PATH, False, settings)
+        for _ in server._stream_zip_output(groups, render_groups, server.RequestMemory("off")):
+            pass
+
+    def peak_mib(run, rows: list[dict[str, str]]) -> float:
+        tracemalloc.start()
+        try:
+            run(rows)
+            return tracemalloc.get_traced_memory()[1] / 1048576
+        finally:
+            tracemalloc.stop()
+
+    cases = {
+        "combined_pdf": partial(render, output_mode="combined_pdf"),
+        "per_den_zip": partial(render, output_mode="per_den_zip"),
+        "per_scout_zip": partial(render, output_mode="per_scout_zip"),
+        "per_scout_zip_streamed": streamed,
+    }
+    results: dict[str, object] = {"rows": args.memory_rows, "max_mib_per_1000_rows": args.max_mib_per_1000_rows}
+    over = []
+    for name, run in cases.items():
+        # The one-row peak is the fixed cost (parsed template, fonts, writer); only growth beyond it scales with rows.
+        peak_mib(run, rows[:1])
+        base = peak_mib(run, rows[:1])
+        peak = peak_mib(run, rows)
+        per_1000 = max(0.0, peak - base) * 1000 / max(args.memory_rows - 1, 1)
+        results[name] = {
+            "one_row_peak_mib": round(base, 2),
+            "peak_mib": round(peak, 2),
+            "peak_mib_per_1000_rows": round(per_1000, 1),
+        }
+        if per_1000 > args.max_mib_per_1000_rows:
+            over.append(name)
+    if over:
+        # A regression guard: fail the run instead of just printing a bigger number.
+        raise SystemExit(f"render_memory: peak memory per 1,000 rows over budget for {', '.join(over)}: {results}")
+    return results
+
+
+def bench_render_pool(args: argparse.Namespace) -> dict[str, object]:
+    # Four request threads render concurrently while a fifth times a cheap request, first with renders on the
+    # request threads (one GIL), then with a render pool. Shows render throughput and how much renders slow
+    # everything else the web worker serves.
+    import threading
+
+    from dev.cert_form_ui import server
+    from dev.cert_form_ui.render_pool import RenderPool
+
+    csv_bytes = SAMPLE_CSV.read_bytes()
+    lines = csv_bytes.decode("utf-8").splitlines()
+    body = "\n".join([lines[0]] + [lines[1 + i % (len(lines) - 1)] for i in range(args.rows)]).encode("utf-8")
+    client = server.app.test_client()
+    server.warm_up()
+
+    def run(label: str) -> dict[str, object]:
+        renders: list[float] = []
+        light: list[float] = []
+        done = threading.Event()
+
+        def render_loop(thread: int) -> None:
+            for i in range(args.pool_renders // 4):
+                started = time.perf_counter()
+                # A distinct shift per request, so identical renders are not coalesced into one.
+                shift = f"{0.5 + (thread * args.pool_renders + i) / 10000:.4f}"
+                response = client.post(
+                    "/generate",
+                    data={"csv": (io.BytesIO(body), "roster.csv"), "outputMode": "combined_pdf", "shiftLeft": shift},
+                    content_type="multipart/form-data",
+                )
+                if response.status_code != 200:
+                    raise SystemExit(f"render_pool: {label} render returned {response.status_code}")
+                renders.append(time.perf_counter() - started)
+
+        def light_loop() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                client.get("/validation-rules")
+                light.append(time.perf_counter() - started)
+                time.sleep(0.005)
+
+        started = time.perf_counter()
+        probe = threading.Thread(target=light_loop)
+        probe.start()
+        workers = [threading.Thread(target=render_loop, args=(thread,)) for thread in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        probe.join()
+        light.sort()
+        return {
+            "renders_per_second": round(len(renders) / elapsed, 2),
+            "render_p50_seconds": round(sorted(renders)[len(renders) // 2], 3),
+            "light_request_p50_ms": round(light[len(light) // 2] * 1000, 2),
+            "light_request_p95_ms": round(light[int(len(light) * 0.95)] * 1000, 2),
+        }
+
+    results: dict[str, object] = {"rows": args.rows, "renders": args.pool_renders // 4 * 4}
+    previous_pool, previous_limiter = server.render_pool, server.generate_limiter
+    # Every request comes from one client address; the per-client rate limit is not what is being measured.
+    server.generate_limiter = TokenBucketLimiter(1_000_000, 60)
+    try:
+        server.render_pool = None
+        results["in_thread"] = run("in_thread")
+        server.render_pool = RenderPool(args.pool_workers, health_interval_seconds=0)
+        server.start_render_pool()
+        # Let the processes finish preloading so the comparison is steady-state.
+        client.post(
+            "/generate",
+            data={"csv": (io.BytesIO(csv_bytes), "roster.csv"), "outputMode": "combined_pdf"},
+            content_type="multipart/form-data",
+        )
+        results[f"pool_{args.pool_workers}"] = run("pool")
+        results["pool_metrics"] = {
+            key: value for key, value in server.render_pool.snapshot().items() if key != "per_worker"
+        }
+    finally:
+        if server.render_pool is not None:
+            server.render_pool.close()
+        server.render_pool, server.generate_limiter = previous_pool, previous_limiter
+    return results
+
+
+def _legacy_validation_report(rows: list[dict[str, str]]) -> dict[str, object]:
+    # The row loop /validate-csv used before validation.py: strptime per format per row, and every message kept.
+    def is_valid_date(value: str) -> bool:
+        for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+            try:
+                time.strptime(value, fmt)
+                return True
+            except ValueError:
+                continue
+        return False
+
+    errors: list[str] = []
+    warnings: list[str] = []
+    for idx, row in enumerate(rows, start=2):
+        if not (row.get("Scout Name") or "").strip():
+            errors.append(f"Row {idx}: Scout Name is required.")
+        if not (row.get("Award Name") or "").strip():
+            errors.append(f"Row {idx}: Award Name is required.")
+        if not (row.get("Pack Number") or "").strip():
+            warnings.append(f"Row {idx}: Pack Number is empty.")
+        date_value = (row.get("Date") or "").strip()
+        if date_value and not is_valid_date(date_value):
+            warnings.append(f"Row {idx}: Date '{date_value}' is not in a recognized format.")
+    return {"errors": errors, "warnings": warnings, "ok": not errors}
+
+
+def bench_validation(args: argparse.Namespace) -> dict[str, object]:
+    from dev.cert_form_ui.validation import validator_for
+    from dev.dates import format_date, normalize_date
+
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        sample_rows = list(reader)
+    rng = random.Random(7)
+    dates = ["2025-05-17", "5/17/2025", "05/17/25", "2025-06-01", "6/1/25"]
+    bad_dates = ["May 17", "17.05.2025", "2025/05/17", "13/45/2025"]
+
+    def roster(dirty_fraction: float) -> list[dict[str, str]]:
+        rows = []
+        for i in range(args.validation_rows):
+            row = dict(sample_rows[i % len(sample_rows)], Date=dates[i % len(dates)])
+            if rng.random() < dirty_fraction:
+                issue = rng.randrange(4)
+                if issue == 0:
+                    row["Scout Name"] = "  "
+                elif issue == 1:
+                    row["Award Name"] = ""
+                elif issue == 2:
+                    row["Pack Number"] = ""
+                else:
+                    row["Date"] = rng.choice(bad_dates)
+            rows.append(row)
+        return rows
+
+    validator = validator_for("adventures")
+    results: dict[str, object] = {"rows": args.validation_rows}
+    for label, dirty_fraction in (("clean", 0.0), ("dirty", 0.3)):
+        rows = roster(dirty_fraction)
+        normalize_date.cache_clear()
+        timings = {}
+        for name, run in (
+            ("legacy", lambda: _legacy_validation_report(rows)),
+            ("compiled", lambda: validator.report(fieldnames, rows, "")),
+            # Same engine without the early exit, to separate the per-row speedup from the cap.
+            ("compiled_uncapped", lambda: validator.report(fieldnames, rows, "", max_errors=len(rows))),
+        ):
+            started = time.perf_counter()
+            report = run()
+            timings[name] = {
+                "seconds": round(time.perf_counter() - started, 4),
+                "errors_listed": len(report["errors"]),
+                "report_bytes": len(json.dumps(report)),
+            }
+        timings["speedup"] = round(timings["legacy"]["seconds"] / max(timings["compiled"]["seconds"], 1e-9), 1)
+        results[label] = timings
+
+    # The fillers format every row's date again while rendering; after validation those are memo hits.
+    def legacy_format_date(value: str) -> str:
+        for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+            try:
+                return datetime.strptime(value, fmt).strftime("%m/%d/%Y")
+            except ValueError:
+                continue
+        return value
+
+    rows = roster(0.0)
+    fill_timings = {}
+    for name, format_one in (("strptime", legacy_format_date), ("memo", format_date)):
+        started = time.perf_counter()
+        for row in rows:
+            format_one(row["Date"])
+        fill_timings[f"{name}_seconds"] = round(time.perf_counter() - started, 4)
+    results["fill_dates"] = {
+        **fill_timings,
+        "memo": normalize_date.cache_info()._asdict(),
+    }
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _multipart(fields: dict[str, str], csv_bytes: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="csv"; filename="input.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n".encode("utf-8")
+        + csv_bytes
+        + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    )
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _smaps_kib(pid: int) -> dict[str, int]:
+    # Rss counts shared file pages in full for every process; Pss splits them between the processes sharing them.
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {
+        "rss_kib": fields["Rss"],
+        "pss_kib": fields["Pss"],
+        "shared_kib": fields["Shared_Clean"] + fields["Shared_Dirty"],
+        "private_kib": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, name: str) -> None:
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        if time.monotonic() > deadline or server.poll() is not None:
+            raise RuntimeError(f"{name} did not become ready")
+        time.sleep(0.2)
+
+
+def _gunicorn_memory(asset_mmap: bool, requests: int) -> dict[str, object]:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(REPO_ROOT),
+        PDF_ASSET_MMAP="1" if asset_mmap else "0",
+        RATE_LIMIT_BACKEND="memory",
+        RATE_LIMIT_GENERATE_PER_MINUTE="100000",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "-c", str(REPO_ROOT / "gunicorn.conf.py"),
+            f"--workers={MEMORY_WORKERS}", f"--threads={MEMORY_THREADS}",
+            f"--bind=127.0.0.1:{port}",
+            "--chdir", str(REPO_ROOT / "dev" / "cert_form_ui"),
+            "server:app",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url, server, "gunicorn")
+
+        # Every template and several fonts, so each worker touches all of its assets.
+        ranks = ["Lion", "Tiger", "Wolf", "Bear", "Webelo", "Arrow of Light"]
+        fonts = ["Lora", "Oswald", "Montserrat", "Alegreya"]
+        adventure_csv = SAMPLE_CSV.read_bytes()
+        rank_csv = RANK_SAMPLE_CSV.read_bytes()
+
+        def generate(i: int) -> int:
+            fields = {"fontName": fonts[i % len(fonts)], "scriptFont": "PatrickHand", "outputMode": "combined_pdf"}
+            csv_bytes = adventure_csv
+            if i % 2:
+                fields.update(workflow="ranks", rank=ranks[i // 2 % len(ranks)])
+                csv_bytes = rank_csv
+            body, content_type = _multipart(fields, csv_bytes)
+            request = urllib.request.Request(f"{base_url}/generate", data=body, headers={"Content-Type": content_type})
+            with urllib.request.urlopen(request, timeout=120) as response:
+                response.read()
+                return response.status
+
+        with ThreadPoolExecutor(MEMORY_WORKERS * MEMORY_THREADS) as pool:
+            statuses = list(pool.map(generate, range(requests)))
+        children = Path(f"/proc/{server.pid}/task/{server.pid}/children").read_text().split()
+        workers = [_smaps_kib(int(pid)) for pid in children]
+        return {
+            "ok_responses": statuses.count(200),
+            "workers": workers,
+            **{f"total_{key}": sum(worker[key] for worker in workers) for key in workers[0]},
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def bench_memory(args: argparse.Namespace) -> dict[str, object]:
+    if not Path("/proc/self/smaps_rollup").exists():
+        return {"skipped": "needs Linux /proc/<pid>/smaps_rollup"}
+    results: dict[str, object] = {"workers": MEMORY_WORKERS, "threads": MEMORY_THREADS, "requests": args.requests}
+    results["copy"] = _gunicorn_memory(asset_mmap=False, requests=args.requests)
+    results["mmap"] = _gunicorn_memory(asset_mmap=True, requests=args.requests)
+    for key in ("total_rss_kib", "total_pss_kib", "total_private_kib"):
+        results[f"{key}_saved"] = results["copy"][key] - results["mmap"][key]
+    return results
+
+
+def _slow_request(port: int, method: str, path: str, body: bytes, content_type: str, upload_seconds: float,
+                  read_bytes_per_second: float) -> int:
+    # A client on a poor mobile link: the body trickles in over upload_seconds, and the response is read at a fixed
+    # rate through a small receive window, so the server cannot hand it all to socket buffers at once.
+    with socket.socket() as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.settimeout(120)
+        sock.connect(("127.0.0.1", port))
+        head = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\nAccept-Encoding: identity\r\n"
+        if body:
+            head += f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+        sock.sendall(f"{head}\r\n".encode("latin-1"))
+        pieces = 20
+        step = max(1, -(-len(body) // pieces))
+        for offset in range(0, len(body), step):
+            time.sleep(upload_seconds / pieces)
+            sock.sendall(body[offset:offset + step])
+        response = bytearray()
+        while True:
+            block = sock.recv(4096)
+            if not block:
+                break
+            response += block
+            time.sleep(len(block) / read_bytes_per_second)
+    return int(response.split(b" ", 2)[1])
+
+
+def _slow_client_load(name: str, command: list[str], port: int, args: argparse.Namespace) -> dict[str, object]:
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        RATE_LIMIT_BACKEND="memory",
+        RATE_LIMIT_VALIDATE_PER_MINUTE="1000000",
+        ASGI_THREADS=str(MEMORY_THREADS),
+    )
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url, server, name)
+        body, content_type = _multipart({}, SAMPLE_CSV.read_bytes())
+        slow_statuses: list[int] = []
+        fast_statuses: list[int] = []
+        latencies: list[float] = []
+        started = time.perf_counter()
+        deadline = time.monotonic() + args.load_seconds
+
+        def slow_loop(client: int) -> None:
+            # Half upload a roster slowly, half download the (uncompressed) app script slowly.
+            while time.monotonic() < deadline:
+                if client % 2:
+                    status = _slow_request(port, "POST", "/validate-csv", body, content_type, args.slow_seconds, 1e9)
+                else:
+                    status = _slow_request(port, "GET", "/app.js", b"", "", 0.0, args.slow_kib_per_second * 1024)
+                slow_statuses.append(status)
+
+        def fast_loop() -> None:
+            while time.monotonic() < deadline:
+                request_started = time.perf_counter()
+                request = urllib.request.Request(
+                    f"{base_url}/validate-csv", data=body, headers={"Content-Type": content_type}
+                )
+                try:
+                    with urllib.request.urlopen(request, timeout=120) as response:
+                        response.read()
+                        status = response.status
+                except urllib.error.HTTPError as exc:
+                    status = exc.code
+                latencies.append(time.perf_counter() - request_started)
+                fast_statuses.append(status)
+
+        with ThreadPoolExecutor(args.slow_clients + args.fast_clients) as pool:
+            futures = [pool.submit(slow_loop, client) for client in range(args.slow_clients)]
+            futures += [pool.submit(fast_loop) for _ in range(args.fast_clients)]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            "fast_requests_per_second": round(len(latencies) / elapsed, 2),
+            "fast_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+            "fast_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+            "fast_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1),
+            "fast_max_ms": round(latencies[-1] * 1000, 1),
+            "fast_errors": sum(status != 200 for status in fast_statuses),
+            "slow_requests_completed": len(slow_statuses),
+            "slow_errors": sum(status != 200 for status in slow_statuses),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def bench_asgi(args: argparse.Namespace) -> dict[str, object]:
+    # Slow clients keep connections busy while fast clients time /validate-csv, against the container's
+    # gunicorn 2x4 and against asgi.py under uvicorn with the same 2 processes x 4 view threads.
+    if importlib.util.find_spec("uvicorn") is None:
+        return {"skipped": 'needs uvicorn (pip install -e ".[asgi]")'}
+    app_dir = str(REPO_ROOT / "dev" / "cert_form_ui")
+    commands = {
+        "gunicorn": lambda port: [
+            sys.executable, "-m", "gunicorn",
+            "-c", str(REPO_ROOT / "gunicorn.conf.py"),
+            f"--workers={MEMORY_WORKERS}", f"--threads={MEMORY_THREADS}",
+            f"--bind=127.0.0.1:{port}",
+            "--chdir", app_dir,
+            "server:app",
+        ],
+        "uvicorn": lambda port: [
+            sys.executable, "-m", "uvicorn",
+            "--app-dir", app_dir,
+            f"--workers={MEMORY_WORKERS}",
+            "--host=127.0.0.1", f"--port={port}",
+            "--log-level=warning",
+            "asgi:app",
+        ],
+    }
+    results: dict[str, object] = {
+        "workers": MEMORY_WORKERS,
+        "threads": MEMORY_THREADS,
+        "slow_clients": args.slow_clients,
+        "fast_clients": args.fast_clients,
+        "seconds": args.load_seconds,
+    }
+    for name, command in commands.items():
+        port = _free_port()
+        results[name] = _slow_client_load(name, command(port), port, args)
+    return results
+
+
+def bench_zip(args: argparse.Namespace) -> dict[str, object]:
+    # per_scout_zip archives: the old serial zipfile DEFLATED path next to ZipAssembler's policies, first on
+    # already-rendered PDFs (assembly cost alone), then end to end with rendering overlapping compression.
+    import zipfile
+
+    from dev import fill_cub_scout_certs as certs
+    from dev.cert_form_ui.zip_assembly import ZipAssembler
+
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as f:
+        sample_rows = list(csv.DictReader(f))
+    groups = [
+        (f"{i:03d}_scout", [dict(sample_rows[i % len(sample_rows)], **{"Scout Name": f"Scout {i}"})])
+        for i in range(args.zip_entries)
+    ]
+    settings = {"template_path": Path(certs.DEFAULT_TEMPLATE), "shift_left_inch": 0.5, "shift_down_inch": 0.5,
+                "font_name": "Helvetica", "script_font_name": None, "font_size": 14.0}
+    list(certs.fill_certificate_groups(groups[:1], **settings))
+    entries = [(f"{stem}.pdf", pdf_bytes) for stem, pdf_bytes in certs.fill_certificate_groups(groups, **settings)]
+    pool = ThreadPoolExecutor(args.zip_threads)
+
+    def legacy(items) -> tuple[int, dict[str, int]]:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, data in items:
+                zf.writestr(name, data)
+        return len(buffer.getvalue()), {}
+
+    def assembled(items, policy: str, parallel: bool) -> tuple[int, dict[str, int]]:
+        buffer = io.BytesIO()
+        with ZipAssembler(buffer.write, policy=policy, parallel=parallel, executor=pool) as archive:
+            for name, data in items:
+                archive.add(name, data)
+        return len(buffer.getvalue()), {key: archive.stats[key] for key in ("stored", "deflated")}
+
+    variants = {
+        "zipfile_deflate_serial": legacy,
+        "store": partial(assembled, policy="store", parallel=False),
+        "deflate_serial": partial(assembled, policy="deflate", parallel=False),
+        "deflate_parallel": partial(assembled, policy="deflate", parallel=True),
+        "auto_parallel": partial(assembled, policy="auto", parallel=True),
+    }
+    raw_bytes = sum(len(data) for _, data in entries)
+    results: dict[str, object] = {"entries": len(entries), "pdf_bytes": raw_bytes, "threads": args.zip_threads}
+    for name, variant in variants.items():
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            size, counts = variant(entries)
+            timings.append(time.perf_counter() - started)
+        results[name] = {
+            "seconds": round(sorted(timings)[1], 4),
+            "bytes": size,
+            "saved_percent": round(100 * (1 - size / raw_bytes), 2),
+            **counts,
+        }
+    end_to_end = {"end_to_end_zipfile_deflate": legacy, "end_to_end_auto_parallel": variants["auto_parallel"]}
+    for name, variant in end_to_end.items():
+        started = time.perf_counter()
+        variant((f"{stem}.pdf", pdf_bytes) for stem, pdf_bytes in certs.fill_certificate_groups(groups, **settings))
+        results[name] = {"seconds": round(time.perf_counter() - started, 4)}
+    pool.shutdown()
+    return results
+
+
+def bench_overlay_forms(args: argparse.Namespace) -> dict[str, object]:
+    # Certificates and rank cards with shared signatures, pack and date versus a roster where every row differs,
+    # each rendered with every text drawn inline (OVERLAY_FORM_MIN_USES=0) and with repeated text as Form XObjects.
+    from dev import fill_cub_scout_certs as certs
+    from dev import fill_cub_scout_rank_cards as ranks
+    from dev import overlay_forms
+
+    fonts_dir = REPO_ROOT / "assets" / "fonts"
+    settings = {
+        "shift_left_inch": 0.5,
+        "shift_down_inch": 0.5,
+        "font_name": "Lora",
+        "font_file": str(fonts_dir / "Lora-Regular.ttf"),
+        "script_font_name": "PatrickHand",
+        "script_font_file": str(fonts_dir / "PatrickHand-Regular.ttf"),
+        "font_size": 14.0,
+        "script_font_size": 24.0,
+    }
+    layouts = {
+        "certificates": (certs.fill_certificate_groups, Path(certs.DEFAULT_TEMPLATE), SAMPLE_CSV),
+        "rank_cards": (
+            ranks.fill_rank_card_groups, REPO_ROOT / "assets" / "templates" / "wolf_rank_card.pdf", RANK_SAMPLE_CSV
+        ),
+    }
+    default_min_uses = overlay_forms.OVERLAY_FORM_MIN_USES
+    results: dict[str, object] = {"rows": args.rows}
+    for layout, (fill, template_path, sample_csv) in layouts.items():
+        with sample_csv.open(newline="", encoding="utf-8") as f:
+            first_row = next(csv.DictReader(f))
+        rosters = {
+            "repeated": [dict(first_row, **{"Scout Name": f"Scout {i}"}) for i in range(args.rows)],
+            "unique": [
+                dict(first_row, **{name: f"{name} {i}" for name in ("Scout Name", "Den Leader", "Cubmaster", "Date")})
+                for i in range(args.rows)
+            ],
+        }
+        list(fill([("warm", rosters["repeated"][:1])], template_path=template_path, **settings))
+        for roster_name, rows in rosters.items():
+            timings: dict[str, dict[str, float]] = {}
+            for mode, min_uses in (("inline", 0), ("forms", max(2, default_min_uses))):
+                overlay_forms.OVERLAY_FORM_MIN_USES = min_uses
+                seconds = []
+                try:
+                    for _ in range(3):
+                        started = time.perf_counter()
+                        [(_, pdf_bytes)] = fill([("bench", rows)], template_path=template_path, **settings)
+                        seconds.append(time.perf_counter() - started)
+                finally:
+                    overlay_forms.OVERLAY_FORM_MIN_USES = default_min_uses
+                timings[mode] = {"seconds": round(sorted(seconds)[1], 4), "bytes": len(pdf_bytes)}
+            timings["forms"]["time_ratio"] = round(timings["forms"]["seconds"] / timings["inline"]["seconds"], 3)
+            timings["forms"]["size_ratio"] = round(timings["forms"]["bytes"] / timings["inline"]["bytes"], 3)
+            results[f"{layout}_{roster_name}"] = timings
+    return results
+
+
+def bench_watch(args: argparse.Namespace) -> dict[str, object]:
+    # --watch timings: a regular full render, the watch renderer's first render (every overlay drawn) and a
+    # re-render after one row changed (one overlay drawn, the rest reused), with their output sizes.
+    from dev import fill_cub_scout_certs as certs
+
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as f:
+        sample_rows = list(csv.DictReader(f))
+    rows = [dict(sample_rows[i % len(sample_rows)], **{"Scout Name": f"Scout {i}"}) for i in range(args.watch_rows)]
+    fonts_dir = REPO_ROOT / "assets" / "fonts"
+    settings = {
+        "template_path": Path(certs.DEFAULT_TEMPLATE),
+        "shift_left_inch": 0.5,
+        "shift_down_inch": 0.5,
+        "font_name": "Lora",
+        "font_file": str(fonts_dir / "Lora-Regular.ttf"),
+        "script_font_name": "PatrickHand",
+        "script_font_file": str(fonts_dir / "PatrickHand-Regular.ttf"),
+        "font_size": 14.0,
+        "script_font_size": 24.0,
+    }
+    list(certs.fill_certificate_groups([("warm", rows[:1])], **settings))
+
+    results: dict[str, object] = {"rows": args.watch_rows}
+    started = time.perf_counter()
+    [(_, pdf_bytes)] = certs.fill_certificate_groups([("bench", rows)], **settings)
+    results["full_render"] = {"seconds": round(time.perf_counter() - started, 4), "bytes": len(pdf_bytes)}
+
+    started = time.perf_counter()
+    renderer = certs.IncrementalCertificateRenderer(**settings)
+    pdf_bytes, redrawn = renderer.render(rows)
+    results["watch_cold"] = {
+        "seconds": round(time.perf_counter() - started, 4),
+        "bytes": len(pdf_bytes),
+        "pages_redrawn": redrawn,
+    }
+
+    seconds = []
+    for i in range(3):
+        rows[len(rows) // 2] = dict(rows[len(rows) // 2], **{"Scout Name": f"Edited Scout {i}"})
+        started = time.perf_counter()
+        pdf_bytes, redrawn = renderer.render(rows)
+        seconds.append(time.perf_counter() - started)
+    results["watch_one_row_edit"] = {
+        "seconds": round(sorted(seconds)[1], 4),
+        "bytes": len(pdf_bytes),
+        "pages_redrawn": redrawn,
+    }
+    return results
+
+
+BENCHMARKS = {
+    "asgi": bench_asgi,
+    "pdf_output": bench_pdf_output,
+    "linearize": bench_linearize,
+    "overlay_forms": bench_overlay_forms,
+    "memory": bench_memory,
+    "rate_limit": bench_rate_limit,
+    "render_memory": bench_render_memory,
+    "render_pool": bench_render_pool,
+    "startup": bench_startup,
+    "validation": bench_validation,
+    "watch": bench_watch,
+    "zip": bench_zip,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro and end-to-end benchmarks for the awards generator.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all). One of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--keys", type=int, default=5000, help="Distinct client keys for rate_limit.")
+    parser.add_argument("--calls", type=int, default=100000, help="allow() calls for rate_limit.")
+    parser.add_argument("--rows", type=int, default=40, help="Roster size for pdf_output and linearize.")
+    parser.add_argument("--requests", type=int, default=24, help="/generate requests per server for memory.")
+    parser.add_argument("--validation-rows", type=int, default=50000, help="Roster size for validation.")
+    parser.add_argument("--memory-rows", type=int, default=200, help="Roster size for render_memory.")
+    parser.add_argument("--pool-workers", type=int, default=2, help="Render processes for render_pool.")
+    parser.add_argument("--pool-renders", type=int, default=24, help="Renders per configuration for render_pool.")
+    parser.add_argument("--watch-rows", type=int, default=500, help="Roster size for watch.")
+    parser.add_argument("--zip-entries", type=int, default=60, help="Per-scout PDFs in the zip archive.")
+    parser.add_argument("--zip-threads", type=int, default=4, help="Compression threads for zip.")
+    parser.add_argument("--slow-clients", type=int, default=16, help="Slow connections held open for asgi.")
+    parser.add_argument("--fast-clients", type=int, default=4, help="Timed /validate-csv clients for asgi.")
+    parser.add_argument("--slow-seconds", type=float, default=3.0, help="Time each slow upload takes for asgi.")
+    parser.add_argument("--slow-kib-per-second", type=float, default=16.0, help="Slow download rate for asgi.")
+    parser.add_argument("--load-seconds", type=float, default=15.0, help="Duration of each asgi run.")
+    parser.add_argument(
+        "--max-mib-per-1000-rows",
+        type=float,
+        default=500.0,
+        help="render_memory fails if any output mode's tracemalloc peak, scaled to 1,000 rows, exceeds this.",
+    )
+    parser.add_argument("--mbps", type=float, default=10.0, help="Assumed client bandwidth for linearize estimates.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {name: BENCHMARKS[name](args) for name in (args.names or sorted(BENCHMARKS))}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"== {name}")
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
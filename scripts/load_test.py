@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""Replay a mix of web requests against a locally started server and report how a configuration holds up.
+
+    PYTHONPATH=. python scripts/load_test.py --rate 2 --duration 60                 # the Dockerfile's 2x4
+    PYTHONPATH=. python scripts/load_test.py --matrix 1x4,2x2,2x4,4x2 --rate 3      # sweep and recommend
+
+Each configuration gets a fresh server with the Dockerfile's ENV (plus any --env overrides). Requests arrive at a
+fixed rate whether or not earlier ones have finished, from --clients distinct X-Forwarded-For addresses, so the
+per-client rate limits apply the way they do in production.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = REPO_ROOT / "dev" / "cert_form_ui"
+SAMPLE_CSV = APP_DIR / "cub_scout_award_template.csv"
+DOCKERFILE = REPO_ROOT / "Dockerfile"
+# Request kinds and their default share of the traffic.
+DEFAULT_MIX = "validate=50,small=30,large=10,zip=10"
+RSS_SAMPLE_SECONDS = 0.5
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _dockerfile_env() -> dict[str, str]:
+    # The ENV instruction(s) of the container image, so runs use the hosted rate limits and render settings.
+    text = DOCKERFILE.read_text(encoding="utf-8").replace("\\\n", " ")
+    env = {}
+    for line in text.splitlines():
+        if line.startswith("ENV "):
+            env.update(pair.split("=", 1) for pair in line[4:].split() if "=" in pair)
+    env.pop("PORT", None)
+    return env
+
+
+def _parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("validate", "small", "large", "zip") or not weight:
+            raise argparse.ArgumentTypeError(f"bad mix entry {part!r}; use validate/small/large/zip=<weight>")
+        mix[name] = float(weight)
+    return mix
+
+
+def _parse_matrix(value: str) -> list[tuple[int, int]]:
+    configs = []
+    for part in value.split(","):
+        match = re.fullmatch(r"(\d+)x(\d+)", part.strip())
+        if not match:
+            raise argparse.ArgumentTypeError(f"bad matrix entry {part!r}; use <workers>x<threads>, e.g. 2x4")
+        configs.append((int(match.group(1)), int(match.group(2))))
+    return configs
+
+
+def _roster(rows: int, tag: str) -> bytes:
+    # Scout names carry a per-request tag: real rosters differ, so identical renders are not coalesced.
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        sample = list(reader)
+        fieldnames = reader.fieldnames or []
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
+    for i in range(rows):
+        row = dict(sample[i % len(sample)])
+        row["Scout Name"] = f"{row['Scout Name']} {tag}-{i}"
+        writer.writerow(row)
+    return output.getvalue().encode("utf-8")
+
+
+def _multipart(fields: dict[str, str], csv_bytes: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="csv"; filename="roster.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n".encode("utf-8")
+        + csv_bytes
+        + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    )
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _request(kind: str, index: int, args: argparse.Namespace) -> tuple[str, bytes, str]:
+    tag = f"r{index}"
+    if kind == "validate":
+        return "/validate-csv", *_multipart({}, _roster(args.small_rows, tag))
+    if kind == "small":
+        return "/generate", *_multipart({"outputMode": "combined_pdf"}, _roster(args.small_rows, tag))
+    if kind == "large":
+        return "/generate", *_multipart({"outputMode": "combined_pdf"}, _roster(args.large_rows, tag))
+    return "/generate", *_multipart({"outputMode": "per_scout_zip"}, _roster(args.zip_rows, tag))
+
+
+def _rss_kib(pid: int) -> int:
+    # The process and everything below it (render pool processes included).
+    total = 0
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                total += int(line.split()[1])
+        for task in Path(f"/proc/{pid}/task").iterdir():
+            for child in (task / "children").read_text().split():
+                total += _rss_kib(int(child))
+    except (OSError, ValueError):
+        pass
+    return total
+
+
+def _worker_pids(master: int) -> list[int]:
+    try:
+        return [int(pid) for pid in Path(f"/proc/{master}/task/{master}/children").read_text().split()]
+    except OSError:
+        return []
+
+
+def _server_command(args: argparse.Namespace, workers: int, threads: int, port: int) -> tuple[list[str], dict]:
+    if args.server == "uvicorn":
+        command = [
+            sys.executable, "-m", "uvicorn", "--app-dir", str(APP_DIR), f"--workers={workers}",
+            "--host=127.0.0.1", f"--port={port}", "--log-level=warning", "asgi:app",
+        ]
+        return command, {"ASGI_THREADS": str(threads)}
+    command = [
+        sys.executable, "-m", "gunicorn", "-c", str(REPO_ROOT / "gunicorn.conf.py"),
+        f"--workers={workers}", f"--threads={threads}", f"--timeout={args.timeout}",
+        f"--bind=127.0.0.1:{port}", "--chdir", str(APP_DIR), "server:app",
+    ]
+    return command, {}
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 120
+    while True:
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        if time.monotonic() > deadline or server.poll() is not None:
+            raise RuntimeError("server did not become ready")
+        time.sleep(0.2)
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float | None]:
+    values = sorted(latencies)
+    summary = {}
+    for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        value = _percentile(values, fraction)
+        summary[name] = None if value is None else round(value * 1000)
+    return summary
+
+
+def run_config(workers: int, threads: int, args: argparse.Namespace) -> dict[str, object]:
+    port = _free_port()
+    command, extra_env = _server_command(args, workers, threads, port)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = {**os.environ, **_dockerfile_env(), **extra_env, **dict(args.env)}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))
+        # A fresh limiter database per run, so one configuration's buckets do not carry into the next.
+        env["RATE_LIMIT_SQLITE_PATH"] = str(Path(tmpdir) / "ratelimit.sqlite3")
+        server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            _wait_ready(base_url, server)
+            return _replay(base_url, server.pid, args)
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+
+def _replay(base_url: str, master_pid: int, args: argparse.Namespace) -> dict[str, object]:
+    rng = random.Random(args.seed)
+    kinds = list(args.mix)
+    weights = [args.mix[kind] for kind in kinds]
+    total = max(1, int(args.rate * args.duration))
+    schedule = []
+    for i in range(total):
+        client = i % args.clients
+        schedule.append((i / args.rate, rng.choices(kinds, weights)[0], f"10.0.{client // 256}.{client % 256}"))
+    # Bodies are built before the clock starts so building them does not eat into the arrival rate.
+    bodies = [_request(kind, i, args) for i, (_, kind, _) in enumerate(schedule)]
+    results: list[tuple[str, int, float]] = []
+    lock = threading.Lock()
+    peak_rss = {"workers_kib": 0, "worker_max_kib": 0}
+    stop = threading.Event()
+
+    def sample_rss() -> None:
+        while not stop.wait(RSS_SAMPLE_SECONDS):
+            per_worker = [_rss_kib(pid) for pid in _worker_pids(master_pid)]
+            peak_rss["workers_kib"] = max(peak_rss["workers_kib"], sum(per_worker))
+            peak_rss["worker_max_kib"] = max(peak_rss["worker_max_kib"], max(per_worker, default=0))
+
+    def send(i: int) -> None:
+        _, kind, client = schedule[i]
+        path, body, content_type = bodies[i]
+        request = urllib.request.Request(
+            f"{base_url}{path}", data=body, headers={"Content-Type": content_type, "X-Forwarded-For": client}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=args.timeout + 10) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            status = exc.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        with lock:
+            results.append((kind, status, time.perf_counter() - started))
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    # Open loop: arrivals follow the schedule, not completions, so a slow server builds a queue like it would live.
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as pool:
+        for i, (offset, _, _) in enumerate(schedule):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, i)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+
+    ok = [latency for _, status, latency in results if 200 <= status < 300]
+    limited = sum(status == 429 for _, status, _ in results)
+    errors = sum(not 200 <= status < 300 and status != 429 for _, status, _ in results)
+    by_kind = {}
+    for kind in kinds:
+        kind_results = [(status, latency) for name, status, latency in results if name == kind]
+        by_kind[kind] = {
+            "requests": len(kind_results),
+            "ok": sum(200 <= status < 300 for status, _ in kind_results),
+            **_latency_summary([latency for status, latency in kind_results if 200 <= status < 300]),
+        }
+    return {
+        "requests": len(results),
+        "offered_rate": round(total / args.duration, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        **_latency_summary(ok),
+        "error_rate": round(errors / len(results), 4),
+        "rate_limited_rate": round(limited / len(results), 4),
+        "peak_workers_rss_mib": round(peak_rss["workers_kib"] / 1024, 1),
+        "peak_worker_rss_mib": round(peak_rss["worker_max_kib"] / 1024, 1),
+        "by_kind": by_kind,
+    }
+
+
+def recommend(rows: list[dict[str, object]], slo_p95_ms: float, max_error_rate: float) -> dict[str, object] | None:
+    # Among configurations that meet the SLO, the one using the least memory while staying within 5% of the best
+    # throughput: adding workers past that point buys RSS, not requests.
+    passing = [
+        row for row in rows
+        if row["p95_ms"] is not None and row["p95_ms"] <= slo_p95_ms and row["error_rate"] <= max_error_rate
+    ]
+    if not passing:
+        return None
+    best = max(row["throughput_rps"] for row in passing)
+    close = [row for row in passing if row["throughput_rps"] >= best * 0.95]
+    return min(close, key=lambda row: (row["peak_workers_rss_mib"], row["p95_ms"]))
+
+
+def format_table(rows: list[dict[str, object]], recommended: dict[str, object] | None, slo_p95_ms: float) -> str:
+    header = ["config", "req/s", "p50 ms", "p95 ms", "p99 ms", "errors", "429s", "RSS MiB (peak, all)", "SLO"]
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    for row in rows:
+        meets = row["p95_ms"] is not None and row["p95_ms"] <= slo_p95_ms
+        name = f"**{row['config']}**" if row is recommended else row["config"]
+        cells = [
+            name, row["throughput_rps"], row["p50_ms"], row["p95_ms"], row["p99_ms"],
+            f"{row['error_rate']:.1%}", f"{row['rate_limited_rate']:.1%}", row["peak_workers_rss_mib"],
+            "yes" if meets else "no",
+        ]
+        lines.append("| " + " | ".join(str(cell) for cell in cells) + " |")
+    if recommended is None:
+        lines.append(f"\nNo configuration met p95 <= {slo_p95_ms:.0f} ms; lower --rate or add capacity.")
+    else:
+        lines.append(f"\nRecommended: {recommended['config']} (within 5% of the best throughput, least memory).")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=("gunicorn", "uvicorn"), default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn --threads, or ASGI_THREADS for uvicorn.")
+    parser.add_argument("--timeout", type=int, default=120, help="gunicorn --timeout; also bounds each request.")
+    parser.add_argument("--matrix", type=_parse_matrix, help="Comma-separated <workers>x<threads> configurations.")
+    parser.add_argument("--rate", type=float, default=2.0, help="Requests per second offered to the server.")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of arrivals per configuration.")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix(DEFAULT_MIX), help=f"Default: {DEFAULT_MIX}.")
+    parser.add_argument("--clients", type=int, default=50, help="Distinct client addresses the traffic comes from.")
+    parser.add_argument("--small-rows", type=int, default=5, help="Roster size for validate and small generate.")
+    parser.add_argument("--large-rows", type=int, default=200, help="Roster size for large generate.")
+    parser.add_argument("--zip-rows", type=int, default=20, help="Roster size for per-scout ZIPs.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open connections the generator allows.")
+    parser.add_argument(
+        "--env", action="append", default=[], type=lambda value: tuple(value.split("=", 1)),
+        metavar="KEY=VALUE", help="Server environment on top of the Dockerfile's ENV (repeatable).",
+    )
+    parser.add_argument("--slo-p95-ms", type=float, default=5000.0, help="p95 target for the recommendation.")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate (429s excluded) allowed.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+    if any(len(pair) != 2 for pair in args.env):
+        parser.error("--env takes KEY=VALUE")
+
+    rows = []
+    for workers, threads in args.matrix or [(args.workers, args.threads)]:
+        config = f"{workers}x{threads}"
+        print(f"running {args.server} {config} at {args.rate} req/s for {args.duration:.0f}s ...", file=sys.stderr)
+        rows.append({"config": config, **run_config(workers, threads, args)})
+    recommended = recommend(rows, args.slo_p95_ms, args.max_error_rate)
+    if args.json:
+        print(json.dumps({"results": rows, "recommended": recommended and recommended["config"]}, indent=2))
+        return
+    print(format_table(rows, recommended, args.slo_p95_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,90 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import asyncio
+import gzip
 import io
+import os
+import re
+import tempfile
+import threading
+import time
 import zipfile
 from pathlib import Path
 
-from pypdf import PdfReader
+from pypdf import PdfReader, PdfWriter
+from pypdf.annotations import Link
 
-from dev.cert_form_ui.server import app
+# The smoke run makes more /generate calls than the default per-minute budget allows.
+os.environ.setdefault("RATE_LIMIT_GENERATE_PER_MINUTE", "60")
+
+from dev.batch_render import run_batch
+from dev.fill_cub_scout_certs import (
+    DEFAULT_TEMPLATE,
+    IncrementalCertificateRenderer,
+    _read_rows,
+    fill_certificate_groups,
+)
+from dev.cert_form_ui import asgi, memory_budget
+from dev.cert_form_ui import server
+from dev.cert_form_ui.rate_limit import SQLiteTokenBucketLimiter
+from dev.cert_form_ui.render_jobs import RENDER_JOB_LISTENER_GRACE_SECONDS
+from dev.cert_form_ui.render_pool import RenderPool
+from dev.cert_form_ui.server import app, template_store, warm_up
+from dev.pdf_output import linearize_available
+
+
+def check_linearized(pdf_bytes: bytes) -> None:
+    # The linearization dictionary must be the first object, and its /H entry must point at the hint stream.
+    head = re.match(rb"%PDF-\d\.\d\s*(?:%[^\n]*\n)?\s*\d+ 0 obj\s*<<(.*?)>>", pdf_bytes, re.S)
+    if not head or not re.search(rb"/Linearized\s+1", head.group(1)):
+        raise SystemExit("Linearization smoke test failed: no linearization dictionary")
+    params = dict(re.findall(rb"/([A-Z])\s+(\d+)", head.group(1)))
+    if int(params[b"L"]) != len(pdf_bytes):
+        raise SystemExit("Linearization smoke test failed: /L does not match file length")
+    hints = re.search(rb"/H\s*\[\s*(\d+)\s+(\d+)", head.group(1))
+    if not hints:
+        raise SystemExit("Linearization smoke test failed: no hint stream offsets")
+    hint_object = pdf_bytes[int(hints.group(1)) : int(hints.group(1)) + int(hints.group(2))]
+    # /S is the offset of the shared object hint table inside the hint stream.
+    if not re.match(rb"\d+ 0 obj\s*<<[^>]*/S\s+\d+", hint_object):
+        raise SystemExit("Linearization smoke test failed: hint stream has no shared object hint table")
+
+    import pikepdf
+
+    with pikepdf.open(io.BytesIO(pdf_bytes)) as pdf:
+        if not pdf.is_linearized or not pdf.check_linearization():
+            raise SystemExit("Linearization smoke test failed: qpdf rejected the hint tables")
+
+
+def call_asgi(method: str, path: str, body: bytes, content_type: str) -> tuple[int, bytes]:
+    # Drives asgi.app the way an ASGI server would, with the upload split across two receive messages.
+    half = len(body) // 2
+    messages = [
+        {"type": "http.request", "body": body[:half], "more_body": True},
+        {"type": "http.request", "body": body[half:], "more_body": False},
+    ]
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"content-type", content_type.encode("latin-1"))],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8080),
+    }
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:])
 
 
 def main() -> None:
@@ -28,6 +105,116 @@ def main() -> None:
     validate_response = client.post("/validate-csv", data=validate_payload, content_type="multipart/form-data")
     if validate_response.status_code != 200:
         raise SystemExit(f"Validate smoke test failed: status={validate_response.status_code}")
+    upload_token = validate_response.get_json().get("upload_token")
+    if not upload_token:
+        raise SystemExit("Validate smoke test failed: no upload token returned")
+
+    # A large CSV with a blank Scout Name on every row stops at the error cap with a summarized report.
+    header, _, body = csv_bytes.partition(b"\n")
+    nameless = re.sub(rb"(?m)^([^,\n]*,[^,\n]*,)[^,\n]*", rb"\1", body)
+    dirty_response = client.post(
+        "/validate-csv",
+        data={"csv": (io.BytesIO(header + b"\n" + nameless * 200), "dirty.csv")},
+        content_type="multipart/form-data",
+    )
+    dirty_report = dirty_response.get_json()
+    if (
+        dirty_report.get("ok")
+        or not dirty_report.get("truncated")
+        or len(dirty_report["errors"]) != dirty_report["error_count"]
+        or dirty_report["rows_checked"] >= dirty_report["row_count"]
+    ):
+        raise SystemExit(f"Dirty CSV validate smoke test failed: {dict(dirty_report, errors='...')}")
+
+    token_response = client.post(
+        "/generate",
+        data={"uploadToken": upload_token, "outputMode": "combined_pdf"},
+        content_type="multipart/form-data",
+    )
+    if token_response.status_code != 200 or token_response.headers.get("Content-Type") != "application/pdf":
+        raise SystemExit(f"Upload token smoke test failed: status={token_response.status_code}")
+    expired_response = client.post(
+        "/generate",
+        data={"uploadToken": "not-a-token"},
+        content_type="multipart/form-data",
+    )
+    if expired_response.status_code != 410:
+        raise SystemExit(f"Expired token smoke test failed: status={expired_response.status_code}")
+
+    preview_response = client.post(
+        "/generate",
+        data={"uploadToken": upload_token, "preview": "1"},
+        content_type="multipart/form-data",
+    )
+    if preview_response.status_code != 200:
+        raise SystemExit(f"Preview smoke test failed: status={preview_response.status_code}")
+    if len(PdfReader(io.BytesIO(preview_response.data)).pages) != 1:
+        raise SystemExit("Preview smoke test failed: expected exactly one page")
+    bad_range_response = client.post(
+        "/generate",
+        data={"uploadToken": upload_token, "pageRange": "3-1"},
+        content_type="multipart/form-data",
+    )
+    if bad_range_response.status_code != 400:
+        raise SystemExit(f"Page range smoke test failed: status={bad_range_response.status_code}")
+
+    linearized_response = client.post(
+        "/generate",
+        data={"uploadToken": upload_token, "outputMode": "combined_pdf", "linearize": "1"},
+        content_type="multipart/form-data",
+    )
+    if linearize_available():
+        if linearized_response.status_code != 200:
+            raise SystemExit(f"Linearized output smoke test failed: status={linearized_response.status_code}")
+        check_linearized(linearized_response.data)
+    elif linearized_response.status_code != 400:
+        raise SystemExit(f"Linearized output smoke test failed: status={linearized_response.status_code}")
+
+    job_response = client.post(
+        "/generate",
+        data={"uploadToken": upload_token, "outputMode": "combined_pdf", "progress": "1"},
+        content_type="multipart/form-data",
+    )
+    if job_response.status_code != 202:
+        raise SystemExit(f"Progress job smoke test failed: status={job_response.status_code}")
+    job = job_response.get_json()
+    with client.get(job["events_url"]) as events_response:
+        events = events_response.get_data(as_text=True)
+    if "event: progress" not in events or "event: complete" not in events:
+        raise SystemExit(f"Progress job smoke test failed: unexpected events {events!r}")
+    # Past the per-process cap, progress streams are refused so they cannot hold every request thread.
+    open_streams = [client.get(job["events_url"], buffered=False) for _ in range(server.JOB_EVENT_MAX_STREAMS)]
+    refused = client.get(job["events_url"])
+    for open_stream in reversed(open_streams):
+        # Reverse order: each unread stream still holds the request context it pushed.
+        open_stream.close()
+    if refused.status_code != 503 or not refused.headers.get("Retry-After"):
+        raise SystemExit(f"Progress stream cap smoke test failed: status={refused.status_code}")
+    if server.job_event_slots.snapshot()["active"] != 0:
+        raise SystemExit(f"Progress stream cap smoke test failed: {server.job_event_slots.snapshot()}")
+    job_download = client.get(job["download_url"])
+    if job_download.status_code != 200 or not job_download.data.startswith(b"%PDF"):
+        raise SystemExit(f"Progress job download smoke test failed: status={job_download.status_code}")
+    if client.get(job["download_url"]).status_code != 410:
+        raise SystemExit("Progress job download smoke test failed: output was kept after it was downloaded")
+    # A job nobody follows is cancelled instead of rendering until RENDER_BUDGET_SECONDS.
+    server.render_jobs.listener_grace_seconds = 0
+    try:
+        unwatched = client.post(
+            "/generate",
+            data={"uploadToken": upload_token, "outputMode": "per_scout_zip", "progress": "1"},
+            content_type="multipart/form-data",
+        ).get_json()
+        deadline = time.monotonic() + 30
+        while (server.render_jobs.status(unwatched["job_id"]) or {}).get("state") not in ("complete", "failed"):
+            if time.monotonic() > deadline:
+                raise SystemExit("Abandoned job smoke test failed: job never finished")
+            time.sleep(0.05)
+        unwatched_status = server.render_jobs.status(unwatched["job_id"])
+        if unwatched_status["state"] != "failed" or unwatched_status["status_code"] != 499:
+            raise SystemExit(f"Abandoned job smoke test failed: {unwatched_status}")
+    finally:
+        server.render_jobs.listener_grace_seconds = RENDER_JOB_LISTENER_GRACE_SECONDS
 
     payload = {
         "csv": (io.BytesIO(csv_bytes), "input.csv"),
@@ -72,6 +259,59 @@ def main() -> None:
     zf = zipfile.ZipFile(io.BytesIO(zip_response.data))
     if not zf.namelist():
         raise SystemExit("ZIP smoke test failed: archive is empty")
+    if zf.testzip() is not None or any(info.compress_type != zipfile.ZIP_STORED for info in zf.infolist()):
+        # Under the default auto policy, already-compressed PDFs are stored rather than deflated.
+        raise SystemExit("ZIP smoke test failed: entries are corrupt or were deflated")
+
+    # Identical input renders to identical bytes, and a request naming their ETag gets a bodiless 304.
+    zip_payload["csv"] = (io.BytesIO(csv_bytes), "input.csv")
+    repeat_response = client.post("/generate", data=zip_payload, content_type="multipart/form-data")
+    if repeat_response.data != zip_response.data or not zip_response.headers.get("ETag"):
+        raise SystemExit("Deterministic output smoke test failed: identical requests gave different bytes")
+    zip_payload["csv"] = (io.BytesIO(csv_bytes), "input.csv")
+    conditional_response = client.post(
+        "/generate",
+        data=zip_payload,
+        content_type="multipart/form-data",
+        headers={"If-None-Match": zip_response.headers["ETag"]},
+    )
+    if conditional_response.status_code != 304 or conditional_response.data:
+        raise SystemExit(f"Conditional generate smoke test failed: status={conditional_response.status_code}")
+
+    den_zip_payload = {
+        "csv": (io.BytesIO(csv_bytes), "input.csv"),
+        "fontName": "Merriweather",
+        "scriptFont": "DancingScript",
+        "outputName": "ci_smoke_dens.zip",
+        "outputMode": "per_den_zip",
+    }
+    den_zip_response = client.post("/generate", data=den_zip_payload, content_type="multipart/form-data")
+    if den_zip_response.status_code != 200:
+        raise SystemExit(f"Den ZIP smoke test failed: status={den_zip_response.status_code}")
+    den_names = zipfile.ZipFile(io.BytesIO(den_zip_response.data)).namelist()
+    if not den_names or not all(name.startswith("den_") for name in den_names):
+        raise SystemExit(f"Den ZIP smoke test failed: unexpected entries {den_names}")
+    # Den values that sanitize to the same name still get one ZIP entry each.
+    colliding_lines = csv_bytes.decode("utf-8").strip().splitlines()
+    colliding_csv = "\n".join(
+        [colliding_lines[0] + ",Den Number"]
+        + [f"{line},{'Den 1' if i % 2 else 'Den/1'}" for i, line in enumerate(colliding_lines[1:])]
+    ).encode("utf-8")
+    colliding_response = client.post(
+        "/generate",
+        data={"csv": (io.BytesIO(colliding_csv), "dens.csv"), "outputMode": "per_den_zip"},
+        content_type="multipart/form-data",
+    )
+    colliding_names = sorted(zipfile.ZipFile(io.BytesIO(colliding_response.data)).namelist())
+    if colliding_names != ["den_Den_1.pdf", "den_Den_1_2.pdf"]:
+        raise SystemExit(f"Colliding den ZIP smoke test failed: unexpected entries {colliding_names}")
+    adventure_rank_zip = client.post(
+        "/generate",
+        data={"csv": (io.BytesIO(csv_bytes), "input.csv"), "outputMode": "per_rank_zip"},
+        content_type="multipart/form-data",
+    )
+    if adventure_rank_zip.status_code != 400:
+        raise SystemExit(f"Output mode smoke test failed: adventures per_rank_zip -> {adventure_rank_zip.status_code}")
 
     rank_validate_payload = {
         "csv": (io.BytesIO(rank_csv_bytes), "rank_input.csv"),
@@ -115,12 +355,215 @@ def main() -> None:
             raise SystemExit(
                 f"{rank} rank PDF smoke test failed: expected 90-degree rotation, got {first_rotate}."
             )
+        # The sample roster shares its den leader and cubmaster, so they are drawn once and placed as forms.
+        rank_xobjects = rank_reader.pages[0]["/Resources"].get_object().get("/XObject", {})
+        if not any(name.startswith("/RepeatedText") for name in rank_xobjects):
+            raise SystemExit(f"{rank} rank PDF smoke test failed: repeated text was not shared as a form.")
         rank_text = "\n".join((p.extract_text() or "") for p in rank_reader.pages)
         if "earned the rank of" not in rank_text:
             raise SystemExit(f"{rank} rank PDF smoke test failed: expected rank template text not found.")
         if "for completing" in rank_text:
             raise SystemExit(f"{rank} rank PDF smoke test failed: adventure template text detected.")
 
+    # A budget below the buffered estimate but above one page forces ZIPs to stream and combined PDFs to be refused.
+    memory_budget.RENDER_MEMORY_BUDGET_MB = 3
+    try:
+        for progress in ("0", "1"):
+            streamed_response = client.post(
+                "/generate",
+                data={"csv": (io.BytesIO(csv_bytes), "input.csv"), "outputMode": "per_scout_zip", "progress": progress},
+                content_type="multipart/form-data",
+            )
+            if streamed_response.status_code == 202:
+                with client.get(streamed_response.get_json()["events_url"]) as events_response:
+                    events_response.get_data()
+                streamed_response = client.get(streamed_response.get_json()["download_url"])
+            if streamed_response.status_code != 200:
+                raise SystemExit(f"Streamed ZIP smoke test failed: status={streamed_response.status_code}")
+            streamed_zip = zipfile.ZipFile(io.BytesIO(streamed_response.data))
+            if streamed_zip.namelist() != zf.namelist() or streamed_zip.testzip() is not None:
+                raise SystemExit(f"Streamed ZIP smoke test failed: unexpected entries {streamed_zip.namelist()}")
+        header, _, body = csv_bytes.partition(b"\n")
+        over_budget = client.post(
+            "/generate",
+            data={"csv": (io.BytesIO(header + b"\n" + body * 4), "input.csv"), "outputMode": "combined_pdf"},
+            content_type="multipart/form-data",
+        )
+        if over_budget.status_code != 413:
+            raise SystemExit(f"Memory budget smoke test failed: status={over_budget.status_code}")
+    finally:
+        memory_budget.RENDER_MEMORY_BUDGET_MB = 0
+
+    metrics_response = client.get("/metrics")
+    if metrics_response.status_code != 200:
+        raise SystemExit(f"Metrics smoke test failed: status={metrics_response.status_code}")
+    admission = metrics_response.get_json().get("admission", {})
+    if not admission.get("admitted_total") or admission.get("running") != 0:
+        raise SystemExit(f"Metrics smoke test failed: unexpected admission snapshot {admission}")
+    if "coalesced_total" not in metrics_response.get_json().get("coalescing", {}):
+        raise SystemExit("Metrics smoke test failed: coalescing counters missing")
+    memory = metrics_response.get_json().get("memory", {})
+    if memory.get("streamed_total") != 2 or memory.get("refused_total") != 1:
+        raise SystemExit(f"Metrics smoke test failed: unexpected memory snapshot {memory}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        batch_jobs = [{"input": str(csv_path.resolve())}, {"input": str(rank_csv_path.resolve())}]
+        batch_settings = {
+            "shift_left_inch": 0.5,
+            "shift_down_inch": 0.5,
+            "font_name": "Helvetica",
+            "script_font_name": None,
+            "font_size": 14.0,
+        }
+        first_batch = run_batch([dict(job) for job in batch_jobs], Path(tmpdir), batch_settings, workers=2)
+        if first_batch["rendered"] != 2 or first_batch["failed"]:
+            raise SystemExit(f"Batch smoke test failed: {first_batch['files']}")
+        rerun_batch = run_batch([dict(job) for job in batch_jobs], Path(tmpdir), batch_settings, workers=2)
+        if rerun_batch["skipped"] != 2:
+            raise SystemExit(f"Batch rerun smoke test failed: {rerun_batch['files']}")
+        # Editing a manifest's own template re-renders its roster instead of reusing the stale output.
+        custom_template = Path(tmpdir) / "custom_template.pdf"
+        custom_template.write_bytes(Path(DEFAULT_TEMPLATE).read_bytes())
+        custom_output = str(Path(tmpdir) / "custom.pdf")
+        custom_jobs = [{"input": str(csv_path.resolve()), "template": str(custom_template), "output": custom_output}]
+        run_batch([dict(job) for job in custom_jobs], Path(tmpdir), batch_settings, workers=1)
+        custom_template.write_bytes(custom_template.read_bytes() + b"\n% edited\n")
+        edited_batch = run_batch([dict(job) for job in custom_jobs], Path(tmpdir), batch_settings, workers=1)
+        if edited_batch["rendered"] != 1:
+            raise SystemExit(f"Batch custom template smoke test failed: {edited_batch['files']}")
+
+    watch_renderer = IncrementalCertificateRenderer(
+        template_path=Path(DEFAULT_TEMPLATE),
+        shift_left_inch=0.5,
+        shift_down_inch=0.5,
+        font_name="Helvetica",
+        script_font_name=None,
+        font_size=14.0,
+    )
+    watch_rows = _read_rows(csv_path) * 3
+    watch_pdf, redrawn = watch_renderer.render(watch_rows)
+    watch_pages = len(PdfReader(io.BytesIO(watch_pdf)).pages)
+    watch_rows[-1] = dict(watch_rows[-1], **{"Scout Name": "Edited Scout"})
+    _, edited_redrawn = watch_renderer.render(watch_rows)
+    if redrawn != watch_pages or edited_redrawn != 1:
+        raise SystemExit(f"Watch smoke test failed: redrew {redrawn}/{watch_pages}, then {edited_redrawn} after one edit")
+    # Template annotations are outside the shared template form, so each watch page needs its own copy.
+    with tempfile.TemporaryDirectory() as tmpdir:
+        annotated = PdfWriter(clone_from=DEFAULT_TEMPLATE)
+        annotated.add_annotation(0, Link(rect=(36, 36, 180, 60), url="https://www.scouting.org"))
+        annotated_path = Path(tmpdir) / "annotated.pdf"
+        annotated.write(annotated_path)
+        annotated_settings = {
+            "template_path": annotated_path,
+            "shift_left_inch": 0.5,
+            "shift_down_inch": 0.5,
+            "font_name": "Helvetica",
+            "script_font_name": None,
+            "font_size": 14.0,
+        }
+        [(_, regular_pdf)] = fill_certificate_groups([("annotated", watch_rows)], **annotated_settings)
+        annotated_pdf, _ = IncrementalCertificateRenderer(**annotated_settings).render(watch_rows)
+        annotation_counts = [
+            [len(page.get("/Annots") or []) for page in PdfReader(io.BytesIO(pdf)).pages]
+            for pdf in (regular_pdf, annotated_pdf)
+        ]
+        if annotation_counts[0] != annotation_counts[1] or not all(annotation_counts[1]):
+            raise SystemExit(f"Watch annotation smoke test failed: regular vs. watch {annotation_counts}")
+
+    page_response = client.get("/adventures", headers={"Accept-Encoding": "gzip"})
+    page_html = gzip.decompress(page_response.data).decode("utf-8")
+    script_url = re.search(r'src="(/app\.[0-9a-f]+\.js)"', page_html)
+    if page_response.headers.get("Content-Encoding") != "gzip" or not script_url:
+        raise SystemExit("Static asset smoke test failed: page is not compressed or app.js is not fingerprinted")
+    script_response = client.get(script_url.group(1))
+    if script_response.status_code != 200 or "immutable" not in script_response.headers.get("Cache-Control", ""):
+        raise SystemExit(f"Static asset smoke test failed: {script_url.group(1)} -> {script_response.status_code}")
+    revalidated = client.get(script_url.group(1), headers={"If-None-Match": script_response.headers["ETag"]})
+    if revalidated.status_code != 304 or client.get("/server.py").status_code != 404:
+        raise SystemExit("Static asset smoke test failed: no 304 on a matching ETag, or source files are served")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        template_store.directory = Path(tmpdir)
+        template_bytes = Path(DEFAULT_TEMPLATE).read_bytes()
+        upload = {"template": (io.BytesIO(template_bytes), "council.pdf")}
+        upload_response = client.post("/templates", data=upload, content_type="multipart/form-data")
+        template_hash = (upload_response.get_json() or {}).get("hash")
+        if upload_response.status_code != 201 or not (Path(tmpdir) / f"{template_hash}.json").exists():
+            raise SystemExit(f"Template upload smoke test failed: status={upload_response.status_code}")
+        custom_payload = {
+            "csv": (io.BytesIO(csv_bytes), "input.csv"),
+            "outputMode": "combined_pdf",
+            "templateHash": template_hash,
+        }
+        custom_response = client.post("/generate", data=custom_payload, content_type="multipart/form-data")
+        if custom_response.status_code != 200 or not custom_response.data.startswith(b"%PDF"):
+            raise SystemExit(f"Custom template generate smoke test failed: status={custom_response.status_code}")
+        # Recording use must not touch the PDF: template caches and render keys are keyed on its mtime.
+        stored_mtime = template_store.pdf_path(template_hash).stat().st_mtime_ns
+        template_store.put(template_bytes, "council.pdf")
+        if template_store.pdf_path(template_hash).stat().st_mtime_ns != stored_mtime:
+            raise SystemExit("Template store smoke test failed: re-upload changed the stored PDF's mtime")
+        if client.get("/templates").status_code != 404:
+            raise SystemExit("Template listing smoke test failed: listed without the admin token")
+
+        # A second upload over a one-template cap evicts the idle first one; with nothing idle it is refused.
+        limits = (template_store.max_templates, template_store.evict_idle_seconds)
+        template_store.max_templates, template_store.evict_idle_seconds = 1, 0
+        try:
+            second = {"template": (io.BytesIO(template_bytes + b"\n% second\n"), "second.pdf")}
+            evicting_response = client.post("/templates", data=second, content_type="multipart/form-data")
+            if evicting_response.status_code != 201 or template_store.index(template_hash) is not None:
+                raise SystemExit(f"Template store cap smoke test failed: status={evicting_response.status_code}")
+            template_store.evict_idle_seconds = 3600
+            third = {"template": (io.BytesIO(template_bytes + b"\n% third\n"), "third.pdf")}
+            full_response = client.post("/templates", data=third, content_type="multipart/form-data")
+            if full_response.status_code != 507 or len(list(Path(tmpdir).glob("*.pdf"))) != 1:
+                raise SystemExit(f"Template store cap smoke test failed: full store -> {full_response.status_code}")
+        finally:
+            template_store.max_templates, template_store.evict_idle_seconds = limits
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        limiter = SQLiteTokenBucketLimiter("smoke", 1, db_path=Path(tmpdir) / "limits.db")
+        if not limiter.allow("client") or limiter.allow("client"):
+            raise SystemExit("SQLite rate limiter smoke test failed: one-request bucket did not run out")
+        # A limiter file that cannot be opened must let requests through rather than fail them.
+        limiter.db_path, limiter._local = Path(tmpdir), threading.local()
+        if not limiter.allow("client"):
+            raise SystemExit("SQLite rate limiter smoke test failed: an unopenable database did not fail open")
+
+    server.render_pool = RenderPool(1, max_jobs=1, health_interval_seconds=0)
+    try:
+        pooled_payload = {"csv": (io.BytesIO(csv_bytes), "input.csv"), "outputMode": "per_den_zip", "shiftLeft": "0.45"}
+        pooled_response = client.post("/generate", data=pooled_payload, content_type="multipart/form-data")
+        pool_metrics = client.get("/metrics").get_json()["render_pool"]
+        if pooled_response.status_code != 200 or not zipfile.ZipFile(io.BytesIO(pooled_response.data)).namelist():
+            raise SystemExit(f"Render pool smoke test failed: status={pooled_response.status_code}")
+        if pool_metrics["jobs_total"] != 1 or pool_metrics["restarts"] != {"max_jobs": 1}:
+            raise SystemExit(f"Render pool smoke test failed: metrics={pool_metrics}")
+    finally:
+        server.render_pool.close()
+        server.render_pool = None
+
+    rules_response = client.get("/validation-rules")
+    rules = rules_response.get_json()
+    if rules_response.status_code != 200 or set(rules["workflows"]) != {"adventures", "ranks"}:
+        raise SystemExit(f"Validation rules smoke test failed: status={rules_response.status_code}")
+    if client.get("/validation-rules", headers={"If-None-Match": rules_response.headers["ETag"]}).status_code != 304:
+        raise SystemExit("Validation rules smoke test failed: no 304 on a matching ETag")
+
+    asgi_csv = b"".join(
+        [b'--smoke\r\nContent-Disposition: form-data; name="csv"; filename="input.csv"\r\n\r\n', csv_bytes,
+         b"\r\n--smoke--\r\n"]
+    )
+    asgi_status, asgi_body = call_asgi("POST", "/generate", asgi_csv, "multipart/form-data; boundary=smoke")
+    if asgi_status != 200 or not asgi_body.startswith(b"%PDF") or not asgi_body.rstrip().endswith(b"%%EOF"):
+        raise SystemExit(f"ASGI smoke test failed: status={asgi_status}")
+
+    warm_up()
+    readyz_response = client.get("/readyz")
+    if readyz_response.status_code != 200 or not readyz_response.get_json().get("ready"):
+        raise SystemExit(f"Readiness smoke test failed: status={readyz_response.status_code}")
+
     print("Smoke tests passed.")
 
 